@@ -11,15 +11,15 @@ from app.modules.console import (
     tools_console_main,
 )
 from app.utilities.logger import logger
+from app.utilities.status import status_service
 
 
 def create_all():
-    import app.domain.entities
-
-    from app.data.config import Base, DBConnection
+    from app.data.config import DBConnection
+    from app.data.migrations import migrate
 
     with DBConnection() as db:
-        Base.metadata.create_all(db.engine)
+        migrate(db.engine)
 
 
 def connection_choices():
@@ -30,6 +30,7 @@ def connection_choices():
     console.append_item(FuncItem('V2RAY', v2ray_console_main))
     console.append_item(FuncItem('BADUDP', badvpn_console_main))
 
+    status_service.prefetch()
     console.show()
 
 
@@ -1,7 +1,11 @@
 import os
+import threading
+import typing as t
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
 
 DATABASE_PATH = '/etc/GLManager/'
 DATABASE_NAME = 'db.sqlite3'
@@ -17,11 +21,62 @@ if not os.path.exists(DATABASE_PATH):
 
 DATABASE_URI = 'sqlite:///' + os.path.join(DATABASE_PATH, DATABASE_NAME)
 
+SQLITE_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('busy_timeout', 5000),
+    ('mmap_size', 64 * 1024 * 1024),
+    ('cache_size', -8 * 1024),
+    ('temp_store', 'MEMORY'),
+)
+
+_engines: t.Dict[str, t.Tuple[Engine, sessionmaker]] = {}
+_engines_lock = threading.Lock()
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS:
+        cursor.execute('PRAGMA %s = %s' % (name, value))
+    cursor.close()
+
+
+def get_engine(uri: str = DATABASE_URI) -> t.Tuple[Engine, sessionmaker]:
+    with _engines_lock:
+        if uri not in _engines:
+            kwargs = {}
+            if uri.startswith('sqlite'):
+                kwargs = {
+                    'poolclass': QueuePool,
+                    'pool_size': 5,
+                    'max_overflow': 10,
+                    'connect_args': {'check_same_thread': False},
+                }
+
+                if uri in ('sqlite://', 'sqlite:///:memory:'):
+                    kwargs = {'poolclass': StaticPool, 'connect_args': kwargs['connect_args']}
+
+            engine = create_engine(uri, **kwargs)
+            if uri.startswith('sqlite'):
+                event.listen(engine, 'connect', set_sqlite_pragmas)
+
+            _engines[uri] = (engine, sessionmaker(bind=engine))
+
+        return _engines[uri]
+
+
+def dispose_engines() -> None:
+    with _engines_lock:
+        for engine, _ in _engines.values():
+            engine.dispose()
+
+        _engines.clear()
+
 
 class DBConnection:
     def __init__(self, uri: str = DATABASE_URI):
         self.__uri = uri
-        self.__engine = create_engine(self.__uri)
+        self.__engine, self.__sessionmaker = get_engine(self.__uri)
         self.__session = None
 
     @property
@@ -37,7 +92,7 @@ class DBConnection:
         return self.__session
 
     def __enter__(self) -> 'DBConnection':
-        self.__session = sessionmaker()(bind=self.engine)
+        self.__session = self.__sessionmaker()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb) -> None:
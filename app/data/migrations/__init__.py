@@ -0,0 +1 @@
+from .migrator import migrate, current_version, LATEST_VERSION
@@ -0,0 +1,56 @@
+import typing as t
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+from .versions import MIGRATIONS
+
+LATEST_VERSION = MIGRATIONS[-1].VERSION
+
+
+def current_version(connection) -> int:
+    try:
+        version = connection.execute(text('SELECT MAX(version) FROM schema_version')).scalar()
+    except OperationalError:
+        return 0
+
+    return version or 0
+
+
+def pending(version: int) -> t.List:
+    return [migration for migration in MIGRATIONS if migration.VERSION > version]
+
+
+def migrate(engine: Engine) -> int:
+    with engine.connect() as connection:
+        version = current_version(connection)
+
+    if version >= LATEST_VERSION:
+        return version
+
+    with engine.connect() as connection:
+        connection.exec_driver_sql('BEGIN IMMEDIATE')
+        connection.execute(
+            text(
+                'CREATE TABLE IF NOT EXISTS schema_version ('
+                'version INTEGER NOT NULL PRIMARY KEY, '
+                'description VARCHAR(255), '
+                'applied_at DATETIME DEFAULT CURRENT_TIMESTAMP)'
+            )
+        )
+
+        version = current_version(connection)
+        for migration in pending(version):
+            migration.upgrade(connection)
+            connection.execute(
+                text(
+                    'INSERT INTO schema_version (version, description) VALUES (:version, :description)'
+                ),
+                {'version': migration.VERSION, 'description': migration.DESCRIPTION},
+            )
+            version = migration.VERSION
+
+        connection.commit()
+
+    return version
@@ -0,0 +1,6 @@
+from . import m0001_initial, m0002_user_indexes
+
+MIGRATIONS = [
+    m0001_initial,
+    m0002_user_indexes,
+]
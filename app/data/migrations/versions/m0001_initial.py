@@ -0,0 +1,46 @@
+from sqlalchemy import text
+
+VERSION = 1
+DESCRIPTION = 'users, badvpn_ports and ports tables'
+
+STATEMENTS = [
+    '''CREATE TABLE IF NOT EXISTS users (
+        id INTEGER NOT NULL,
+        username VARCHAR(50) NOT NULL,
+        password VARCHAR(50) NOT NULL,
+        connection_limit INTEGER NOT NULL,
+        expiration_date DATETIME NOT NULL,
+        v2ray_uuid VARCHAR(50),
+        created_at DATETIME,
+        updated_at DATETIME,
+        PRIMARY KEY (id),
+        UNIQUE (username),
+        UNIQUE (v2ray_uuid)
+    )''',
+    '''CREATE TABLE IF NOT EXISTS badvpn_ports (
+        id INTEGER NOT NULL,
+        host VARCHAR(45) NOT NULL,
+        port INTEGER NOT NULL,
+        max_clients INTEGER NOT NULL,
+        created_at DATETIME,
+        updated_at DATETIME,
+        PRIMARY KEY (id),
+        UNIQUE (port)
+    )''',
+    '''CREATE TABLE IF NOT EXISTS ports (
+        id INTEGER NOT NULL,
+        port INTEGER NOT NULL,
+        protocol VARCHAR(3) NOT NULL,
+        service VARCHAR(50) NOT NULL,
+        created_at DATETIME,
+        updated_at DATETIME,
+        PRIMARY KEY (id),
+        UNIQUE (port, protocol)
+    )''',
+    'CREATE INDEX IF NOT EXISTS ix_ports_service ON ports (service)',
+]
+
+
+def upgrade(connection) -> None:
+    for statement in STATEMENTS:
+        connection.execute(text(statement))
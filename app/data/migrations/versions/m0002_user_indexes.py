@@ -0,0 +1,15 @@
+from sqlalchemy import text
+
+VERSION = 2
+DESCRIPTION = 'indexes for expiration scans and listings by creation date'
+
+STATEMENTS = [
+    'CREATE INDEX IF NOT EXISTS ix_users_expiration_date ON users (expiration_date)',
+    'CREATE INDEX IF NOT EXISTS ix_users_created_at ON users (created_at)',
+    'ANALYZE users',
+]
+
+
+def upgrade(connection) -> None:
+    for statement in STATEMENTS:
+        connection.execute(text(statement))
@@ -1 +1,3 @@
-from .user_respository import UserRepository
\ No newline at end of file
+from .user_respository import UserRepository
+from .badvpn_port_repository import BadvpnPortRepository
+from .port_repository import PortRepository
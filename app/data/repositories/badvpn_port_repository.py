@@ -0,0 +1,46 @@
+import typing as t
+
+from app.data.config import DBConnection
+from app.domain.entities import BadvpnPort
+
+
+class BadvpnPortRepository:
+    @staticmethod
+    def create(badvpn_port: BadvpnPort) -> BadvpnPort:
+        with DBConnection() as db:
+            db.session.add(badvpn_port)
+            db.session.commit()
+            db.session.refresh(badvpn_port)
+
+        return badvpn_port
+
+    @staticmethod
+    def get_by_port(port: int) -> t.Optional[BadvpnPort]:
+        with DBConnection() as db:
+            return db.session.query(BadvpnPort).filter(BadvpnPort.port == port).first()
+
+    @staticmethod
+    def get_all() -> t.List[BadvpnPort]:
+        with DBConnection() as db:
+            return db.session.query(BadvpnPort).order_by(BadvpnPort.port).all()
+
+    @staticmethod
+    def update(badvpn_port: BadvpnPort) -> BadvpnPort:
+        if not badvpn_port.id:
+            raise Exception('BadvpnPort id is required')
+
+        with DBConnection() as db:
+            db.session.merge(badvpn_port)
+            db.session.commit()
+
+        return badvpn_port
+
+    @staticmethod
+    def delete_by_port(port: int) -> t.Optional[BadvpnPort]:
+        with DBConnection() as db:
+            badvpn_port = db.session.query(BadvpnPort).filter(BadvpnPort.port == port).first()
+            if badvpn_port is not None:
+                db.session.delete(badvpn_port)
+                db.session.commit()
+
+            return badvpn_port
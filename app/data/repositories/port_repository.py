@@ -0,0 +1,34 @@
+import typing as t
+
+from app.data.config import DBConnection
+from app.domain.entities import Port
+
+
+class PortRepository:
+    @staticmethod
+    def get_all() -> t.List[Port]:
+        with DBConnection() as db:
+            return db.session.query(Port).order_by(Port.port).all()
+
+    @staticmethod
+    def get_by_service(service: str) -> t.List[Port]:
+        with DBConnection() as db:
+            return db.session.query(Port).filter(Port.service == service).all()
+
+    @staticmethod
+    def replace(service: str, ports: t.List[t.Tuple[int, str]]) -> None:
+        with DBConnection() as db:
+            db.session.query(Port).filter(Port.service == service).delete()
+            db.session.flush()
+
+            for port, protocol in ports:
+                db.session.add(Port(port=port, protocol=protocol, service=service))
+
+            db.session.commit()
+
+    @staticmethod
+    def delete_by_service(service: str) -> int:
+        with DBConnection() as db:
+            count = db.session.query(Port).filter(Port.service == service).delete()
+            db.session.commit()
+            return count
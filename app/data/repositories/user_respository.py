@@ -1,3 +1,5 @@
+import typing as t
+
 from app.data.config import DBConnection
 from app.domain.entities import User
 
@@ -12,6 +14,12 @@ class UserRepository:
 
         return user
 
+    @staticmethod
+    def create_many(users: t.List[User]) -> None:
+        with DBConnection() as db:
+            db.session.add_all(users)
+            db.session.commit()
+
     @staticmethod
     def get_by_id(id: int) -> User:
         with DBConnection() as db:
@@ -38,6 +46,38 @@ class UserRepository:
         with DBConnection() as db:
             return db.session.query(User).all()
 
+    @staticmethod
+    def iter_all(batch_size: int = 500) -> t.Iterator[User]:
+        last_id = 0
+
+        while True:
+            with DBConnection() as db:
+                users = (
+                    db.session.query(User)
+                    .filter(User.id > last_id)
+                    .order_by(User.id)
+                    .limit(batch_size)
+                    .all()
+                )
+
+            if not users:
+                return
+
+            for user in users:
+                yield user
+
+            last_id = users[-1].id
+
+    @staticmethod
+    def get_usernames() -> t.Set[str]:
+        with DBConnection() as db:
+            return {row[0] for row in db.session.query(User.username)}
+
+    @staticmethod
+    def get_uuids() -> t.Set[str]:
+        with DBConnection() as db:
+            return {row[0] for row in db.session.query(User.v2ray_uuid) if row[0]}
+
     @staticmethod
     def update(user: User) -> User:
         if not user.id:
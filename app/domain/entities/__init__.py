@@ -1 +1,3 @@
-from .user import User
\ No newline at end of file
+from .user import User
+from .badvpn_port import BadvpnPort
+from .port import Port
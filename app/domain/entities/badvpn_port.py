@@ -0,0 +1,17 @@
+from sqlalchemy import String, Column, Integer
+from .base import BaseEntity
+
+
+class BadvpnPort(BaseEntity):
+    __tablename__ = 'badvpn_ports'
+
+    id = Column(Integer, primary_key=True)
+    host = Column(String(45), nullable=False, default='127.0.0.1')
+    port = Column(Integer, nullable=False, unique=True)
+    max_clients = Column(Integer, nullable=False, default=1100)
+
+    def __str__(self) -> str:
+        return f'{self.host}:{self.port}'
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({self.port}, {self.max_clients})'
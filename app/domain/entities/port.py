@@ -0,0 +1,18 @@
+from sqlalchemy import String, Column, Integer, UniqueConstraint
+from .base import BaseEntity
+
+
+class Port(BaseEntity):
+    __tablename__ = 'ports'
+    __table_args__ = (UniqueConstraint('port', 'protocol'),)
+
+    id = Column(Integer, primary_key=True)
+    port = Column(Integer, nullable=False)
+    protocol = Column(String(3), nullable=False, default='tcp')
+    service = Column(String(50), nullable=False, index=True)
+
+    def __str__(self) -> str:
+        return f'{self.port}/{self.protocol} - {self.service}'
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({self.port}, {self.protocol}, {self.service})'
@@ -1,9 +1,13 @@
-from sqlalchemy import String, DateTime, Column, Integer
+from sqlalchemy import String, DateTime, Column, Integer, Index
 from .base import BaseEntity
 
 
 class User(BaseEntity):
     __tablename__ = 'users'
+    __table_args__ = (
+        Index('ix_users_expiration_date', 'expiration_date'),
+        Index('ix_users_created_at', 'created_at'),
+    )
 
     id = Column(Integer, primary_key=True)
     username = Column(String(50), nullable=False, unique=True)
@@ -4,7 +4,21 @@ import datetime
 from app.data.repositories import UserRepository
 from app.domain.dtos import UserDto
 from app.domain.entities import User
-from app.utilities.shellscript import exec_command
+from app.utilities.shellscript import exec_command, exec_with_input
+from app.utilities.utils import system_user_exists
+
+
+def parse_expiration_date(expiration_date: t.Any) -> datetime.datetime:
+    if not isinstance(expiration_date, str):
+        return expiration_date
+
+    for date_format in ('%b %d, %Y', '%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%d/%m/%Y'):
+        try:
+            return datetime.datetime.strptime(expiration_date, date_format)
+        except ValueError:
+            continue
+
+    raise ValueError('Invalid expiration date: %s' % expiration_date)
 
 
 class UserUseCase:
@@ -12,16 +26,7 @@ class UserUseCase:
         self.user_repository = user_repository
 
     def create(self, user_dto: UserDto) -> t.Optional[UserDto]:
-        expiration_date = user_dto.expiration_date
-
-        if isinstance(expiration_date, str):
-            try:
-                expiration_date = datetime.datetime.strptime(expiration_date, '%b %d, %Y')
-            except ValueError:
-                try:
-                    expiration_date = datetime.datetime.strptime(expiration_date, '%Y-%m-%d')
-                except ValueError:
-                    expiration_date = datetime.datetime.strptime(expiration_date, '%d/%m/%Y')
+        expiration_date = parse_expiration_date(user_dto.expiration_date)
 
         user_entity = User.of(user_dto.to_dict())
         user_entity.expiration_date = expiration_date
@@ -45,6 +50,65 @@ class UserUseCase:
         exec_command(cmd_set_password)
         return UserDto.of(data)
 
+    @staticmethod
+    def _delete_system_users(users: t.List[User]) -> None:
+        if users:
+            exec_with_input(
+                ['bash', '-s'],
+                ''.join('userdel %s 1>/dev/null 2>&1\n' % user.username for user in users),
+            )
+
+    def create_many(self, user_dtos: t.List[UserDto]) -> t.Dict[str, str]:
+        errors: t.Dict[str, str] = {}
+        users: t.List[User] = []
+
+        for user_dto in user_dtos:
+            if system_user_exists(user_dto.username):
+                errors[user_dto.username] = 'conta de sistema já existe'
+                continue
+
+            user_entity = User.of(user_dto.to_dict())
+            user_entity.expiration_date = parse_expiration_date(user_dto.expiration_date)
+            users.append(user_entity)
+
+        if not users:
+            return errors
+
+        created: t.List[User] = []
+        try:
+            exec_with_input(
+                ['bash', '-s'],
+                ''.join(
+                    'useradd --no-create-home --shell /bin/false --expiredate %s %s '
+                    '1>/dev/null 2>&1\n'
+                    % (user.expiration_date.strftime('%Y-%m-%d'), user.username)
+                    for user in users
+                ),
+            )
+
+            for user in users:
+                if system_user_exists(user.username):
+                    created.append(user)
+                else:
+                    errors[user.username] = 'falha ao criar a conta de sistema'
+
+            passwords = ''.join('%s:%s\n' % (user.username, user.password) for user in created)
+            if created and exec_with_input(['chpasswd'], passwords) != 0:
+                for user in list(created):
+                    password = '%s:%s\n' % (user.username, user.password)
+                    if exec_with_input(['chpasswd'], password) != 0:
+                        self._delete_system_users([user])
+                        errors[user.username] = 'falha ao definir a senha'
+                        created.remove(user)
+
+            if created:
+                self.user_repository.create_many(created)
+        except Exception:
+            self._delete_system_users(created)
+            raise
+
+        return errors
+
     def get_by_id(self, id: int) -> t.Optional[UserDto]:
         data = self.user_repository.get_by_id(id)
         return UserDto.of(data.to_dict()) if data else None
@@ -62,16 +126,7 @@ class UserUseCase:
         return [UserDto.of(item.to_dict()) for item in data]
 
     def update(self, user_dto: UserDto) -> t.Optional[UserDto]:
-        expiration_date = user_dto.expiration_date
-
-        if isinstance(expiration_date, str):
-            try:
-                expiration_date = datetime.datetime.strptime(expiration_date, '%b %d, %Y')
-            except ValueError:
-                try:
-                    expiration_date = datetime.datetime.strptime(expiration_date, '%Y-%m-%d')
-                except ValueError:
-                    expiration_date = datetime.datetime.strptime(expiration_date, '%d/%m/%Y')
+        expiration_date = parse_expiration_date(user_dto.expiration_date)
 
         user_entity = User.of(user_dto.to_dict())
         user_entity.expiration_date = expiration_date
@@ -1,3 +1,5 @@
+import sys
+import csv
 import argparse
 import typing as t
 
@@ -9,6 +11,8 @@ from app.domain.dtos import UserDto
 from app.domain.use_cases import UserUseCase
 from app.data.repositories import UserRepository
 
+from .user_io import FORMATS, RowError, detect_format, export_users, import_users, open_input
+
 parser = argparse.ArgumentParser(description='User CLI')
 
 parser.add_argument(
@@ -68,6 +72,26 @@ parser.add_argument(
 parser.add_argument('-s', '--show', help='Show user', action='store_true')
 parser.add_argument('-a', '--all', help='Show all users', action='store_true')
 
+parser.add_argument(
+    '--import',
+    dest='import_file',
+    metavar='FILE',
+    help='Import users from FILE ("-" for stdin)',
+)
+parser.add_argument('--export', help='Export all users to stdout', action='store_true')
+parser.add_argument(
+    '--format',
+    choices=FORMATS,
+    default=None,
+    help='Import/export format (default: from the file extension, else csv)',
+)
+parser.add_argument(
+    '--chunk-size',
+    type=int,
+    default=500,
+    help='Users per transaction when importing (default: %(default)s)',
+)
+
 
 def create_user(
     username: str,
@@ -196,9 +220,45 @@ def show_all_users() -> None:
         )
 
 
+def import_users_file(path: str, fmt: str = None, chunk_size: int = 500) -> None:
+    user_repository = UserRepository()
+    user_use_case = UserUseCase(user_repository)
+
+    usernames = user_repository.get_usernames()
+    uuids = user_repository.get_uuids()
+
+    try:
+        with open_input(path) as stream:
+            result = import_users(
+                stream,
+                fmt or detect_format(path),
+                user_use_case,
+                usernames,
+                uuids,
+                chunk_size=max(chunk_size, 1),
+            )
+    except (OSError, RowError, csv.Error) as e:
+        print('Import failed: %s' % e)
+        return
+
+    print('Users created: %(created)d, skipped: %(skipped)d, failed: %(failed)d' % result)
+
+
+def export_all_users(fmt: str = None) -> None:
+    export_users(UserRepository().iter_all(), fmt or 'csv', sys.stdout)
+
+
 def main(args: t.List[str]) -> None:
     args = parser.parse_args(args)
 
+    if args.import_file:
+        import_users_file(args.import_file, args.format, args.chunk_size)
+        return
+
+    if args.export:
+        export_all_users(args.format)
+        return
+
     if args.create:
         create_user(
             username=args.username,
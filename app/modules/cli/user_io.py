@@ -0,0 +1,247 @@
+import io
+import csv
+import sys
+import json
+import datetime
+import itertools
+import typing as t
+
+from app.domain.dtos import UserDto
+from app.domain.use_cases.user_use_case import parse_expiration_date
+from app.utilities.utils import system_user_exists
+
+FORMATS = ('csv', 'json', 'ndjson')
+FIELDS = ('username', 'password', 'connection_limit', 'expiration_date', 'v2ray_uuid')
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+Row = t.Tuple[int, dict]
+
+
+class RowError(ValueError):
+    pass
+
+
+def detect_format(path: str, default: str = 'csv') -> str:
+    for name in FORMATS:
+        if path.endswith('.' + name):
+            return name
+
+    return 'ndjson' if path.endswith('.jsonl') else default
+
+
+def iter_csv(stream: t.TextIO) -> t.Iterator[Row]:
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def iter_ndjson(stream: t.TextIO) -> t.Iterator[Row]:
+    for line_num, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            yield line_num, json.loads(line)
+        except ValueError as e:
+            yield line_num, RowError('invalid JSON: %s' % e)
+
+
+def iter_json(stream: t.TextIO, chunk_size: int = 64 * 1024) -> t.Iterator[Row]:
+    decoder = json.JSONDecoder()
+    buffer, index, started = '', 0, False
+
+    for item_num in itertools.count(1):
+        while True:
+            while index < len(buffer) and buffer[index] in ' \t\r\n,':
+                index += 1
+
+            if not started and index < len(buffer):
+                if buffer[index] != '[':
+                    raise RowError('expected a JSON array')
+                started, index = True, index + 1
+                continue
+
+            if index < len(buffer) and buffer[index] == ']':
+                return
+
+            try:
+                value, end = decoder.raw_decode(buffer, index)
+                break
+            except ValueError:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    if buffer[index:].strip():
+                        raise RowError('truncated JSON array')
+                    return
+
+                buffer, index = buffer[index:] + chunk, 0
+
+        index = end
+        yield item_num, value
+
+
+READERS = {'csv': iter_csv, 'json': iter_json, 'ndjson': iter_ndjson}
+
+
+def parse_row(row: t.Any) -> UserDto:
+    if isinstance(row, RowError):
+        raise row
+
+    if not isinstance(row, dict):
+        raise RowError('expected an object')
+
+    username = str(row.get('username') or '').strip()
+    password = str(row.get('password') or '').strip()
+
+    for name, value in (('username', username), ('password', password)):
+        if not 3 <= len(value) <= 20 or not value.isalnum():
+            raise RowError('invalid %s %r' % (name, value))
+
+    try:
+        connection_limit = int(row.get('connection_limit') or 0)
+    except (TypeError, ValueError):
+        connection_limit = 0
+
+    if connection_limit < 1:
+        raise RowError('invalid connection_limit %r' % row.get('connection_limit'))
+
+    try:
+        expiration_date = parse_expiration_date(str(row.get('expiration_date') or '').strip())
+    except ValueError:
+        raise RowError('invalid expiration_date %r' % row.get('expiration_date'))
+
+    return UserDto(
+        username=username,
+        password=password,
+        connection_limit=connection_limit,
+        expiration_date=expiration_date,
+        v2ray_uuid=str(row.get('v2ray_uuid') or '').strip() or None,
+    )
+
+
+def validate_rows(
+    rows: t.Iterable[Row],
+    usernames: t.Set[str],
+    uuids: t.Set[str],
+) -> t.Iterator[t.Tuple[int, t.Optional[UserDto], t.Optional[str]]]:
+    for line_num, row in rows:
+        try:
+            user = parse_row(row)
+        except RowError as e:
+            yield line_num, None, str(e)
+            continue
+
+        if user.username in usernames:
+            yield line_num, None, 'username %s already exists' % user.username
+            continue
+
+        if system_user_exists(user.username):
+            yield line_num, None, 'username %s is an existing system account' % user.username
+            continue
+
+        if user.v2ray_uuid and user.v2ray_uuid in uuids:
+            yield line_num, None, 'v2ray_uuid %s already exists' % user.v2ray_uuid
+            continue
+
+        usernames.add(user.username)
+        if user.v2ray_uuid:
+            uuids.add(user.v2ray_uuid)
+
+        yield line_num, user, None
+
+
+def import_users(
+    stream: t.TextIO,
+    fmt: str,
+    use_case,
+    usernames: t.Set[str],
+    uuids: t.Set[str],
+    chunk_size: int = 500,
+    report: t.TextIO = sys.stderr,
+) -> t.Dict[str, int]:
+    result = {'created': 0, 'skipped': 0, 'failed': 0}
+    chunk: t.List[t.Tuple[int, UserDto]] = []
+
+    def flush() -> None:
+        try:
+            errors = use_case.create_many([user for _, user in chunk])
+        except Exception:
+            errors = {}
+            for _, user in chunk:
+                try:
+                    errors.update(use_case.create_many([user]))
+                except Exception as e:
+                    errors[user.username] = str(e)
+
+        for line_num, user in chunk:
+            error = errors.get(user.username)
+            if error is None:
+                result['created'] += 1
+                continue
+
+            result['failed'] += 1
+            report.write('row %d: %s: %s\n' % (line_num, user.username, error))
+
+        chunk.clear()
+
+    for line_num, user, error in validate_rows(READERS[fmt](stream), usernames, uuids):
+        if error is not None:
+            result['skipped'] += 1
+            report.write('row %d: %s\n' % (line_num, error))
+            continue
+
+        chunk.append((line_num, user))
+        if len(chunk) >= chunk_size:
+            flush()
+
+    if chunk:
+        flush()
+
+    return result
+
+
+def serialize(user) -> dict:
+    data = {field: getattr(user, field) for field in FIELDS}
+    if isinstance(data['expiration_date'], datetime.datetime):
+        data['expiration_date'] = data['expiration_date'].strftime(DATE_FORMAT)
+
+    return data
+
+
+def export_users(users: t.Iterable, fmt: str, out: t.TextIO) -> int:
+    count = 0
+
+    if fmt == 'csv':
+        writer = csv.DictWriter(out, FIELDS, lineterminator='\n')
+        writer.writeheader()
+        for user in users:
+            writer.writerow(serialize(user))
+            count += 1
+
+        return count
+
+    if fmt == 'json':
+        out.write('[')
+
+    for user in users:
+        if fmt == 'json':
+            out.write(',\n  ' if count else '\n  ')
+
+        out.write(json.dumps(serialize(user)))
+        if fmt == 'ndjson':
+            out.write('\n')
+
+        count += 1
+
+    if fmt == 'json':
+        out.write('\n]\n' if count else ']\n')
+
+    return count
+
+
+def open_input(path: str) -> t.TextIO:
+    if path == '-':
+        return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+
+    return open(path, encoding='utf-8-sig', newline='')
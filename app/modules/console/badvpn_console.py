@@ -1,29 +1,30 @@
 import typing as t
+import json
 import os
 
 from console import Console, FuncItem, COLOR_NAME
 from console.formatter import create_menu_bg, create_line, Formatter
 
-from app.utilities.logger import logger
-
+from scripts import UDPGW_PATH
+from scripts.udpgw import dump_config
 
-def check_screen_is_installed():
-    command = 'command -v screen >/dev/null 2>&1'
-    return os.system(command) == 0
+from app.data.config.db_config import DATABASE_PATH
+from app.data.repositories import BadvpnPortRepository
+from app.domain.entities import BadvpnPort
+from app.utilities.logger import logger
+from app.utilities.status import status_service
+from app.utilities.ports import port_registry
+from app.modules.supervisor import SupervisorClient, SupervisorError, ensure_supervisor
 
 
-def process_install_screen():
-    if check_screen_is_installed():
-        return
-
-    answer = input(
-        COLOR_NAME.YELLOW + 'Screen não está instalado. Deseja instalar? [s/N]: ' + COLOR_NAME.END
-    )
-    if answer.lower() == 's':
-        logger.info('Instalando screen...')
-        os.system('sudo apt-get install screen -y >/dev/null 2>&1')
-        logger.info('Screen instalado com sucesso!')
+def process_start_supervisor() -> bool:
+    try:
+        ensure_supervisor()
+        return True
+    except SupervisorError as e:
+        logger.error(str(e))
         Console.pause()
+        return False
 
 
 class BadvpnInstaller:
@@ -105,51 +106,51 @@ class BadvpnFlag:
         return '{0} {1}'.format(self.__badvpn_executable, self.flag)
 
 
-class BadvpnScreenManager:
-    __screen_name_prefix = 'badvpn'
+class BadvpnManager:
+    __service_prefix = 'badvpn'
 
     def __init__(self, flag: BadvpnFlag) -> None:
         self.__flag = flag
-        self.__screen_name = '{0}_{1}'.format(
-            self.__screen_name_prefix,
+        self.__service_name = '{0}_{1}'.format(
+            self.__service_prefix,
             self.__flag.listen_addr.replace(':', '_'),
         )
 
-        self.__screen_command = 'screen -dmS {0} {1}'.format(
-            self.__screen_name,
-            self.__flag.command(),
-        )
+    @property
+    def service_name(self) -> str:
+        return self.__service_name
 
     @staticmethod
-    def list_of_screen() -> t.List[str]:
-        data = os.popen('bash -c \'screen -ls 2>/dev/null\'').read().strip()
-        names = []
+    def list_of_services() -> t.List[str]:
+        try:
+            services = SupervisorClient().list(BadvpnManager.__service_prefix)
+        except SupervisorError:
+            return []
 
-        for line in data.split('\n'):
-            if BadvpnScreenManager.__screen_name_prefix in line:
-                names.append(line.split()[0].strip().split('.', 1)[1])
-
-        return names
+        return [service['name'] for service in services if service['state'] != 'stopped']
 
     @staticmethod
-    def list_of_ports() -> t.List[str]:
-        names = BadvpnScreenManager.list_of_screen()
+    def list_of_ports() -> t.List[int]:
+        names = BadvpnManager.list_of_services()
         return [int(name.split('_')[-1]) for name in names]
 
-    def is_running(self, screen_name: str = None) -> bool:
-        if screen_name is None:
-            screen_name = self.__screen_name
+    def is_running(self, service_name: str = None) -> bool:
+        if service_name is None:
+            service_name = self.__service_name
 
-        return screen_name in self.list_of_screen()
+        return service_name in self.list_of_services()
 
     def start(self) -> bool:
         if self.is_running():
             return True
 
-        if os.system(self.__screen_command) != 0:
-            logger.error('Não foi possível iniciar o BadVPN')
-        else:
+        try:
+            SupervisorClient().add(self.__service_name, self.__flag.command().split())
             logger.info('BadVPN iniciado com sucesso')
+        except SupervisorError as e:
+            logger.error('Não foi possível iniciar o BadVPN: %s' % e)
+        finally:
+            status_service.invalidate()
 
         return self.is_running()
 
@@ -157,14 +158,143 @@ class BadvpnScreenManager:
         if not self.is_running():
             return True
 
-        if os.system('screen -S {0} -X quit'.format(self.__screen_name)) != 0:
-            logger.error('Não foi possível parar o BadVPN')
-        else:
+        try:
+            SupervisorClient().remove(self.__service_name)
             logger.info('BadVPN parado com sucesso')
+        except SupervisorError as e:
+            logger.error('Não foi possível parar o BadVPN: %s' % e)
+        finally:
+            status_service.invalidate()
 
         return not self.is_running()
 
 
+BadvpnScreenManager = BadvpnManager
+
+UDPGW_CONFIG_PATH = os.path.join(DATABASE_PATH, 'udpgw.json')
+
+
+class BadvpnGateway:
+    service_name = 'udpgw'
+    registry_name = 'badvpn'
+    backends = ('native', 'badvpn')
+
+    def __init__(self, config_path: str = UDPGW_CONFIG_PATH) -> None:
+        self.__config_path = config_path
+        self.__repository = BadvpnPortRepository()
+
+    @property
+    def backend(self) -> str:
+        try:
+            with open(self.__config_path) as f:
+                backend = json.load(f).get('backend')
+        except (OSError, ValueError):
+            backend = None
+
+        return backend if backend in self.backends else self.backends[0]
+
+    def ports(self) -> t.List[BadvpnPort]:
+        return self.__repository.get_all()
+
+    @staticmethod
+    def shared_limit(ports: t.List[BadvpnPort]) -> t.Optional[int]:
+        # badvpn-udpgw only accepts a single --max-clients for every --listen-addr
+        return max(port.max_clients for port in ports) if ports else None
+
+    def command(self, ports: t.List[BadvpnPort], backend: str) -> t.List[str]:
+        if backend == 'badvpn':
+            command = [BadvpnInstaller._badvpn_path]
+            for port in ports:
+                command += ['--listen-addr', str(port)]
+
+            return command + ['--max-clients', str(self.shared_limit(ports))]
+
+        return ['python3', UDPGW_PATH, '--config', self.__config_path]
+
+    def sync(self, backend: str = None) -> bool:
+        backend = backend or self.backend
+        ports = self.ports()
+
+        error = port_registry.claim(self.registry_name, [(p.port, 'tcp') for p in ports])
+        if error is not None:
+            logger.error(error)
+            return False
+
+        dump_config(
+            self.__config_path,
+            [{'host': p.host, 'port': p.port, 'max_clients': p.max_clients} for p in ports],
+            backend=backend,
+        )
+
+        client = SupervisorClient()
+        try:
+            if not ports:
+                if client.list(self.service_name):
+                    client.remove(self.service_name)
+                return True
+
+            service = client.add(self.service_name, self.command(ports, backend))
+        except SupervisorError as e:
+            logger.error('Não foi possível atualizar o BadVPN: %s' % e)
+            return False
+        finally:
+            status_service.invalidate()
+
+        return service['state'] == 'running'
+
+    def open_port(self, port: int, max_clients: int = 1100, host: str = '127.0.0.1') -> bool:
+        conflict = port_registry.check(port, self.registry_name)
+        if conflict or self.__repository.get_by_port(port) is not None:
+            logger.error(conflict or 'Porta %s já está em uso' % port)
+            return False
+
+        limit = self.shared_limit(self.ports())
+        if self.backend == 'badvpn' and limit is not None and limit != max_clients:
+            logger.error(
+                'O badvpn-udpgw usa um único limite de clientes (%s) para todas as portas; '
+                'use o UDPGW nativo para limites por porta' % limit
+            )
+            return False
+
+        self.__repository.create(BadvpnPort(host=host, port=port, max_clients=max_clients))
+        if self.sync():
+            return True
+
+        self.__repository.delete_by_port(port)
+        self.sync()
+        return False
+
+    def close_port(self, port: int) -> bool:
+        if self.__repository.delete_by_port(port) is None:
+            logger.error('Porta %s não encontrada' % port)
+            return False
+
+        return self.sync()
+
+    def migrate_legacy(self) -> None:
+        ports = BadvpnManager.list_of_ports()
+        if not ports:
+            return
+
+        for port in ports:
+            if self.__repository.get_by_port(port) is None:
+                self.__repository.create(BadvpnPort(host='127.0.0.1', port=port, max_clients=1100))
+
+            BadvpnManager(BadvpnFlag(listen_addr='127.0.0.1:%s' % port)).stop()
+
+        self.sync()
+
+
+status_service.register(
+    'badvpn_ports',
+    lambda: [(port.port, port.max_clients) for port in BadvpnGateway().ports()],
+)
+port_registry.register(
+    BadvpnGateway.registry_name,
+    lambda: {BadvpnGateway.registry_name: [(port.port, 'tcp') for port in BadvpnGateway().ports()]},
+)
+
+
 class FormatterBadvpn(Formatter):
     def __init__(self) -> None:
         super().__init__()
@@ -172,34 +302,66 @@ class FormatterBadvpn(Formatter):
     def build_menu(self, title):
         menu = super().build_menu(title)
 
-        ports = BadvpnScreenManager.list_of_ports()
+        ports = status_service.get('badvpn_ports', [])
         if len(ports) <= 0:
             return menu
 
-        menu += COLOR_NAME.YELLOW + 'Em uso: %s\n' % ', '.join(map(str, ports)) + COLOR_NAME.END
+        menu += COLOR_NAME.YELLOW + 'Em uso: %s\n' % ', '.join(
+            '%s (%s clientes)' % (port, max_clients) for port, max_clients in ports
+        )
+        gateway = BadvpnGateway()
+        menu += 'Backend: %s\n' % gateway.backend
+        if gateway.backend == 'badvpn':
+            menu += 'Limite único do badvpn-udpgw: %s clientes\n' % max(
+                max_clients for _, max_clients in ports
+            )
+
+        menu += COLOR_NAME.END
 
         return menu + create_line(color=COLOR_NAME.BLUE, show=False) + '\n'
 
 
 def action_install_badvpn(callback: t.Callable[[], None]) -> None:
-    BadvpnInstaller.install()
+    if BadvpnInstaller.install():
+        BadvpnGateway().sync('badvpn')
+
     Console.pause()
     callback()
 
 
 def action_uninstall_badvpn(callback: t.Callable[[], None]) -> None:
+    gateway = BadvpnGateway()
+    if gateway.backend == 'badvpn':
+        gateway.sync('native')
+
     BadvpnInstaller.uninstall()
     Console.pause()
     callback()
 
 
+def action_use_native(callback: t.Callable[[], None]) -> None:
+    if BadvpnGateway().sync('native'):
+        logger.info('Usando o UDPGW nativo')
+
+    Console.pause()
+    callback()
+
+
 def action_open_port():
+    gateway = BadvpnGateway()
+    default = 1100
+    if gateway.backend == 'badvpn':
+        default = gateway.shared_limit(gateway.ports()) or default
+
     try:
         port = int(input(COLOR_NAME.YELLOW + 'Porta: ' + COLOR_NAME.END))
+        max_clients = input(
+            COLOR_NAME.YELLOW + 'Limite de clientes [%s]: ' % default + COLOR_NAME.END
+        )
+        max_clients = int(max_clients or default)
 
-        flag = BadvpnFlag(listen_addr='127.0.0.1:%s' % port, max_clients=1100)
-        screen = BadvpnScreenManager(flag=flag)
-        screen.start()
+        if gateway.open_port(port, max_clients):
+            logger.info('Porta %s aberta com sucesso' % port)
     except ValueError:
         logger.error('Porta inválida')
 
@@ -207,7 +369,8 @@ def action_open_port():
 
 
 def action_close_port():
-    ports = BadvpnScreenManager.list_of_ports()
+    gateway = BadvpnGateway()
+    ports = [port.port for port in gateway.ports()]
     if not ports:
         logger.error('Nenhuma porta ativa')
         Console.pause()
@@ -223,30 +386,21 @@ def action_close_port():
         return
 
     port = int(console.item_returned)
-    flag = BadvpnFlag(listen_addr='127.0.0.1:%s' % port, max_clients=1100)
-    screen = BadvpnScreenManager(flag=flag)
-    screen.stop()
+    if gateway.close_port(port):
+        logger.info('Porta %s fechada com sucesso' % port)
 
     Console.pause()
     action_close_port()
 
 
 def badvpn_console_main():
-    process_install_screen()
+    if not process_start_supervisor():
+        return
 
-    console = Console('BadVPN Console', formatter=FormatterBadvpn())
+    gateway = BadvpnGateway()
+    gateway.migrate_legacy()
 
-    if not BadvpnInstaller.is_installed():
-        console.append_item(
-            FuncItem(
-                'INSTALAR BadVPN',
-                action_install_badvpn,
-                lambda: badvpn_console_main(),
-                shuld_exit=True,
-            )
-        )
-        console.show()
-        return
+    console = Console('BadVPN Console', formatter=FormatterBadvpn())
 
     console.append_item(
         FuncItem(
@@ -261,13 +415,33 @@ def badvpn_console_main():
         )
     )
 
-    console.append_item(
-        FuncItem(
-            'DESINSTALAR BadVPN',
-            action_uninstall_badvpn,
-            lambda: badvpn_console_main(),
-            shuld_exit=True,
+    if gateway.backend == 'native':
+        console.append_item(
+            FuncItem(
+                'USAR BadVPN (badvpn-udpgw)',
+                action_install_badvpn,
+                lambda: badvpn_console_main(),
+                shuld_exit=True,
+            )
+        )
+    else:
+        console.append_item(
+            FuncItem(
+                'USAR UDPGW NATIVO',
+                action_use_native,
+                lambda: badvpn_console_main(),
+                shuld_exit=True,
+            )
+        )
+
+    if BadvpnInstaller.is_installed():
+        console.append_item(
+            FuncItem(
+                'DESINSTALAR BadVPN',
+                action_uninstall_badvpn,
+                lambda: badvpn_console_main(),
+                shuld_exit=True,
+            )
         )
-    )
 
     console.show()
@@ -2,7 +2,9 @@ import typing as t
 
 from console import Console, FuncItem
 from app.utilities.logger import logger
-from .ovpn_utils import OpenVPNManager
+from app.utilities.status import status_service
+from app.utilities.ports import port_registry
+from .ovpn_utils import OpenVPNManager, OpenVPNUtils
 
 
 class OpenVPNActions:
@@ -75,6 +77,7 @@ class OpenVPNActions:
     @staticmethod
     def change_port():
         current_port = OpenVPNActions.openvpn_manager.get_current_port()
+        protocol = OpenVPNActions.openvpn_manager.get_current_protocol()
         logger.info('Porta atual: {}'.format(current_port))
 
         port = None
@@ -88,6 +91,18 @@ class OpenVPNActions:
             except ValueError:
                 logger.error('Porta inválida!')
                 port = None
+                continue
+
+            conflict = port_registry.check(port, 'openvpn', protocol)
+            if conflict:
+                logger.error(conflict)
+                port = None
+
+        error = port_registry.claim('openvpn', [(port, protocol)])
+        if error is not None:
+            logger.error(error)
+            Console.pause()
+            return
 
         OpenVPNActions.openvpn_manager.change_openvpn_port(port)
         OpenVPNActions.openvpn_manager.openvpn_restart()
@@ -95,10 +110,26 @@ class OpenVPNActions:
         Console.pause()
 
 
+status_service.register('openvpn_installed', OpenVPNUtils.openvpn_is_installed)
+status_service.register('openvpn_running', OpenVPNUtils.openvpn_is_running)
+port_registry.register(
+    'openvpn',
+    lambda: (
+        {
+            'openvpn': [
+                (OpenVPNManager.get_current_port(), OpenVPNManager.get_current_protocol()),
+            ]
+        }
+        if OpenVPNUtils.openvpn_is_installed()
+        else {}
+    ),
+)
+
+
 def openvpn_console_main() -> None:
     console = Console('OPENVPN Console')
 
-    if not OpenVPNManager.ovpn_utils.openvpn_is_installed():
+    if not status_service.get('openvpn_installed', False):
         console.append_item(
             FuncItem(
                 'INSTALAR OPENVPN',
@@ -109,7 +140,7 @@ def openvpn_console_main() -> None:
         console.show()
         return
 
-    if OpenVPNManager.ovpn_utils.openvpn_is_running():
+    if status_service.get('openvpn_running', False):
         console.append_item(
             FuncItem(
                 'PARAR OPENVPN',
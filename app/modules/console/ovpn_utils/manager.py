@@ -3,6 +3,8 @@ import os
 from .install import openvpn_install, uninstall_openvpn, OPENVPN_PATH
 from .utils import OpenVPNUtils
 
+from app.utilities.status import status_service
+
 
 class OpenVPNManager:
     ovpn_utils = OpenVPNUtils()
@@ -11,6 +13,7 @@ class OpenVPNManager:
     def openvpn_install() -> bool:
         try:
             openvpn_install()
+            status_service.invalidate()
             return OpenVPNManager.ovpn_utils.openvpn_is_installed()
         except (Exception, KeyboardInterrupt):
             return False
@@ -18,6 +21,7 @@ class OpenVPNManager:
     @staticmethod
     def openvpn_uninstall() -> bool:
         uninstall_openvpn()
+        status_service.invalidate()
 
         return not OpenVPNManager.ovpn_utils.openvpn_is_installed()
 
@@ -28,16 +32,19 @@ class OpenVPNManager:
     @staticmethod
     def openvpn_start() -> bool:
         os.system('systemctl start openvpn@server.service')
+        status_service.invalidate()
         return OpenVPNManager.ovpn_utils.openvpn_is_running()
 
     @staticmethod
     def openvpn_stop() -> bool:
         os.system('systemctl stop openvpn@server.service')
+        status_service.invalidate()
         return not OpenVPNManager.ovpn_utils.openvpn_is_running()
 
     @staticmethod
     def openvpn_restart() -> bool:
         os.system('systemctl restart openvpn@server.service')
+        status_service.invalidate()
         return OpenVPNManager.ovpn_utils.openvpn_is_running()
 
     @staticmethod
@@ -62,3 +69,13 @@ class OpenVPNManager:
             if 'port' in line:
                 port = int(line.split(' ')[1])
                 return port
+
+    @staticmethod
+    def get_current_protocol() -> str:
+        with open(os.path.join(OPENVPN_PATH, 'server.conf'), 'r') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) > 1 and fields[0] == 'proto':
+                    return 'tcp' if fields[1].startswith('tcp') else 'udp'
+
+        return 'udp'
@@ -1,5 +1,7 @@
 import os
 
+from app.utilities.proc import process_index
+
 from .install import (
     EASYRSA_PATH,
     EASYRSA_PKI_CA,
@@ -66,8 +68,7 @@ def create_ovpn_client(username: str) -> str:
 class OpenVPNUtils:
     @staticmethod
     def openvpn_is_running() -> bool:
-        status = os.system('pgrep openvpn >/dev/null') == 0
-        return status
+        return process_index.is_running('openvpn')
 
     @staticmethod
     def openvpn_is_installed() -> bool:
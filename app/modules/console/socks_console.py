@@ -1,31 +1,28 @@
 import typing as t
-import os
+import shlex
 
 from console import Console, FuncItem, COLOR_NAME
 from console.formatter import create_menu_bg, create_line, Formatter
 
-from scripts import SOCKS_PATH, CERT_PATH
+from scripts import SOCKS_PATH
+from scripts.certgen import ensure_certificate
+from scripts.socks_stats import SharedStats
 
 from app.utilities.logger import logger
-
-
-def check_screen_is_installed():
-    command = 'command -v screen >/dev/null 2>&1'
-    return os.system(command) == 0
-
-
-def process_install_screen():
-    if check_screen_is_installed():
-        return
-
-    answer = input(
-        COLOR_NAME.YELLOW + 'Screen não está instalado. Deseja instalar? [s/N]: ' + COLOR_NAME.END
-    )
-    if answer.lower() == 's':
-        logger.info('Instalando screen...')
-        os.system('sudo apt-get install screen -y >/dev/null 2>&1')
-        logger.info('Screen instalado com sucesso!')
+from app.utilities.proc import process_index
+from app.utilities.ports import port_registry
+from app.utilities.status import status_service
+from app.modules.supervisor import SupervisorClient, SupervisorError, ensure_supervisor
+
+
+def process_start_supervisor() -> bool:
+    try:
+        ensure_supervisor()
+        return True
+    except SupervisorError as e:
+        logger.error(str(e))
         Console.pause()
+        return False
 
 
 class Flag:
@@ -83,19 +80,7 @@ class Flag:
 
     @staticmethod
     def current_flag(flag_name: str) -> str:
-        flag_name_parsed = flag_name
-        if '-' in flag_name:
-            flag_name_parsed = '\-'.join(flag_name.split('-'))
-
-        command = 'ps -aux | grep -i ' + flag_name_parsed + ' | grep -v grep'
-        output = os.popen(command).read().strip()
-
-        for line in output.split('\n'):
-            data = line.split(flag_name)
-            if len(data) > 1:
-                return data[1].split()[0]
-
-        return ''
+        return process_index.option(flag_name) or ''
 
 
 class OpenVpnFlag(Flag):
@@ -152,58 +137,94 @@ class FlagUtils:
 
 
 class SocksManager:
+    __service_prefix = 'socks:'
+
+    @staticmethod
+    def service_name(src_port: int, mode: str) -> str:
+        return 'socks:%s:%s' % (src_port, mode)
+
     @staticmethod
     def is_running(mode: str = 'http') -> bool:
-        cmd = 'screen -ls | grep -i "socks:[0-9]*:%s\\b"' % mode
-        return os.system(cmd) == 0
+        return mode in SocksManager.get_running_socks().values()
 
     def start(self, mode: str = 'http', src_port: int = 80, flag_utils: FlagUtils = None):
-        cmd = 'screen -mdS socks:%s:%s python3 %s --port %s %s --%s' % (
-            src_port,
-            mode,
-            SOCKS_PATH,
-            src_port,
-            flag_utils.command(),
-            mode,
-        )
+        command = ['python3', SOCKS_PATH, '--port', str(src_port)]
+        command += shlex.split(flag_utils.command()) + ['--' + mode]
 
         if mode == 'https':
-            cmd += ' --cert %s' % CERT_PATH
-
-        return os.system(cmd) == 0 and self.is_running(mode)
-
-    def stop(self, mode: str = 'http', src_port: int = 80) -> None:
-        cmd = 'screen -X -S socks:%s:%s quit' % (src_port, mode)
-        return os.system(cmd) == 0
+            command += ['--cert', ensure_certificate()]
+
+        name = self.service_name(src_port, mode)
+        error = port_registry.claim(name, [(src_port, 'tcp')])
+        if error is not None:
+            logger.error(error)
+            return False
+
+        try:
+            service = SupervisorClient().add(name, command)
+        except SupervisorError as e:
+            logger.error(str(e))
+            port_registry.release(name)
+            return False
+        finally:
+            status_service.invalidate()
+
+        return service['state'] == 'running'
+
+    def stop(self, mode: str = 'http', src_port: int = 80) -> bool:
+        name = self.service_name(src_port, mode)
+        try:
+            SupervisorClient().remove(name)
+        except SupervisorError as e:
+            logger.error(str(e))
+            return False
+        finally:
+            status_service.invalidate()
+
+        port_registry.release(name)
+        return True
 
     @staticmethod
     def get_running_port(mode: str = 'http') -> int:
-        cmd = 'screen -ls | grep -ie "socks:[0-9]*:%s\\b"' % mode
-        output = os.popen(cmd).read().strip()
-
-        for line in output.split('\n'):
-            data = line.split(':')
-            if len(data) > 1:
-                return int(data[1].split(' ')[0])
+        for port, running_mode in SocksManager.get_running_socks().items():
+            if running_mode == mode:
+                return port
 
         return 0
 
     @staticmethod
     def get_running_ports() -> t.List[int]:
-        cmd = 'screen -ls | grep socks: | awk \'{print $1}\' | awk -F: \'{print $2}\''
-        output = os.popen(cmd).read()
-        return [int(port) for port in output.split('\n') if port]
+        return list(SocksManager.get_running_socks())
 
     @staticmethod
     def get_running_socks() -> t.Dict[int, str]:
-        cmd = 'screen -ls | grep socks: | awk \'{print $1}\''
-        output = os.popen(cmd).readlines()
-        socks = dict(
-            (int(port), mode.strip()) for port, mode in (line.split(':')[1:] for line in output)
-        )
+        try:
+            services = SupervisorClient().list(SocksManager.__service_prefix)
+        except SupervisorError:
+            return {}
+
+        socks = {}
+        for service in services:
+            if service['state'] == 'stopped':
+                continue
+
+            _, port, mode = service['name'].split(':')
+            socks[int(port)] = mode
+
         return socks
 
 
+status_service.register('socks', SocksManager.get_running_socks)
+port_registry.register(
+    'socks:',
+    lambda: {
+        service['name']: [(int(service['name'].split(':')[1]), 'tcp')]
+        for service in SupervisorClient().list('socks:')
+    },
+)
+status_service.register('socks_flags', lambda: FlagUtils().values())
+
+
 class ConsoleMode:
     def __init__(self):
         self.console = Console('SELECIONE O MODO DE CONEXAO')
@@ -231,10 +252,9 @@ class FormatterSocks(Formatter):
         if self.port <= 0:
             return menu
 
-        flag_utils = FlagUtils()
         values = []
 
-        for flag in flag_utils.values():
+        for flag in status_service.get('socks_flags', []):
             name, port = flag.split()
             name = name.replace('--', '')
             name = name.split('-')[0]
@@ -247,6 +267,21 @@ class FormatterSocks(Formatter):
                 COLOR_NAME.GREEN + str(value).rjust(15) + COLOR_NAME.END,
             )
 
+        for item in SharedStats.read_all():
+            if item['port'] != self.port or item['mode'] != self.mode:
+                continue
+
+            menu += COLOR_NAME.YELLOW + 'Conexões: %s ativas, %s total, %s erros\n' % (
+                item['active'],
+                item['total'],
+                item['errors'],
+            )
+            menu += 'Tráfego: %.2f MB recebidos, %.2f MB enviados\n' % (
+                item['bytes_in'] / 1024 / 1024,
+                item['bytes_out'] / 1024 / 1024,
+            )
+            menu += COLOR_NAME.END
+
         return menu + create_line(color=COLOR_NAME.BLUE, show=False) + '\n'
 
 
@@ -266,8 +301,9 @@ class SocksActions:
                 src_port = input(COLOR_NAME.YELLOW + 'Porta de escuta: ' + COLOR_NAME.RESET)
                 src_port = int(src_port)
 
-                if SocksManager().is_running(src_port):
-                    logger.error('Porta %s já está em uso' % src_port)
+                conflict = port_registry.check(src_port, manager.service_name(src_port, mode))
+                if conflict:
+                    logger.error(conflict)
                     continue
 
                 break
@@ -353,12 +389,14 @@ class SocksActions:
 
 
 def socks_console_main(mode: str):
-    process_install_screen()
+    if not process_start_supervisor():
+        return
 
-    running_port = SocksManager().get_running_port(mode)
+    running_socks = status_service.get('socks', {})
+    running_port = next((port for port in running_socks if running_socks[port] == mode), 0)
 
     console = Console('SOCKS Manager ' + mode.upper(), formatter=FormatterSocks(running_port, mode))
-    if not SocksManager.is_running(mode):
+    if not running_port:
         console.append_item(
             FuncItem(
                 'INICIAR',
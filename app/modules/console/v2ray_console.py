@@ -5,6 +5,8 @@ from console.formatter import create_menu_bg, create_line
 
 from app.utilities.logger import logger
 from app.utilities.utils import get_ip_address
+from app.utilities.status import status_service
+from app.utilities.ports import port_registry
 
 from app.data.repositories import UserRepository
 from app.domain.use_cases import UserUseCase
@@ -100,17 +102,23 @@ class V2RayActions:
                         raise ValueError
 
                     port = int(port)
-                    if port == v2ray_manager.get_running_port():
-                        logger.error('Porta já em uso!')
+                    conflict = port_registry.check(port, 'v2ray')
+                    if port == v2ray_manager.get_running_port() or conflict:
+                        logger.error(conflict or 'Porta já em uso!')
                         port = None
 
                 except ValueError:
                     logger.error('Porta inválida!')
                     port = None
 
-            if v2ray_manager.change_port(port):
+            current_ports = port_registry.ports('v2ray')
+            error = port_registry.claim('v2ray', [(port, 'tcp')])
+            if error is not None:
+                logger.error(error)
+            elif v2ray_manager.change_port(port):
                 logger.info('Porta alterada para %s' % port)
             else:
+                port_registry.claim('v2ray', current_ports)
                 logger.error('Falha ao alterar porta!')
 
         except KeyboardInterrupt:
@@ -234,11 +242,23 @@ class ConsoleListUUID(ConsoleUUID):
         self.console.pause()
 
 
+status_service.register('v2ray_installed', V2RayManager.is_installed)
+status_service.register('v2ray_running', V2RayManager.is_running)
+port_registry.register(
+    'v2ray',
+    lambda: (
+        {'v2ray': [(V2RayManager().get_running_port(), 'tcp')]}
+        if V2RayManager.is_installed()
+        else {}
+    ),
+)
+
+
 def v2ray_console_main():
     console = Console('V2Ray Manager')
     action = V2RayActions()
 
-    if not action.v2ray_manager.is_installed():
+    if not status_service.get('v2ray_installed', False):
         console.append_item(
             FuncItem(
                 'INSTALAR V2RAY',
@@ -250,7 +270,9 @@ def v2ray_console_main():
         console.show()
         return
 
-    if not V2RayManager.is_running():
+    running = status_service.get('v2ray_running', False)
+
+    if not running:
         console.append_item(
             FuncItem(
                 'INICIAR V2RAY',
@@ -260,7 +282,7 @@ def v2ray_console_main():
             )
         )
 
-    if V2RayManager.is_running():
+    if running:
         console.append_item(
             FuncItem(
                 'PARAR V2RAY',
@@ -5,6 +5,9 @@ import time
 from typing import List
 from .config import V2RayConfig
 
+from app.utilities.proc import process_index
+from app.utilities.status import status_service
+
 V2RAY_CMD_INSTALL = 'bash -c \'bash <(curl -L -s https://multi.netlify.app/go.sh)\' -f'
 
 
@@ -29,6 +32,7 @@ class V2RayManager:
     def install() -> bool:
         cmd = V2RAY_CMD_INSTALL
         status = os.system(cmd) == 0
+        status_service.invalidate()
 
         if status:
             V2RayConfig().create(port=5555, protocol='vless')
@@ -51,23 +55,28 @@ class V2RayManager:
 
     @staticmethod
     def is_running() -> bool:
-        cmd = 'ps -ef | grep v2ray | grep -v grep'
-        return os.system(cmd) == 0
+        return process_index.is_running('v2ray')
 
     @staticmethod
     def start() -> bool:
         cmd = 'systemctl start v2ray'
-        return os.system(cmd) == 0
+        status = os.system(cmd) == 0
+        status_service.invalidate()
+        return status
 
     @staticmethod
     def stop() -> bool:
         cmd = 'systemctl stop v2ray'
-        return os.system(cmd) == 0
+        status = os.system(cmd) == 0
+        status_service.invalidate()
+        return status
 
     @staticmethod
     def restart() -> bool:
         cmd = 'systemctl restart v2ray'
-        return os.system(cmd) == 0
+        status = os.system(cmd) == 0
+        status_service.invalidate()
+        return status
 
     def get_running_port(self) -> int:
         config_data = self.config.load()
@@ -0,0 +1,3 @@
+from .service import Service, ServiceRegistry
+from .daemon import Supervisor
+from .client import SupervisorClient, SupervisorError, ensure_supervisor
@@ -0,0 +1,49 @@
+import os
+import sys
+import signal
+import logging
+import argparse
+
+from app.data.config.db_config import DATABASE_PATH
+
+from .client import SOCKET_PATH
+from .daemon import Supervisor
+
+LOG_DIR = '/var/log/glmanager'
+if not os.access(os.path.dirname(LOG_DIR), os.W_OK):
+    LOG_DIR = os.path.join(DATABASE_PATH, 'logs')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='GLManager process supervisor')
+
+    parser.add_argument('--socket', default=SOCKET_PATH, help='Unix socket path')
+    parser.add_argument(
+        '--registry',
+        default=os.path.join(DATABASE_PATH, 'services.json'),
+        help='Service registry file',
+    )
+    parser.add_argument('--log-dir', default=LOG_DIR, help='Service log directory')
+    parser.add_argument('--log', default='INFO', help='Log level')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=getattr(logging, args.log.upper()),
+        format='[%(asctime)s] %(levelname)s: %(message)s',
+    )
+
+    supervisor = Supervisor(args.socket, args.registry, args.log_dir)
+
+    def shutdown(signum, frame):
+        supervisor.running = False
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    supervisor.run()
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
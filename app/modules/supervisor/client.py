@@ -0,0 +1,140 @@
+import os
+import sys
+import json
+import time
+import socket
+import tempfile
+import subprocess
+import typing as t
+
+SOCKET_PATH = '/run/glmanager-supervisor.sock'
+if not os.access(os.path.dirname(SOCKET_PATH), os.W_OK):
+    SOCKET_PATH = os.path.join(tempfile.gettempdir(), 'glmanager-supervisor.sock')
+
+SYSTEMD_PATH = '/run/systemd/system'
+SYSTEMD_UNIT = '/etc/systemd/system/glmanager-supervisor.service'
+SYSTEMD_TEMPLATE = '''[Unit]
+Description=GLManager process supervisor
+After=network.target
+
+[Service]
+Type=simple
+WorkingDirectory={root}
+ExecStart={python} -m app.modules.supervisor
+Restart=always
+RestartSec=2
+
+[Install]
+WantedBy=multi-user.target
+'''
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+
+class SupervisorError(Exception):
+    pass
+
+
+class SupervisorClient:
+    def __init__(self, path: str = SOCKET_PATH, timeout: float = 10):
+        self.path = path
+        self.timeout = timeout
+
+    def request(self, cmd: str, **kwargs) -> dict:
+        kwargs['cmd'] = cmd
+
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(self.path)
+                sock.sendall(json.dumps(kwargs).encode('utf-8') + b'\n')
+
+                data = b''
+                while not data.endswith(b'\n'):
+                    chunk = sock.recv(65536)
+                    if not chunk:
+                        break
+                    data += chunk
+        except OSError as e:
+            raise SupervisorError('Supervisor indisponível: %s' % e)
+
+        try:
+            response = json.loads(data.decode('utf-8'))
+        except ValueError:
+            raise SupervisorError('Resposta inválida do supervisor')
+
+        if not response.pop('ok', False):
+            raise SupervisorError(response.get('error', 'Erro desconhecido'))
+
+        return response
+
+    def ping(self) -> bool:
+        try:
+            self.request('ping')
+            return True
+        except SupervisorError:
+            return False
+
+    def add(self, name: str, command: t.List[str]) -> dict:
+        return self.request('add', name=name, command=command)
+
+    def remove(self, name: str) -> dict:
+        return self.request('remove', name=name)
+
+    def start(self, name: str) -> dict:
+        return self.request('start', name=name)
+
+    def stop(self, name: str) -> dict:
+        return self.request('stop', name=name)
+
+    def restart(self, name: str) -> dict:
+        return self.request('restart', name=name)
+
+    def status(self, name: str) -> dict:
+        return self.request('status', name=name)
+
+    def list(self, prefix: str = '') -> t.List[dict]:
+        services = self.request('list')['services']
+        return [service for service in services if service['name'].startswith(prefix)]
+
+    def log(self, name: str, lines: int = 20) -> t.List[str]:
+        return self.request('log', name=name, lines=lines)['lines']
+
+
+def install_systemd_unit() -> bool:
+    if not os.path.isdir(SYSTEMD_PATH) or os.geteuid() != 0:
+        return False
+
+    with open(SYSTEMD_UNIT, 'w') as f:
+        f.write(SYSTEMD_TEMPLATE.format(root=ROOT_PATH, python=sys.executable))
+
+    os.system('systemctl daemon-reload >/dev/null 2>&1')
+    return os.system('systemctl enable --now glmanager-supervisor >/dev/null 2>&1') == 0
+
+
+def spawn_supervisor(path: str) -> None:
+    subprocess.Popen(
+        [sys.executable, '-m', 'app.modules.supervisor', '--socket', path],
+        cwd=ROOT_PATH,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def ensure_supervisor(path: str = SOCKET_PATH, timeout: float = 5) -> SupervisorClient:
+    client = SupervisorClient(path)
+    if client.ping():
+        return client
+
+    if path != SOCKET_PATH or not install_systemd_unit():
+        spawn_supervisor(path)
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if client.ping():
+            return client
+        time.sleep(0.1)
+
+    raise SupervisorError('Não foi possível iniciar o supervisor')
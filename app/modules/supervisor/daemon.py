@@ -0,0 +1,289 @@
+import os
+import json
+import time
+import shutil
+import socket
+import logging
+import selectors
+import typing as t
+
+from .service import Service, ServiceRegistry
+
+logger = logging.getLogger(__name__)
+
+LOG_MAX_SIZE = 8 * 1024 * 1024
+LOG_CHECK_INTERVAL = 10
+
+
+class Supervisor:
+    def __init__(
+        self,
+        socket_path: str,
+        registry_path: str,
+        log_dir: str,
+        log_max_size: int = LOG_MAX_SIZE,
+    ):
+        self.socket_path = socket_path
+        self.registry = ServiceRegistry(registry_path)
+        self.log_dir = log_dir
+        self.log_max_size = log_max_size
+
+        self.services: t.Dict[str, Service] = {}
+        self.running = False
+
+        self.__selector = selectors.DefaultSelector()
+        self.__sock: t.Optional[socket.socket] = None
+        self.__last_log_check = 0.0
+        self.__removed: t.List[Service] = []
+
+        self.__commands: t.Dict[str, t.Callable[[dict], dict]] = {
+            'ping': lambda request: {},
+            'add': self.cmd_add,
+            'remove': self.cmd_remove,
+            'start': self.cmd_start,
+            'stop': self.cmd_stop,
+            'restart': self.cmd_restart,
+            'status': self.cmd_status,
+            'list': self.cmd_list,
+            'log': self.cmd_log,
+        }
+
+    def log_path(self, name: str) -> str:
+        return os.path.join(self.log_dir, name.replace('/', '_') + '.log')
+
+    def service(self, request: dict) -> Service:
+        service = self.services.get(request.get('name'))
+        if service is None:
+            raise KeyError('Serviço %s não encontrado' % request.get('name'))
+        return service
+
+    def cmd_add(self, request: dict) -> dict:
+        name, command = request['name'], request['command']
+        if not isinstance(command, list) or not command:
+            raise ValueError('Comando inválido')
+
+        service = self.services.get(name)
+        if service is None:
+            service = next((s for s in self.__removed if s.name == name), None)
+            if service is not None:
+                self.__removed.remove(service)
+            else:
+                service = Service(name, command, log_path=self.log_path(name))
+            self.services[name] = service
+
+        changed = service.command != command
+        service.command = command
+        service.autostart = True
+        self.registry.save(self.services)
+
+        if changed:
+            service.restart()
+        else:
+            service.start()
+        logger.info('Serviço %s iniciado (pid %s)' % (name, service.pid))
+        return service.to_dict()
+
+    def cmd_remove(self, request: dict) -> dict:
+        service = self.service(request)
+        service.stop()
+        if service.state == 'stopping':
+            self.__removed.append(service)
+
+        del self.services[service.name]
+        self.registry.save(self.services)
+
+        logger.info('Serviço %s removido' % service.name)
+        return service.to_dict()
+
+    def cmd_start(self, request: dict) -> dict:
+        service = self.service(request)
+        service.autostart = True
+        self.registry.save(self.services)
+
+        service.start()
+        return service.to_dict()
+
+    def cmd_stop(self, request: dict) -> dict:
+        service = self.service(request)
+        service.autostart = False
+        self.registry.save(self.services)
+
+        service.stop()
+        return service.to_dict()
+
+    def cmd_restart(self, request: dict) -> dict:
+        service = self.service(request)
+        service.restart()
+        if not service.restart_pending:
+            service.restarts += 1
+        return service.to_dict()
+
+    def cmd_status(self, request: dict) -> dict:
+        return self.service(request).to_dict()
+
+    def cmd_list(self, request: dict) -> dict:
+        return {'services': [service.to_dict() for service in self.services.values()]}
+
+    def cmd_log(self, request: dict) -> dict:
+        service = self.service(request)
+        lines = int(request.get('lines', 20))
+
+        if not os.path.exists(service.log_path):
+            return {'lines': []}
+
+        with open(service.log_path, 'rb') as f:
+            f.seek(max(os.path.getsize(service.log_path) - 64 * 1024, 0))
+            data = f.read().decode('utf-8', 'replace').splitlines()
+
+        return {'lines': data[-lines:]}
+
+    def execute(self, request: dict) -> dict:
+        handler = self.__commands.get(request.get('cmd'))
+        if handler is None:
+            return {'ok': False, 'error': 'Comando desconhecido: %s' % request.get('cmd')}
+
+        try:
+            response = handler(request)
+        except (KeyError, ValueError, TypeError, OSError) as e:
+            return {'ok': False, 'error': str(e).strip('\'"')}
+
+        response['ok'] = True
+        return response
+
+    def _handle(self, conn: socket.socket) -> None:
+        with conn:
+            conn.settimeout(2)
+            data = b''
+            try:
+                while b'\n' not in data:
+                    chunk = conn.recv(4096)
+                    if not chunk:
+                        break
+                    data += chunk
+
+                try:
+                    request = json.loads(data.decode('utf-8'))
+                except ValueError:
+                    response = {'ok': False, 'error': 'Requisição inválida'}
+                else:
+                    response = self.execute(request)
+
+                conn.sendall(json.dumps(response).encode('utf-8') + b'\n')
+            except OSError as e:
+                logger.debug('Erro no cliente do supervisor: %s' % e)
+
+    def _accept(self) -> None:
+        try:
+            conn, _ = self.__sock.accept()
+        except BlockingIOError:
+            return
+
+        conn.setblocking(True)
+        self._handle(conn)
+
+    def _rotate_logs(self, now: float) -> None:
+        if now - self.__last_log_check < LOG_CHECK_INTERVAL:
+            return
+
+        self.__last_log_check = now
+        for service in self.services.values():
+            path = service.log_path
+            try:
+                if os.path.getsize(path) <= self.log_max_size:
+                    continue
+
+                shutil.copyfile(path, path + '.1')
+                os.truncate(path, 0)
+            except OSError:
+                continue
+
+    def _restart(self, service: Service, now: float) -> None:
+        try:
+            service.start()
+            service.restarts += 1
+        except OSError as e:
+            logger.error('Falha ao iniciar %s: %s' % (service.name, e))
+            service.check(now)
+
+    def tick(self) -> None:
+        now = time.monotonic()
+
+        for service in self.services.values():
+            if service.state == 'stopping':
+                if service.reap(now) and service.restart_pending:
+                    self._restart(service, now)
+            elif service.check(now):
+                logger.warning(
+                    'Serviço %s finalizado com código %s, reiniciando em %.0fs'
+                    % (service.name, service.exit_code, service.next_start - now)
+                )
+            elif service.due(now):
+                self._restart(service, now)
+
+        self.__removed = [service for service in self.__removed if not service.reap(now)]
+        self._rotate_logs(now)
+
+    def load(self) -> None:
+        for name, data in self.registry.load().items():
+            service = Service(
+                name, data['command'], data.get('autostart', True), self.log_path(name)
+            )
+            self.services[name] = service
+
+            if service.autostart:
+                try:
+                    service.start()
+                except OSError as e:
+                    logger.error('Falha ao iniciar %s: %s' % (name, e))
+
+    def bind(self) -> None:
+        os.makedirs(self.log_dir, exist_ok=True)
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        self.__sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.__sock.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        self.__sock.listen(16)
+        self.__sock.setblocking(False)
+
+        self.__selector.register(self.__sock, selectors.EVENT_READ)
+
+    def run(self) -> None:
+        self.bind()
+        self.load()
+        self.running = True
+
+        logger.info('Supervisor iniciado em %s' % self.socket_path)
+
+        try:
+            while self.running:
+                for _ in self.__selector.select(timeout=0.5):
+                    self._accept()
+
+                self.tick()
+        finally:
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        services = list(self.services.values()) + self.__removed
+        for service in services:
+            service.stop()
+
+        while any(service.state == 'stopping' for service in services):
+            now = time.monotonic()
+            for service in services:
+                if service.state == 'stopping':
+                    service.reap(now)
+            time.sleep(0.05)
+
+        self.__selector.close()
+        if self.__sock is not None:
+            self.__sock.close()
+            self.__sock = None
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        logger.info('Supervisor finalizado')
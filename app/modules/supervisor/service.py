@@ -0,0 +1,173 @@
+import os
+import json
+import time
+import signal
+import subprocess
+import typing as t
+
+BACKOFF_BASE = 1
+BACKOFF_MAX = 60
+STABLE_SECONDS = 10
+STOP_TIMEOUT = 5
+
+
+class Service:
+    def __init__(
+        self,
+        name: str,
+        command: t.List[str],
+        autostart: bool = True,
+        log_path: str = None,
+    ):
+        self.name = name
+        self.command = command
+        self.autostart = autostart
+        self.log_path = log_path
+
+        self.state = 'stopped'
+        self.process: t.Optional[subprocess.Popen] = None
+        self.started_at = 0.0
+        self.next_start = 0.0
+        self.failures = 0
+        self.restarts = 0
+        self.exit_code = None
+        self.stop_deadline = 0.0
+        self.restart_pending = False
+
+    @property
+    def pid(self) -> t.Optional[int]:
+        return self.process.pid if self.process is not None else None
+
+    @property
+    def running(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def start(self) -> None:
+        if self.state == 'stopping':
+            self.restart_pending = True
+            return
+
+        if self.running:
+            return
+
+        log = subprocess.DEVNULL
+        if self.log_path:
+            os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+            log = open(self.log_path, 'ab')
+
+        try:
+            self.process = subprocess.Popen(
+                self.command,
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                start_new_session=True,
+            )
+        finally:
+            if log is not subprocess.DEVNULL:
+                log.close()
+
+        self.state = 'running'
+        self.started_at = time.monotonic()
+        self.exit_code = None
+        self.restart_pending = False
+
+    def stop(self) -> None:
+        self.restart_pending = False
+
+        if not self.running:
+            self._stopped()
+            return
+
+        if self.state != 'stopping':
+            self._signal(signal.SIGTERM)
+            self.state = 'stopping'
+            self.stop_deadline = time.monotonic() + STOP_TIMEOUT
+
+    def restart(self) -> None:
+        if not self.running:
+            self.start()
+            return
+
+        self.stop()
+        self.restart_pending = True
+
+    def reap(self, now: float) -> bool:
+        if self.process.poll() is None:
+            if now >= self.stop_deadline:
+                self._signal(signal.SIGKILL)
+            return False
+
+        self._stopped()
+        return True
+
+    def _stopped(self) -> None:
+        if self.process is not None:
+            self.exit_code = self.process.returncode
+
+        self.process = None
+        self.state = 'stopped'
+        self.failures = 0
+
+    def _signal(self, signum: int) -> None:
+        try:
+            os.killpg(self.process.pid, signum)
+        except OSError:
+            pass
+
+    def check(self, now: float) -> bool:
+        if self.state == 'stopping' or self.process is None or self.process.poll() is None:
+            return False
+
+        self.exit_code = self.process.returncode
+        self.process = None
+
+        if now - self.started_at >= STABLE_SECONDS:
+            self.failures = 0
+
+        self.failures += 1
+        self.state = 'backoff'
+        self.next_start = now + min(BACKOFF_BASE * 2 ** (self.failures - 1), BACKOFF_MAX)
+        return True
+
+    def due(self, now: float) -> bool:
+        return self.state == 'backoff' and now >= self.next_start
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'command': self.command,
+            'autostart': self.autostart,
+            'state': self.state,
+            'pid': self.pid,
+            'uptime': time.monotonic() - self.started_at if self.running else 0,
+            'restarts': self.restarts,
+            'exit_code': self.exit_code,
+            'log': self.log_path,
+        }
+
+
+class ServiceRegistry:
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> t.Dict[str, dict]:
+        if not os.path.exists(self.path):
+            return {}
+
+        with open(self.path) as f:
+            return json.load(f).get('services', {})
+
+    def save(self, services: t.Dict[str, Service]) -> None:
+        data = {
+            'services': {
+                name: {'command': service.command, 'autostart': service.autostart}
+                for name, service in services.items()
+            }
+        }
+
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(data, f, indent=4, sort_keys=True)
+
+        os.replace(tmp, self.path)
@@ -0,0 +1,160 @@
+import os
+import time
+import logging
+import threading
+import typing as t
+
+from app.data.repositories import PortRepository
+
+logger = logging.getLogger(__name__)
+
+PROC_NET_PATH = '/proc/net'
+
+TCP_LISTEN = '0A'
+UDP_UNCONNECTED = '07'
+
+PortKey = t.Tuple[int, str]
+
+
+def listening_ports(proc_net_path: str = PROC_NET_PATH) -> t.Set[PortKey]:
+    ports = set()
+
+    for protocol, state in (('tcp', TCP_LISTEN), ('udp', UDP_UNCONNECTED)):
+        for name in (protocol, protocol + '6'):
+            try:
+                with open(os.path.join(proc_net_path, name)) as f:
+                    lines = f.readlines()[1:]
+            except OSError:
+                continue
+
+            for line in lines:
+                fields = line.split()
+                if len(fields) > 3 and fields[3] == state:
+                    ports.add((int(fields[1].rsplit(':', 1)[1], 16), protocol))
+
+    return ports
+
+
+class PortRegistry:
+    def __init__(
+        self,
+        repository: PortRepository = PortRepository,
+        proc_net_path: str = PROC_NET_PATH,
+        ttl: float = 2,
+    ):
+        self.repository = repository
+        self.proc_net_path = proc_net_path
+        self.ttl = ttl
+
+        self.__sources: t.Dict[str, t.Callable[[], t.Dict[str, t.List[PortKey]]]] = {}
+        self.__owners: t.Optional[t.Dict[PortKey, str]] = None
+        self.__listening: t.Optional[t.Set[PortKey]] = None
+        self.__listening_at = 0.0
+        self.__discovered: t.Set[str] = set()
+        self.__lock = threading.RLock()
+
+    def register(self, prefix: str, source: t.Callable[[], t.Dict[str, t.List[PortKey]]]) -> None:
+        self.__sources[prefix] = source
+        self.__discovered.discard(prefix)
+
+    def invalidate(self) -> None:
+        with self.__lock:
+            self.__owners = None
+            self.__listening = None
+
+    def owners(self) -> t.Dict[PortKey, str]:
+        with self.__lock:
+            if self.__owners is None:
+                self.__owners = {
+                    (item.port, item.protocol): item.service for item in self.repository.get_all()
+                }
+
+            return self.__owners
+
+    def listening(self) -> t.Set[PortKey]:
+        with self.__lock:
+            if self.__listening is None or time.monotonic() - self.__listening_at >= self.ttl:
+                self.__listening = listening_ports(self.proc_net_path)
+                self.__listening_at = time.monotonic()
+
+            return self.__listening
+
+    def owner(self, port: int, protocol: str = 'tcp') -> t.Optional[str]:
+        self.discover()
+        return self.owners().get((port, protocol))
+
+    def ports(self, service: str) -> t.List[PortKey]:
+        return sorted(key for key, owner in self.owners().items() if owner == service)
+
+    def check(self, port: int, service: str, protocol: str = 'tcp') -> t.Optional[str]:
+        if port < 1 or port > 65535:
+            return 'Porta %s inválida' % port
+
+        owner = self.owner(port, protocol)
+        if owner is not None and owner != service:
+            return 'Porta %s/%s já está em uso por %s' % (port, protocol, owner)
+
+        if owner is None and (port, protocol) in self.listening():
+            return 'Porta %s/%s já está em uso por outro processo' % (port, protocol)
+
+        return None
+
+    def claim(self, service: str, ports: t.List[PortKey]) -> t.Optional[str]:
+        self.discover()
+        return self._claim(service, ports)
+
+    def _claim(self, service: str, ports: t.List[PortKey]) -> t.Optional[str]:
+        with self.__lock:
+            if sorted(ports) == self.ports(service):
+                return None
+
+            owners = self.owners()
+            for port, protocol in ports:
+                owner = owners.get((port, protocol))
+                if owner is not None and owner != service:
+                    return 'Porta %s/%s já está em uso por %s' % (port, protocol, owner)
+
+            try:
+                self.repository.replace(service, ports)
+            except Exception as e:
+                logger.debug('Falha ao registrar portas de %s: %s' % (service, e))
+                return 'Não foi possível registrar as portas de %s' % service
+            finally:
+                self.invalidate()
+
+        return None
+
+    def release(self, service: str) -> None:
+        with self.__lock:
+            if not self.ports(service):
+                return
+
+            self.repository.delete_by_service(service)
+            self.invalidate()
+
+    def discover(self) -> None:
+        with self.__lock:
+            for prefix, source in self.__sources.items():
+                if prefix in self.__discovered:
+                    continue
+
+                try:
+                    services = source()
+                except Exception as e:
+                    logger.debug('Falha ao descobrir portas de %s: %s' % (prefix, e))
+                    continue
+
+                owners = {owner for owner in self.owners().values() if owner.startswith(prefix)}
+                for service in owners:
+                    if service not in services:
+                        self.release(service)
+
+                for service, ports in services.items():
+                    error = self._claim(service, ports)
+                    if error is not None:
+                        logger.error('Conflito de portas em %s: %s' % (service, error))
+
+                self.__discovered.add(prefix)
+
+
+port_registry = PortRegistry()
@@ -0,0 +1,158 @@
+import os
+import pwd
+import time
+import threading
+import typing as t
+
+PROC_PATH = '/proc'
+SSHD_COMMS = ('sshd', 'sshd-session')
+
+
+class ProcessInfo:
+    def __init__(self, pid: int, comm: str, uid: int, cmdline: t.List[str]):
+        self.pid = pid
+        self.comm = comm
+        self.uid = uid
+        self.cmdline = cmdline
+
+    def option(self, name: str) -> t.Optional[str]:
+        name = name.lstrip('-')
+
+        for index, token in enumerate(self.cmdline):
+            key, _, value = token.lstrip('-').partition('=')
+            if key != name or not token.startswith('-'):
+                continue
+
+            if value:
+                return value
+
+            if index + 1 < len(self.cmdline):
+                return self.cmdline[index + 1]
+
+        return None
+
+    def __repr__(self) -> str:
+        return '<ProcessInfo pid=%d comm=%s uid=%d>' % (self.pid, self.comm, self.uid)
+
+
+class ProcessSnapshot:
+    def __init__(self, processes: t.List[ProcessInfo]):
+        self.processes = processes
+        self.created_at = time.monotonic()
+
+        self.__by_comm: t.Dict[str, t.List[ProcessInfo]] = {}
+        self.__by_uid: t.Dict[int, t.List[ProcessInfo]] = {}
+        self.__by_token: t.Dict[str, t.List[ProcessInfo]] = {}
+
+        for process in processes:
+            self.__by_comm.setdefault(process.comm, []).append(process)
+            self.__by_uid.setdefault(process.uid, []).append(process)
+
+            tokens = {token.partition('=')[0] for token in process.cmdline}
+            if process.cmdline:
+                tokens.add(os.path.basename(process.cmdline[0]))
+
+            for token in tokens:
+                self.__by_token.setdefault(token, []).append(process)
+
+    def find(
+        self,
+        comm: t.Union[str, t.Iterable[str]] = None,
+        uid: int = None,
+        token: str = None,
+    ) -> t.List[ProcessInfo]:
+        groups = []
+
+        if comm is not None:
+            comms = (comm,) if isinstance(comm, str) else comm
+            groups.append([p for name in comms for p in self.__by_comm.get(name, [])])
+
+        if uid is not None:
+            groups.append(self.__by_uid.get(uid, []))
+
+        if token is not None:
+            groups.append(self.__by_token.get(token, []))
+
+        if not groups:
+            return list(self.processes)
+
+        groups.sort(key=len)
+        result = groups[0]
+        for group in groups[1:]:
+            pids = {process.pid for process in group}
+            result = [process for process in result if process.pid in pids]
+
+        return list(result)
+
+    def exists(self, **kwargs) -> bool:
+        return len(self.find(**kwargs)) > 0
+
+    def option(self, name: str) -> t.Optional[str]:
+        for process in self.find(token='--' + name.lstrip('-')):
+            value = process.option(name)
+            if value is not None:
+                return value
+
+        return None
+
+
+def scan(proc_path: str = PROC_PATH) -> ProcessSnapshot:
+    processes = []
+
+    for entry in os.listdir(proc_path):
+        if not entry.isdigit():
+            continue
+
+        path = os.path.join(proc_path, entry)
+        try:
+            uid = os.stat(path).st_uid
+            with open(os.path.join(path, 'comm')) as f:
+                comm = f.read().strip()
+            with open(os.path.join(path, 'cmdline'), 'rb') as f:
+                cmdline = f.read().decode('utf-8', 'replace').split('\0')
+        except OSError:
+            continue
+
+        processes.append(ProcessInfo(int(entry), comm, uid, [arg for arg in cmdline if arg]))
+
+    return ProcessSnapshot(processes)
+
+
+class ProcessIndex:
+    def __init__(self, ttl: float = 2, proc_path: str = PROC_PATH):
+        self.ttl = ttl
+        self.proc_path = proc_path
+
+        self.__snapshot: t.Optional[ProcessSnapshot] = None
+        self.__lock = threading.Lock()
+
+    def snapshot(self) -> ProcessSnapshot:
+        with self.__lock:
+            snapshot = self.__snapshot
+            if snapshot is None or time.monotonic() - snapshot.created_at >= self.ttl:
+                snapshot = self.__snapshot = scan(self.proc_path)
+
+            return snapshot
+
+    def invalidate(self) -> None:
+        with self.__lock:
+            self.__snapshot = None
+
+    def is_running(self, comm: t.Union[str, t.Iterable[str]]) -> bool:
+        return self.snapshot().exists(comm=comm)
+
+    def pids(self, comm: t.Union[str, t.Iterable[str]] = None, user: str = None) -> t.List[int]:
+        uid = None
+        if user is not None:
+            try:
+                uid = pwd.getpwnam(user).pw_uid
+            except KeyError:
+                return []
+
+        return [process.pid for process in self.snapshot().find(comm=comm, uid=uid)]
+
+    def option(self, name: str) -> t.Optional[str]:
+        return self.snapshot().option(name)
+
+
+process_index = ProcessIndex()
@@ -1,4 +1,5 @@
 import os
+import typing as t
 import subprocess
 
 
@@ -11,3 +12,13 @@ def exec_command(command: str) -> str:
     bash += ' "' + command + '"'
     data = os.popen(bash).read()
     return data.strip()
+
+
+def exec_with_input(command: t.List[str], data: str) -> int:
+    process = subprocess.run(
+        command,
+        input=data.encode('utf-8'),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return process.returncode
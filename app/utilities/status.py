@@ -0,0 +1,102 @@
+import time
+import logging
+import threading
+import typing as t
+
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from app.utilities.proc import process_index
+
+logger = logging.getLogger(__name__)
+
+
+class StatusService:
+    def __init__(self, ttl: float = 3, max_workers: int = 8, timeout: float = 5):
+        self.ttl = ttl
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+        self.__probes: t.Dict[str, t.Callable[[], t.Any]] = {}
+        self.__values: t.Dict[str, t.Any] = {}
+        self.__updated_at: t.Optional[float] = None
+        self.__generation = 0
+
+        self.__executor: t.Optional[ThreadPoolExecutor] = None
+        self.__pending: t.Optional[threading.Thread] = None
+        self.__lock = threading.Lock()
+
+    def register(self, name: str, probe: t.Callable[[], t.Any]) -> None:
+        with self.__lock:
+            self.__probes[name] = probe
+            self.__updated_at = None
+            self.__generation += 1
+
+    def invalidate(self) -> None:
+        process_index.invalidate()
+
+        with self.__lock:
+            self.__updated_at = None
+            self.__generation += 1
+
+    def _fresh(self) -> bool:
+        return self.__updated_at is not None and time.monotonic() - self.__updated_at < self.ttl
+
+    def _collect(self, probes: t.Dict[str, t.Callable[[], t.Any]]) -> t.Dict[str, t.Any]:
+        if self.__executor is None:
+            self.__executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='status')
+
+        futures = {name: self.__executor.submit(probe) for name, probe in probes.items()}
+        deadline = time.monotonic() + self.timeout
+        values = {}
+
+        for name, future in futures.items():
+            try:
+                values[name] = future.result(max(deadline - time.monotonic(), 0))
+            except TimeoutError:
+                logger.debug('Status %s excedeu o tempo limite' % name)
+                values[name] = None
+            except Exception as e:
+                logger.debug('Falha ao obter status %s: %s' % (name, e))
+                values[name] = None
+
+        return values
+
+    def refresh(self) -> t.Dict[str, t.Any]:
+        with self.__lock:
+            probes = dict(self.__probes)
+            generation = self.__generation
+
+        values = self._collect(probes)
+
+        with self.__lock:
+            if generation == self.__generation:
+                self.__values = values
+                self.__updated_at = time.monotonic()
+
+        return values
+
+    def prefetch(self) -> None:
+        with self.__lock:
+            if self._fresh() or (self.__pending is not None and self.__pending.is_alive()):
+                return
+
+            self.__pending = threading.Thread(target=self.refresh, name='status', daemon=True)
+            self.__pending.start()
+
+    def snapshot(self) -> t.Dict[str, t.Any]:
+        pending = self.__pending
+        if pending is not None and pending is not threading.current_thread():
+            pending.join(self.timeout)
+
+        with self.__lock:
+            if self._fresh():
+                return self.__values
+
+        return self.refresh()
+
+    def get(self, name: str, default: t.Any = None) -> t.Any:
+        value = self.snapshot().get(name)
+        return default if value is None else value
+
+
+status_service = StatusService()
@@ -1,9 +1,11 @@
 import os
+import pwd
 import typing as t
 import urllib.request
 
 from datetime import datetime, timedelta
 from .shellscript import exec_command
+from .proc import process_index, SSHD_COMMS
 
 
 def load_all_users() -> t.List[str]:
@@ -19,6 +21,14 @@ def load_all_users() -> t.List[str]:
     return data
 
 
+def system_user_exists(name: str) -> bool:
+    try:
+        pwd.getpwnam(name)
+        return True
+    except KeyError:
+        return False
+
+
 def find_user_by_name(name: str) -> t.Optional[str]:
     users = load_all_users()
     return next((user for user in users if user == name), None)
@@ -29,19 +39,11 @@ def count_users(users: t.List[str] = None) -> int:
 
 
 def get_pids_ssh(user: str) -> t.List[int]:
-    command = f'ps -u {user}'
-    output = exec_command(command)
-    return [
-        int(line.split()[0])
-        for line in output.split('\n')[1:]
-        if line and line.split()[-1] == 'sshd'
-    ]
+    return process_index.pids(comm=SSHD_COMMS, user=user)
 
 
 def count_connections(user: str) -> int:
-    command = f'ps -u {user} | grep sshd | wc -l'
-    output = exec_command(command)
-    return int(output.strip()) if output else 0
+    return len(get_pids_ssh(user))
 
 
 def days_to_date(days: int) -> str:
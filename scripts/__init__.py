@@ -2,3 +2,5 @@ import os
 
 SOCKS_PATH = os.path.join(os.path.dirname(__file__), 'socks.py')
 CERT_PATH = os.path.join(os.path.dirname(__file__), 'cert.pem')
+INSTALL_CERT_PATH = '/etc/GLManager/cert.pem'
+UDPGW_PATH = os.path.join(os.path.dirname(__file__), 'udpgw.py')
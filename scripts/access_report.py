@@ -0,0 +1,121 @@
+import time
+import heapq
+import argparse
+
+from collections import Counter
+from typing import Dict, Iterator, List
+
+try:
+    from scripts.socks import AccessLog, Histogram
+except ImportError:
+    from socks import AccessLog, Histogram
+
+DURATION_BOUNDS = [0.1, 1, 10, 60, 600, 3600]
+ERROR_REASONS = ('rejected', 'upstream', 'error')
+
+
+def format_bytes(value: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if value < 1024:
+            return f'{value:.1f}{unit}'
+        value /= 1024
+    return f'{value:.1f}TB'
+
+
+class AccessReport:
+    def __init__(self) -> None:
+        self.tunnels = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.total_duration = 0.0
+        self.max_duration = 0.0
+
+        self.durations = Histogram(DURATION_BOUNDS)
+        self.talkers: Counter = Counter()
+        self.tunnels_by_client: Counter = Counter()
+        self.reasons: Counter = Counter()
+        self.routes: Dict[str, Counter] = {}
+
+    def add(self, record: tuple) -> None:
+        _, duration, client, _, _, _, bytes_in, bytes_out, route, reason = record
+
+        self.tunnels += 1
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+        self.total_duration += duration
+        self.max_duration = max(self.max_duration, duration)
+
+        self.durations.observe(duration)
+        self.talkers[client] += bytes_in + bytes_out
+        self.tunnels_by_client[client] += 1
+        self.reasons[reason] += 1
+        self.routes.setdefault(route, Counter())[reason] += 1
+
+    def report(self, top: int) -> str:
+        if not self.tunnels:
+            return 'Nenhum registro'
+
+        errors = sum(self.reasons[reason] for reason in ERROR_REASONS)
+        lines = [
+            f'Túneis: {self.tunnels} - Entrada: {format_bytes(self.bytes_in)} - '
+            f'Saída: {format_bytes(self.bytes_out)}',
+            f'Erros: {errors} ({errors / self.tunnels * 100:.2f}%)',
+            f'Duração: média {self.total_duration / self.tunnels:.2f}s - '
+            f'max {self.max_duration:.2f}s',
+            '  ' + self.durations.format('s'),
+            '',
+            'Motivos de encerramento:',
+        ]
+
+        for reason, count in self.reasons.most_common():
+            lines.append(f'  {count:>10} {reason} ({count / self.tunnels * 100:.2f}%)')
+
+        lines += ['', 'Rotas:']
+        for route, reasons in sorted(self.routes.items(), key=lambda item: -sum(item[1].values())):
+            total = sum(reasons.values())
+            failed = sum(reasons[reason] for reason in ERROR_REASONS)
+            lines.append(f'  {total:>10} {route} - erros {failed / total * 100:.2f}%')
+
+        lines += ['', f'Top {top} clientes por tráfego:']
+        for client, total in heapq.nlargest(top, self.talkers.items(), key=lambda item: item[1]):
+            lines.append(
+                f'  {format_bytes(total):>10} {client} ({self.tunnels_by_client[client]} túneis)'
+            )
+
+        return '\n'.join(lines)
+
+
+def iter_records(paths: List[str], since: float = 0) -> Iterator[tuple]:
+    for path in paths:
+        for record in AccessLog.iter_records(path):
+            if record[0] >= since:
+                yield record
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Analyze socks.py binary access logs')
+
+    parser.add_argument('path', help='Access log file (rotated files are included)')
+    parser.add_argument('--top', type=int, default=10, help='Top talkers shown')
+    parser.add_argument('--since', type=float, default=0, help='Only the last N hours')
+    parser.add_argument('--route', default=None, help='Only this route')
+
+    args = parser.parse_args()
+
+    paths = AccessLog.files(args.path)
+    if not paths:
+        print(f'Nenhum log encontrado em {args.path}')
+        return
+
+    since = time.time() - args.since * 3600 if args.since else 0
+    report = AccessReport()
+
+    for record in iter_records(paths, since):
+        if args.route is None or record[8] == args.route:
+            report.add(record)
+
+    print(report.report(args.top))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+import os
+import time
+import argparse
+import datetime
+import tempfile
+
+from typing import Callable, Dict, List
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.data.config import Base, DBConnection
+from app.data.config.db_config import dispose_engines
+from app.domain.entities import User
+
+
+def legacy_session(uri: str):
+    engine = create_engine(uri, poolclass=NullPool)
+    return engine, sessionmaker()(bind=engine)
+
+
+def query_legacy(uri: str, username: str) -> None:
+    engine, session = legacy_session(uri)
+    try:
+        session.query(User).filter(User.username == username).first()
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def query_pooled(uri: str, username: str) -> None:
+    with DBConnection(uri) as db:
+        db.session.query(User).filter(User.username == username).first()
+
+
+def update_legacy(uri: str, username: str) -> None:
+    engine, session = legacy_session(uri)
+    try:
+        session.query(User).filter(User.username == username).update({'connection_limit': 2})
+        session.commit()
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def update_pooled(uri: str, username: str) -> None:
+    with DBConnection(uri) as db:
+        db.session.query(User).filter(User.username == username).update({'connection_limit': 2})
+        db.session.commit()
+
+
+def populate(uri: str, count: int) -> None:
+    with DBConnection(uri) as db:
+        Base.metadata.create_all(db.engine)
+
+        expiration_date = datetime.datetime.now() + datetime.timedelta(days=30)
+        for index in range(count):
+            db.session.add(
+                User(
+                    username='user%d' % index,
+                    password='password',
+                    connection_limit=1,
+                    expiration_date=expiration_date,
+                )
+            )
+
+        db.session.commit()
+
+
+def measure(operation: Callable[[str, str], None], uri: str, users: int, count: int) -> Dict:
+    operation(uri, 'user0')
+
+    samples: List[float] = []
+    for index in range(count):
+        start = time.perf_counter()
+        operation(uri, 'user%d' % (index % users))
+        samples.append(time.perf_counter() - start)
+
+    samples.sort()
+    return {
+        'mean_us': sum(samples) / count * 1000 * 1000,
+        'p50_us': samples[count // 2] * 1000 * 1000,
+        'p99_us': samples[min(int(count * 0.99), count - 1)] * 1000 * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-query latency of DBConnection')
+
+    parser.add_argument('--users', type=int, default=5000, help='Users in the database')
+    parser.add_argument('--count', type=int, default=2000, help='Queries per case')
+
+    args = parser.parse_args()
+
+    print('%-24s %12s %12s %12s' % ('CASO', 'MÉDIA US', 'P50 US', 'P99 US'))
+
+    with tempfile.TemporaryDirectory() as directory:
+        uri = 'sqlite:///' + os.path.join(directory, 'bench.sqlite3')
+        populate(uri, args.users)
+        dispose_engines()
+
+        cases = [
+            ('select/create_engine', query_legacy),
+            ('select/pool', query_pooled),
+            ('update/create_engine', update_legacy),
+            ('update/pool', update_pooled),
+        ]
+
+        for name, operation in cases:
+            result = measure(operation, uri, args.users, args.count)
+            print(
+                '%-24s %12.1f %12.1f %12.1f'
+                % (name, result['mean_us'], result['p50_us'], result['p99_us'])
+            )
+
+        dispose_engines()
+
+
+if __name__ == '__main__':
+    main()
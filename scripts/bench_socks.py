@@ -0,0 +1,313 @@
+import gc
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import tracemalloc
+
+from typing import Callable, Dict, List, Tuple
+
+try:
+    from scripts import socks
+except ImportError:
+    import socks
+
+Operation = Callable[[], None]
+Setup = Callable[[], Tuple[Operation, Callable[[], None]]]
+
+PAYLOADS = {
+    'ssh': b'SSH-2.0-OpenSSH_8.9p1 Ubuntu-3ubuntu0.1\r\n',
+    'openvpn': b'\x0068\x00' + bytes(range(64)),
+    'v2ray': b'\x00' + bytes(range(1, 64)),
+    'http_get': b'GET / HTTP/1.1\r\nHost: example.com\r\nUpgrade: websocket\r\n\r\n',
+    'http_injector': (
+        b'GET /cdn-cgi/trace HTTP/1.1\r\n'
+        b'Host: m.example.com\r\n'
+        b'X-Online-Host: m.example.com\r\n'
+        b'X-Forward-Host: m.example.com\r\n'
+        b'Connection: Keep-Alive\r\n'
+        b'User-Agent: Mozilla/5.0 (Linux; Android 11) AppleWebKit/537.36\r\n'
+        b'Upgrade: websocket\r\n'
+        b'Content-Length: 4\r\n\r\nbody'
+    ),
+    'http_connect': b'CONNECT 127.0.0.1:22 HTTP/1.1\r\nHost: 127.0.0.1:22\r\n\r\n',
+}
+
+BENCHMARKS: Dict[str, Setup] = {}
+
+
+def benchmark(name: str) -> Callable[[Setup], Setup]:
+    def decorator(setup: Setup) -> Setup:
+        BENCHMARKS[name] = setup
+        return setup
+
+    return decorator
+
+
+def _noop() -> None:
+    pass
+
+
+def _register_parser_benchmarks() -> None:
+    for key, payload in PAYLOADS.items():
+
+        def parser_type(payload=payload):
+            parser = socks.ParserType(payload)
+
+            def op():
+                parser.type = None
+                parser.parse()
+
+            return op, _noop
+
+        benchmark(f'ParserType.parse[{key}]')(parser_type)
+
+        if not payload.startswith(b'GET') and not payload.startswith(b'CONNECT'):
+            continue
+
+        def http_parse(payload=payload):
+            def op():
+                socks.HttpParser().parse(payload)
+
+            return op, _noop
+
+        def http_build(payload=payload):
+            parser = socks.HttpParser()
+            parser.parse(payload)
+            return parser.build, _noop
+
+        benchmark(f'HttpParser.parse[{key}]')(http_parse)
+        benchmark(f'HttpParser.build[{key}]')(http_build)
+
+
+_register_parser_benchmarks()
+
+
+def _socket_pair_connection(cls=socks.Connection) -> Tuple[socks.Connection, socket.socket]:
+    local, remote = socket.socketpair()
+    for sock in (local, remote):
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4 * 1024 * 1024)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+
+    return cls(local, ('127.0.0.1', 0)), remote
+
+
+@benchmark('Connection.queue[4KB]')
+def connection_queue():
+    connection, remote = _socket_pair_connection()
+    chunk = b'x' * 4096
+
+    def op():
+        connection.queue(chunk)
+        connection.buffer = b''
+
+    def teardown():
+        connection.close()
+        remote.close()
+
+    return op, teardown
+
+
+@benchmark('Connection.queue+flush[4KB]')
+def connection_flush():
+    connection, remote = _socket_pair_connection()
+    chunk = b'x' * 4096
+
+    def op():
+        connection.queue(chunk)
+        connection.flush()
+        remote.recv(8192)
+
+    def teardown():
+        connection.close()
+        remote.close()
+
+    return op, teardown
+
+
+@benchmark('Connection.queue+flush[16x4KB]')
+def connection_flush_backlog():
+    connection, remote = _socket_pair_connection()
+    chunk = b'x' * 4096
+
+    def op():
+        for _ in range(16):
+            connection.queue(chunk)
+        while connection.buffer:
+            connection.flush()
+            remote.recv(65536)
+
+    def teardown():
+        connection.close()
+        remote.close()
+
+    return op, teardown
+
+
+@benchmark('Proxy._get_waitable_lists')
+def proxy_waitable_lists():
+    client, client_remote = _socket_pair_connection(socks.Client)
+    server, server_remote = _socket_pair_connection(socks.Server)
+    proxy = socks.Proxy(client, server)
+    client.queue(b'x')
+
+    def op():
+        proxy._get_waitable_lists()
+
+    def teardown():
+        for conn in (client, server):
+            conn.close()
+        client_remote.close()
+        server_remote.close()
+
+    return op, teardown
+
+
+@benchmark('AccessList.allowed[20k]')
+def access_list_allowed():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.acl')
+        with open(path, 'w') as f:
+            for index in range(20000):
+                f.write(f'deny 10.{index // 256}.{index % 256}.0/24\n')
+
+        acl = socks.AccessList(path, reload_interval=0)
+
+    def op():
+        acl.allowed('10.78.31.7')
+
+    return op, _noop
+
+
+def measure(setup: Setup, iterations: int, repeat: int) -> Dict[str, float]:
+    op, teardown = setup()
+
+    try:
+        for _ in range(min(iterations, 1000)):
+            op()
+
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        timings = []
+        try:
+            for _ in range(repeat):
+                start = time.perf_counter_ns()
+                for _ in range(iterations):
+                    op()
+                timings.append((time.perf_counter_ns() - start) / iterations)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+        samples = min(iterations, 1000)
+        allocated = None
+
+        # tracemalloc.reset_peak() only exists on Python 3.9+
+        reset_peak = getattr(tracemalloc, 'reset_peak', None)
+        if reset_peak is not None:
+            tracemalloc.start()
+            try:
+                allocated = 0
+                for _ in range(samples):
+                    reset_peak()
+                    current, _ = tracemalloc.get_traced_memory()
+                    op()
+                    _, peak = tracemalloc.get_traced_memory()
+                    allocated += peak - current
+            finally:
+                tracemalloc.stop()
+
+        blocks = sys.getallocatedblocks()
+        for _ in range(samples):
+            op()
+        blocks = sys.getallocatedblocks() - blocks
+    finally:
+        teardown()
+
+    return {
+        'ns_op': min(timings),
+        'bytes_op': allocated / samples if allocated is not None else None,
+        'retained_blocks_op': blocks / samples,
+    }
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float,
+) -> List[str]:
+    regressions = []
+
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+
+        for metric in ('ns_op', 'bytes_op'):
+            if result.get(metric) is None or base.get(metric) is None:
+                continue
+
+            limit = base[metric] * (1 + threshold)
+            if result[metric] > limit and result[metric] - base[metric] > 1:
+                regressions.append(
+                    f'{name} {metric}: {base[metric]:.1f} -> {result[metric]:.1f} '
+                    f'(+{(result[metric] / max(base[metric], 1e-9) - 1) * 100:.1f}%)'
+                )
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Microbenchmarks for scripts/socks.py')
+
+    parser.add_argument('--iterations', type=int, default=20000, help='Iterations per repeat')
+    parser.add_argument('--repeat', type=int, default=5, help='Repeats (min is reported)')
+    parser.add_argument('--filter', default='', help='Only run benchmarks containing this text')
+    parser.add_argument('--save', default=None, help='Write results as JSON baseline')
+    parser.add_argument('--compare', default=None, help='Compare with a JSON baseline')
+    parser.add_argument(
+        '--threshold', type=float, default=0.2, help='Allowed regression ratio (0.2 = 20%%)'
+    )
+
+    args = parser.parse_args()
+
+    results = {}
+    print('%-40s %12s %12s %12s' % ('BENCHMARK', 'NS/OP', 'BYTES/OP', 'RETAINED/OP'))
+
+    for name, setup in BENCHMARKS.items():
+        if args.filter not in name:
+            continue
+
+        result = measure(setup, args.iterations, args.repeat)
+        results[name] = result
+        bytes_op = result['bytes_op']
+        print(
+            '%-40s %12.1f %12s %12.2f'
+            % (
+                name,
+                result['ns_op'],
+                'n/a' if bytes_op is None else '%.1f' % bytes_op,
+                result['retained_blocks_op'],
+            )
+        )
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=4, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+
+        for regression in regressions:
+            print('REGRESSÃO ' + regression)
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+import os
+import ssl
+import time
+import argparse
+import tempfile
+
+from typing import Dict, List, Tuple
+
+try:
+    from scripts import socks
+    from scripts.certgen import generate_certificate
+except ImportError:
+    import socks
+    from certgen import generate_certificate
+
+
+def handshake(server_context: ssl.SSLContext, client_context: ssl.SSLContext) -> float:
+    server_in, server_out = ssl.MemoryBIO(), ssl.MemoryBIO()
+    client_in, client_out = ssl.MemoryBIO(), ssl.MemoryBIO()
+
+    server = server_context.wrap_bio(server_in, server_out, server_side=True)
+    client = client_context.wrap_bio(client_in, client_out, server_hostname='bench')
+
+    server_time = 0.0
+    client_done = server_done = False
+
+    while not (client_done and server_done):
+        if not client_done:
+            try:
+                client.do_handshake()
+                client_done = True
+            except ssl.SSLWantReadError:
+                pass
+
+        server_in.write(client_out.read())
+
+        if not server_done:
+            start = time.perf_counter()
+            try:
+                server.do_handshake()
+                server_done = True
+            except ssl.SSLWantReadError:
+                pass
+            server_time += time.perf_counter() - start
+
+        client_in.write(server_out.read())
+
+    return server_time
+
+
+def client_context(version: ssl.TLSVersion) -> ssl.SSLContext:
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    context.minimum_version = version
+    context.maximum_version = version
+    return context
+
+
+def measure(cert: str, version: str, count: int) -> Dict[str, float]:
+    server_context = socks.create_server_context(cert)
+    context = client_context(socks.TLS_VERSIONS[version])
+
+    handshake(server_context, context)
+
+    start = time.perf_counter()
+    server_time = sum(handshake(server_context, context) for _ in range(count))
+    elapsed = time.perf_counter() - start
+
+    return {
+        'server_hs': count / server_time,
+        'total_hs': count / elapsed,
+        'server_us': server_time / count * 1000 * 1000,
+    }
+
+
+def certificates(directory: str, bundled: bool) -> List[Tuple[str, str]]:
+    certs = [
+        ('ecdsa-p256', generate_certificate(os.path.join(directory, 'ec.pem'), 'ec')),
+        ('rsa-2048', generate_certificate(os.path.join(directory, 'rsa2048.pem'), 'rsa', 2048)),
+    ]
+
+    if bundled:
+        certs.append(('bundled', os.path.join(os.path.dirname(socks.__file__), 'cert.pem')))
+
+    return certs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TLS handshake benchmark for socks.py')
+
+    parser.add_argument('--count', type=int, default=200, help='Handshakes per case')
+    parser.add_argument('--cert', action='append', default=[], help='Extra certificate file')
+    parser.add_argument('--no-bundled', action='store_true', help='Skip the bundled cert')
+    parser.add_argument(
+        '--cipher-order',
+        choices=['auto', 'aesgcm', 'chacha20'],
+        default='auto',
+        help='TLS 1.2 cipher preference',
+    )
+
+    args = parser.parse_args()
+    socks.tls_cipher_order = args.cipher_order
+
+    print(f'AES-NI: {"sim" if socks.cpu_has_aes() else "não"} - {ssl.OPENSSL_VERSION}')
+    print('%-16s %-6s %14s %14s %12s' % ('CERT', 'TLS', 'SERVIDOR HS/S', 'TOTAL HS/S', 'US/HS'))
+
+    with tempfile.TemporaryDirectory() as directory:
+        certs = certificates(directory, not args.no_bundled)
+        certs += [(os.path.basename(cert), cert) for cert in args.cert]
+
+        for name, cert in certs:
+            for version in socks.TLS_VERSIONS:
+                result = measure(cert, version, args.count)
+                print(
+                    '%-16s %-6s %14.1f %14.1f %12.1f'
+                    % (name, version, result['server_hs'], result['total_hs'], result['server_us'])
+                )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+import os
+import socket
+import argparse
+import tempfile
+import subprocess
+
+try:
+    from scripts import CERT_PATH, INSTALL_CERT_PATH
+except ImportError:
+    CERT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cert.pem')
+    INSTALL_CERT_PATH = '/etc/GLManager/cert.pem'
+
+
+def key_options(key_type: str = 'ec', bits: int = 2048) -> list:
+    if key_type == 'ec':
+        return ['-newkey', 'ec', '-pkeyopt', 'ec_paramgen_curve:prime256v1']
+
+    if key_type == 'rsa':
+        return ['-newkey', f'rsa:{bits}']
+
+    raise ValueError(f'Tipo de chave inválido: {key_type}')
+
+
+def generate_certificate(
+    path: str,
+    key_type: str = 'ec',
+    bits: int = 2048,
+    days: int = 3650,
+    common_name: str = None,
+) -> str:
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        key, cert = os.path.join(tmp, 'key.pem'), os.path.join(tmp, 'cert.pem')
+        subprocess.run(
+            ['openssl', 'req', '-x509', '-nodes', '-sha256', '-days', str(days)]
+            + key_options(key_type, bits)
+            + ['-subj', f'/CN={common_name or socket.gethostname()}']
+            + ['-keyout', key, '-out', cert],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+
+        bundle = os.path.join(tmp, 'bundle.pem')
+        with open(bundle, 'w') as f:
+            for name in (key, cert):
+                with open(name) as part:
+                    f.write(part.read())
+
+        os.chmod(bundle, 0o600)
+        os.replace(bundle, path)
+
+    return path
+
+
+def ensure_certificate(path: str = INSTALL_CERT_PATH) -> str:
+    if os.path.exists(path):
+        return path
+
+    try:
+        return generate_certificate(path)
+    except (OSError, subprocess.CalledProcessError):
+        return CERT_PATH
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate the proxy TLS certificate')
+
+    parser.add_argument('--output', default=INSTALL_CERT_PATH, help='Certificate file')
+    parser.add_argument('--type', choices=['ec', 'rsa'], default='ec', help='Key type')
+    parser.add_argument('--bits', type=int, default=2048, help='RSA key size')
+    parser.add_argument('--days', type=int, default=3650, help='Validity in days')
+    parser.add_argument('--cn', default=None, help='Common name (default: hostname)')
+    parser.add_argument('--force', action='store_true', help='Overwrite an existing file')
+
+    args = parser.parse_args()
+
+    if os.path.exists(args.output) and not args.force:
+        print(f'Certificado {args.output} já existe (use --force)')
+        return
+
+    generate_certificate(args.output, args.type, args.bits, args.days, args.cn)
+    print(f'Certificado gerado em {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+import ssl
+import socket
+import logging
+import argparse
+import threading
+
+from typing import Tuple
+
+try:
+    from scripts.socks import MuxSession, Server
+except ImportError:
+    from socks import MuxSession, Server
+
+logger = logging.getLogger(__name__)
+
+
+def connect(
+    addr: Tuple[str, int],
+    tls: bool = False,
+    server_name: str = None,
+    timeout: float = 10,
+) -> socket.socket:
+    sock = socket.create_connection(addr, timeout)
+
+    if tls:
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        sock = context.wrap_socket(sock, server_hostname=server_name or addr[0])
+
+    sock.sendall(MuxSession.UPGRADE_REQUEST.format(host=server_name or addr[0]).encode())
+
+    response = b''
+    while b'\r\n\r\n' not in response:
+        data = sock.recv(4096)
+        if not data:
+            raise ConnectionError('Conexão encerrada durante o upgrade')
+        response += data
+
+    head, _, extra = response.partition(b'\r\n\r\n')
+    if not head.startswith(b'HTTP/1.1 101') or b'yamux' not in head.lower():
+        raise ConnectionError(f'Upgrade recusado: {head.splitlines()[0].decode()}')
+
+    if extra:
+        raise ConnectionError('Dados inesperados após o upgrade')
+
+    sock.settimeout(None)
+    return sock
+
+
+def open_session(
+    addr: Tuple[str, int],
+    tls: bool = False,
+    server_name: str = None,
+    keepalive: float = 30,
+) -> Tuple[MuxSession, threading.Thread]:
+    sock = connect(addr, tls, server_name)
+    session = MuxSession(Server(sock, addr), keepalive=keepalive)
+
+    thread = threading.Thread(target=session.serve, name='mux', daemon=True)
+    thread.start()
+    return session, thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Multiplexed tunnel client for socks.py --mux')
+
+    parser.add_argument('--host', required=True, help='Proxy host')
+    parser.add_argument('--port', type=int, default=443, help='Proxy port')
+    parser.add_argument('--tls', action='store_true', help='Connect with TLS')
+    parser.add_argument('--sni', default=None, help='TLS server name')
+    parser.add_argument('--listen', default='127.0.0.1:2222', help='Local listen address')
+    parser.add_argument('--keepalive', type=float, default=30, help='Keepalive (seconds)')
+    parser.add_argument('--log', default='INFO', help='Log level')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=getattr(logging, args.log.upper()),
+        format='[%(asctime)s] %(levelname)s: %(message)s',
+    )
+
+    session, thread = open_session((args.host, args.port), args.tls, args.sni, args.keepalive)
+
+    host, port = args.listen.rsplit(':', 1)
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, int(port)))
+    listener.listen(128)
+    listener.settimeout(1)
+
+    logger.info(f'Aguardando conexões em {host}:{port}')
+
+    try:
+        while thread.is_alive():
+            try:
+                conn, addr = listener.accept()
+            except socket.timeout:
+                continue
+
+            logger.info(f'Cliente - {addr[0]}:{addr[1]} -> novo stream')
+            session.open_stream(conn)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.close()
+        session.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+import socket
+import ssl
+import time
+import argparse
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from scripts.socks import HandshakeRecorder
+except ImportError:
+    from socks import HandshakeRecorder
+
+
+class ReplayResult:
+    def __init__(self) -> None:
+        self.latencies: List[float] = []
+        self.responses: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.__lock = threading.Lock()
+
+    def add(self, latency: Optional[float], response: Optional[str], error: Optional[str]) -> None:
+        with self.__lock:
+            if error is not None:
+                self.errors[error] = self.errors.get(error, 0) + 1
+                return
+
+            self.latencies.append(latency)
+            self.responses[response] = self.responses.get(response, 0) + 1
+
+    @staticmethod
+    def percentile(values: List[float], percent: float) -> float:
+        if not values:
+            return 0.0
+
+        index = min(int(len(values) * percent / 100), len(values) - 1)
+        return values[index]
+
+    def report(self, elapsed: float) -> str:
+        latencies = sorted(self.latencies)
+        total = len(latencies) + sum(self.errors.values())
+
+        lines = [
+            f'Requisições: {total} em {elapsed:.1f}s ({total / max(elapsed, 1e-6):.1f}/s)',
+            f'Sucesso: {len(latencies)} - Erros: {sum(self.errors.values())}',
+            'Latência (ms): p50 %.2f - p90 %.2f - p99 %.2f - max %.2f'
+            % (
+                self.percentile(latencies, 50) * 1000,
+                self.percentile(latencies, 90) * 1000,
+                self.percentile(latencies, 99) * 1000,
+                (latencies[-1] if latencies else 0) * 1000,
+            ),
+        ]
+
+        for response, count in sorted(self.responses.items(), key=lambda item: -item[1]):
+            lines.append(f'  {count:>8} {response}')
+
+        for error, count in sorted(self.errors.items(), key=lambda item: -item[1]):
+            lines.append(f'  {count:>8} ERRO {error}')
+
+        return '\n'.join(lines)
+
+
+def replay_one(
+    addr: Tuple[str, int],
+    payload: bytes,
+    timeout: float,
+    context: Optional[ssl.SSLContext],
+) -> Tuple[Optional[float], Optional[str], Optional[str]]:
+    start = time.perf_counter()
+
+    try:
+        with socket.create_connection(addr, timeout) as sock:
+            conn = context.wrap_socket(sock, server_hostname=addr[0]) if context else sock
+            conn.sendall(payload)
+
+            try:
+                data = conn.recv(4096)
+            except socket.timeout:
+                data = b'<timeout>'
+
+            latency = time.perf_counter() - start
+            first_line = data.split(b'\r\n', 1)[0][:64].decode('utf-8', 'replace')
+            return latency, first_line or '<eof>', None
+    except (OSError, ssl.SSLError) as e:
+        return None, None, type(e).__name__
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay handshake corpus against a proxy')
+
+    parser.add_argument('corpus', help='Corpus file recorded with socks.py --record')
+    parser.add_argument('--host', default='127.0.0.1', help='Proxy host')
+    parser.add_argument('--port', type=int, default=80, help='Proxy port')
+    parser.add_argument('--tls', action='store_true', help='Connect with TLS')
+    parser.add_argument('--rate', type=float, default=50, help='Connections per second')
+    parser.add_argument('--count', type=int, default=0, help='Total connections (0 = corpus)')
+    parser.add_argument('--concurrency', type=int, default=64, help='Max connections in flight')
+    parser.add_argument('--timeout', type=float, default=5, help='Response timeout')
+
+    args = parser.parse_args()
+
+    payloads = [data for _, _, data in HandshakeRecorder.iter_corpus(args.corpus) if data]
+    if not payloads:
+        print('Corpus vazio')
+        return
+
+    context = None
+    if args.tls:
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+
+    count = args.count or len(payloads)
+    interval = 1 / args.rate if args.rate > 0 else 0
+    result = ReplayResult()
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for index in range(count):
+            delay = start + index * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+            future = executor.submit(
+                replay_one,
+                (args.host, args.port),
+                payloads[index % len(payloads)],
+                args.timeout,
+                context,
+            )
+            future.add_done_callback(lambda f: result.add(*f.result()))
+
+    print(result.report(time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    main()
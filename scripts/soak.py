@@ -0,0 +1,302 @@
+import os
+import ssl
+import sys
+import time
+import socket
+import struct
+import random
+import argparse
+import threading
+import subprocess
+
+from typing import Callable, Dict, List, Tuple
+
+SCRIPTS_PATH = os.path.dirname(os.path.abspath(__file__))
+SOCKS_PATH = os.path.join(SCRIPTS_PATH, 'socks.py')
+CERT_PATH = os.path.join(SCRIPTS_PATH, 'cert.pem')
+
+METRICS = ('fds', 'threads', 'rss_kb')
+
+
+def parse_duration(value: str) -> float:
+    units = {'s': 1, 'm': 60, 'h': 3600}
+    if value and value[-1] in units:
+        return float(value[:-1]) * units[value[-1]]
+    return float(value)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def sample_process(pid: int) -> Dict[str, int]:
+    sample = {'fds': len(os.listdir(f'/proc/{pid}/fd'))}
+
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            name, _, value = line.partition(':')
+            if name == 'Threads':
+                sample['threads'] = int(value)
+            elif name == 'VmRSS':
+                sample['rss_kb'] = int(value.split()[0])
+
+    return sample
+
+
+def slope(points: List[Tuple[float, float]]) -> float:
+    if len(points) < 2:
+        return 0.0
+
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    numerator = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    denominator = sum((x - mean_x) ** 2 for x, _ in points)
+    return numerator / denominator if denominator else 0.0
+
+
+class EchoBackend(threading.Thread):
+    def __init__(self) -> None:
+        super().__init__(daemon=True)
+        self.sock = socket.socket()
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen(512)
+        self.port = self.sock.getsockname()[1]
+
+    @staticmethod
+    def handle(conn: socket.socket) -> None:
+        with conn:
+            try:
+                conn.sendall(b'SSH-2.0-soak\r\n')
+                while True:
+                    data = conn.recv(65536)
+                    if not data:
+                        return
+                    conn.sendall(data)
+            except OSError:
+                return
+
+    def run(self) -> None:
+        while True:
+            conn, _ = self.sock.accept()
+            threading.Thread(target=self.handle, args=(conn,), daemon=True).start()
+
+
+class Churn:
+    def __init__(self, port: int, closed_port: int, tls: bool, timeout: float = 5) -> None:
+        self.port = port
+        self.closed_port = closed_port
+        self.timeout = timeout
+
+        self.context = None
+        if tls:
+            self.context = ssl.create_default_context()
+            self.context.check_hostname = False
+            self.context.verify_mode = ssl.CERT_NONE
+
+        self.scenarios: List[Callable[[], None]] = [
+            self.tunnel,
+            self.tunnel,
+            self.payload_tunnel,
+            self.reset,
+            self.failed_upstream,
+            self.idle_close,
+        ]
+        if tls:
+            self.scenarios.append(self.tls_abort)
+
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.__lock = threading.Lock()
+
+    def connect(self) -> socket.socket:
+        sock = socket.create_connection(('127.0.0.1', self.port), self.timeout)
+        if self.context is not None:
+            sock = self.context.wrap_socket(sock)
+        return sock
+
+    def tunnel(self) -> None:
+        with self.connect() as sock:
+            sock.sendall(b'SSH-2.0-client\r\n')
+            sock.recv(4096)
+            sock.sendall(os.urandom(random.randint(1, 65536)))
+            sock.recv(65536)
+
+    def payload_tunnel(self) -> None:
+        with self.connect() as sock:
+            sock.sendall(b'GET / HTTP/1.1\r\nHost: soak\r\nUpgrade: websocket\r\n\r\n')
+            sock.recv(4096)
+            sock.sendall(b'SSH-2.0-client\r\n')
+            sock.recv(4096)
+
+    def reset(self) -> None:
+        sock = self.connect()
+        sock.sendall(b'SSH-2.0-client\r\n')
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+        sock.close()
+
+    def failed_upstream(self) -> None:
+        with self.connect() as sock:
+            sock.sendall(b'CONNECT 127.0.0.1:%d HTTP/1.1\r\n\r\n' % self.closed_port)
+            sock.recv(4096)
+
+    def idle_close(self) -> None:
+        self.connect().close()
+
+    def tls_abort(self) -> None:
+        with socket.create_connection(('127.0.0.1', self.port), self.timeout) as sock:
+            sock.sendall(b'\x16\x03\x01\x02\x00\x01\x00\x01\xfc\x03\x03')
+
+    def run_once(self) -> None:
+        scenario = random.choice(self.scenarios)
+        name = scenario.__name__
+
+        try:
+            scenario()
+        except (OSError, ssl.SSLError) as e:
+            with self.__lock:
+                key = f'{name}:{type(e).__name__}'
+                self.errors[key] = self.errors.get(key, 0) + 1
+
+        with self.__lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+
+def run_workers(churn: Churn, workers: int, stop: threading.Event) -> List[threading.Thread]:
+    def loop():
+        while not stop.is_set():
+            churn.run_once()
+
+    threads = [threading.Thread(target=loop, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Soak test for scripts/socks.py')
+
+    parser.add_argument('--duration', default='60s', help='Load duration (e.g. 90s, 30m, 3h)')
+    parser.add_argument('--workers', type=int, default=16, help='Concurrent client loops')
+    parser.add_argument('--https', action='store_true', help='Soak the HTTPS mode')
+    parser.add_argument('--sample-interval', type=float, default=2, help='Sampling interval')
+    parser.add_argument('--warmup', type=float, default=0.2, help='Warmup fraction ignored')
+    parser.add_argument('--settle', type=float, default=5, help='Idle seconds after load')
+    parser.add_argument('--fd-tolerance', type=int, default=2, help='Extra fds allowed idle')
+    parser.add_argument(
+        '--thread-tolerance', type=int, default=2, help='Extra threads allowed idle'
+    )
+    parser.add_argument(
+        '--rss-slope', type=float, default=1024, help='Max RSS growth in KB per hour'
+    )
+    parser.add_argument(
+        '--rss-growth', type=int, default=4096, help='Min RSS growth in KB to count as leak'
+    )
+    parser.add_argument('--proxy-arg', action='append', default=[], help='Extra proxy option')
+
+    args = parser.parse_args()
+    duration = parse_duration(args.duration)
+
+    backend = EchoBackend()
+    backend.start()
+
+    port, closed_port = free_port(), free_port()
+    command = [
+        sys.executable,
+        SOCKS_PATH,
+        '--host',
+        '127.0.0.1',
+        '--port',
+        str(port),
+        '--ssh-port',
+        str(backend.port),
+        '--log',
+        'CRITICAL',
+        '--https' if args.https else '--http',
+        '--stats-file',
+        os.devnull,
+    ] + [option for value in args.proxy_arg for option in value.split()]
+
+    if args.https:
+        command += ['--cert', CERT_PATH]
+
+    proxy = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    try:
+        for _ in range(50):
+            try:
+                socket.create_connection(('127.0.0.1', port), 1).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+
+        time.sleep(0.5)
+        baseline = sample_process(proxy.pid)
+
+        churn = Churn(port, closed_port, args.https)
+        stop = threading.Event()
+        workers = run_workers(churn, args.workers, stop)
+
+        samples: List[Tuple[float, Dict[str, int]]] = []
+        start = time.monotonic()
+
+        while time.monotonic() - start < duration:
+            time.sleep(args.sample_interval)
+            if proxy.poll() is not None:
+                print(f'FALHA: proxy finalizado com código {proxy.returncode}')
+                sys.exit(1)
+
+            sample = sample_process(proxy.pid)
+            samples.append((time.monotonic() - start, sample))
+            print(
+                '%8.1fs fds=%-6d threads=%-6d rss=%dKB'
+                % (samples[-1][0], sample['fds'], sample['threads'], sample['rss_kb'])
+            )
+
+        stop.set()
+        for worker in workers:
+            worker.join(10)
+
+        time.sleep(args.settle)
+        final = sample_process(proxy.pid)
+    finally:
+        proxy.terminate()
+        proxy.wait()
+
+    steady = [item for item in samples if item[0] >= duration * args.warmup]
+    trends = {
+        metric: slope([(elapsed / 3600, sample[metric]) for elapsed, sample in steady])
+        for metric in METRICS
+    }
+
+    print()
+    print('Cenários: ' + ', '.join(f'{k}={v}' for k, v in sorted(churn.counts.items())))
+    if churn.errors:
+        print('Erros: ' + ', '.join(f'{k}={v}' for k, v in sorted(churn.errors.items())))
+
+    print('Tendência/hora: ' + ', '.join(f'{k}={v:+.1f}' for k, v in trends.items()))
+    print(f'Inicial: {baseline}')
+    print(f'Final (ocioso): {final}')
+
+    failures = []
+    if final['fds'] > baseline['fds'] + args.fd_tolerance:
+        failures.append(f'fds {baseline["fds"]} -> {final["fds"]}')
+
+    if final['threads'] > baseline['threads'] + args.thread_tolerance:
+        failures.append(f'threads {baseline["threads"]} -> {final["threads"]}')
+
+    growth = steady[-1][1]['rss_kb'] - steady[0][1]['rss_kb'] if steady else 0
+    if trends['rss_kb'] > args.rss_slope and growth > args.rss_growth:
+        failures.append(f'rss cresce {trends["rss_kb"]:.0f}KB/hora (+{growth}KB)')
+
+    if failures:
+        print('FALHA: ' + '; '.join(failures))
+        sys.exit(1)
+
+    print('OK')
+
+
+if __name__ == '__main__':
+    main()
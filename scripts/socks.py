@@ -3,22 +3,57 @@ import ssl
 import select
 import threading
 import os
+import errno
+import time
 import argparse
 import logging
 import resource
-
+import base64
+import binascii
+import hmac
+import sqlite3
+import struct
+import tempfile
+import hashlib
+import random
+import re
+import signal
+import sys
+import bisect
+
+from datetime import datetime
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from urllib.parse import urlparse
-from typing import List, Tuple, Union, Optional
+from collections import Counter, deque
+from typing import Callable, Dict, Iterator, List, Tuple, Union, Optional
 from enum import Enum
 
+try:
+    from scripts.socks_stats import STATS_PATH, SharedStats
+except ImportError:
+    from socks_stats import STATS_PATH, SharedStats
+
 __author__ = 'Glemison C. Dutra'
 __version__ = '1.0.2'
 
-resource.setrlimit(resource.RLIMIT_NOFILE, (65536, 65536))
+try:
+    resource.setrlimit(resource.RLIMIT_NOFILE, (65536, 65536))
+except ValueError:
+    _, hard_limit = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard_limit, hard_limit))
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_RESPONSE = b'HTTP/1.1 101 Connection Established\r\n\r\n'
+AUTH_REQUIRED_RESPONSE = (
+    b'HTTP/1.1 407 Proxy Authentication Required\r\n'
+    b'Proxy-Authenticate: Basic realm="proxy"\r\n'
+    b'Content-Length: 0\r\n\r\n'
+)
+FORBIDDEN_RESPONSE = b'HTTP/1.1 403 Forbidden\r\nContent-Length: 0\r\n\r\n'
+DATABASE_PATH = '/etc/GLManager/db.sqlite3'
+MAX_TUNNEL_BUFFER = 1024 * 1024
+HALF_CLOSE_TIMEOUT = 30
 REMOTES_ADDRESS = {
     'ssh': ('0.0.0.0', 22),
     'openvpn': ('0.0.0.0.0', 1194),
@@ -26,44 +61,1096 @@ REMOTES_ADDRESS = {
 }
 
 
-class Counter:
-    def __init__(self):
-        self.__count = 0
+stats = SharedStats()
 
-    def increment(self):
-        self.__count += 1
 
-    def decrement(self):
-        self.__count -= 1
+class BufferGovernor:
+    def __init__(self, budget: int = 0, low_ratio: float = 0.9) -> None:
+        self.__budget = budget
+        self.__low_ratio = low_ratio
+
+        self.__usage: Dict[object, int] = {}
+        self.__total = 0
+        self.__throttled = set()
+        self.__threshold = 0
+        self.__throttling = False
+        self.__events = 0
+        self.__lock = threading.Lock()
 
     @property
-    def count(self):
-        return self.__count
+    def budget(self) -> int:
+        return self.__budget
 
+    @budget.setter
+    def budget(self, value: int) -> None:
+        self.__budget = value
 
-class ConnectionCounter:
-    __counter = Counter()
-    __lock = threading.Lock()
+    @property
+    def total(self) -> int:
+        return self.__total
+
+    @property
+    def events(self) -> int:
+        return self.__events
+
+    @property
+    def throttling(self) -> bool:
+        return self.__throttling
+
+    def _start_throttling(self) -> None:
+        low_watermark = self.__budget * self.__low_ratio
+        excess = self.__total
+
+        for tunnel, usage in sorted(self.__usage.items(), key=lambda item: -item[1]):
+            if excess <= low_watermark or usage <= 0:
+                break
+
+            self.__throttled.add(tunnel)
+            self.__threshold = usage
+            excess -= usage
+
+        self.__throttling = True
+        self.__events += 1
+        stats.add(SharedStats.THROTTLES)
+
+        logger.warning(
+            f'Memória de buffers em {self.__total} Bytes, '
+            f'limitando {len(self.__throttled)} túneis'
+        )
+
+    def _stop_throttling(self) -> None:
+        self.__throttled.clear()
+        self.__throttling = False
+        logger.info(f'Memória de buffers normalizada em {self.__total} Bytes')
 
+    def update(self, tunnel: object, delta: int) -> None:
+        if delta == 0:
+            return
+
+        with self.__lock:
+            usage = self.__usage.get(tunnel, 0) + delta
+            if usage > 0:
+                self.__usage[tunnel] = usage
+            else:
+                self.__usage.pop(tunnel, None)
+                self.__throttled.discard(tunnel)
+
+            self.__total += delta
+            stats.add(SharedStats.BUFFERED, delta)
+
+            if not self.__budget:
+                return
+
+            if self.__throttling:
+                if self.__total <= self.__budget * self.__low_ratio:
+                    self._stop_throttling()
+                elif delta > 0 and usage >= self.__threshold:
+                    self.__throttled.add(tunnel)
+            elif self.__total > self.__budget:
+                self._start_throttling()
+
+    def throttled(self, tunnel: object) -> bool:
+        return tunnel in self.__throttled
+
+
+governor = BufferGovernor()
+
+
+class ConnectionCounter:
     @classmethod
     def increment(cls):
-        with cls.__lock:
-            cls.__counter.increment()
+        stats.add(SharedStats.ACTIVE)
+        stats.add(SharedStats.TOTAL)
 
     @classmethod
     def decrement(cls):
-        with cls.__lock:
-            cls.__counter.decrement()
+        stats.add(SharedStats.ACTIVE, -1)
 
     @classmethod
     def count(cls):
-        with cls.__lock:
-            return cls.__counter.count
+        return stats.value(SharedStats.ACTIVE)
 
 
 connection_counter = ConnectionCounter()
 
 
+Address = Tuple[int, tuple]
+
+
+class Resolver:
+    def __init__(
+        self,
+        ttl: float = 300,
+        negative_ttl: float = 30,
+        timeout: float = 5,
+    ) -> None:
+        self.__ttl = ttl
+        self.__negative_ttl = negative_ttl
+        self.__timeout = timeout
+
+        self.__cache: Dict[Tuple[str, int], Tuple[float, Optional[List[Address]]]] = {}
+        self.__pending: Dict[Tuple[str, int], Future] = {}
+        self.__lock = threading.Lock()
+
+    @property
+    def ttl(self) -> float:
+        return self.__ttl
+
+    @ttl.setter
+    def ttl(self, value: float) -> None:
+        self.__ttl = value
+
+    @property
+    def negative_ttl(self) -> float:
+        return self.__negative_ttl
+
+    @negative_ttl.setter
+    def negative_ttl(self, value: float) -> None:
+        self.__negative_ttl = value
+
+    @staticmethod
+    def literal(host: str, port: int) -> Optional[List[Address]]:
+        for family in (socket.AF_INET, socket.AF_INET6):
+            try:
+                socket.inet_pton(family, host)
+            except (OSError, ValueError):
+                continue
+
+            if family == socket.AF_INET6:
+                return [(family, (host, port, 0, 0))]
+            return [(family, (host, port))]
+
+        return None
+
+    @staticmethod
+    def interleave(addresses: List[Address]) -> List[Address]:
+        ipv6 = [address for address in addresses if address[0] == socket.AF_INET6]
+        ipv4 = [address for address in addresses if address[0] != socket.AF_INET6]
+
+        first, second = ipv4, ipv6
+        if addresses and addresses[0][0] == socket.AF_INET6:
+            first, second = ipv6, ipv4
+
+        result = []
+
+        for index in range(max(len(first), len(second))):
+            result.extend(family[index] for family in (first, second) if index < len(family))
+
+        return result
+
+    def _lookup(self, key: Tuple[str, int]) -> List[Address]:
+        host, port = key
+        try:
+            infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except socket.gaierror:
+            with self.__lock:
+                self.__cache[key] = (time.monotonic() + self.__negative_ttl, None)
+            raise
+
+        addresses = []
+        for family, _, _, _, sockaddr in infos:
+            if (family, sockaddr) not in addresses:
+                addresses.append((family, sockaddr))
+
+        addresses = self.interleave(addresses)
+
+        with self.__lock:
+            self.__cache[key] = (time.monotonic() + self.__ttl, addresses)
+
+        return addresses
+
+    def resolve(self, host: str, port: int) -> List[Address]:
+        addresses = self.literal(host, port)
+        if addresses is not None:
+            return addresses
+
+        key = (host.lower(), port)
+
+        with self.__lock:
+            entry = self.__cache.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                if entry[1] is None:
+                    raise socket.gaierror(socket.EAI_NONAME, f'{host} não encontrado (cache)')
+                return entry[1]
+
+            future = self.__pending.get(key)
+            leader = future is None
+            if leader:
+                future = self.__pending[key] = Future()
+
+        if not leader:
+            try:
+                return future.result(self.__timeout)
+            except FutureTimeoutError:
+                raise socket.timeout(f'Tempo esgotado resolvendo {host}')
+
+        try:
+            addresses = self._lookup(key)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(addresses)
+            return addresses
+        finally:
+            with self.__lock:
+                self.__pending.pop(key, None)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__cache.clear()
+
+
+resolver = Resolver()
+
+
+def connect_happy_eyeballs(
+    addresses: List[Address],
+    timeout: float = 5,
+    delay: float = 0.25,
+) -> socket.socket:
+    remaining = list(addresses)
+    pending: Dict[socket.socket, tuple] = {}
+    deadline = time.monotonic() + timeout
+    next_attempt = 0.0
+    error: Optional[OSError] = None
+    winner = None
+
+    try:
+        while winner is None and (remaining or pending):
+            now = time.monotonic()
+            if now >= deadline:
+                break
+
+            if remaining and (not pending or now >= next_attempt):
+                family, sockaddr = remaining.pop(0)
+                sock = socket.socket(family, socket.SOCK_STREAM)
+                sock.setblocking(False)
+
+                code = sock.connect_ex(sockaddr)
+                if code == 0:
+                    winner = sock
+                elif code in (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN):
+                    pending[sock] = sockaddr
+                    next_attempt = now + delay
+                else:
+                    sock.close()
+                    error = OSError(code, os.strerror(code))
+                continue
+
+            wait = deadline - now
+            if remaining:
+                wait = min(wait, next_attempt - now)
+
+            _, writable, _ = select.select([], list(pending), [], max(wait, 0))
+
+            for sock in writable:
+                del pending[sock]
+                code = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+
+                if code == 0 and winner is None:
+                    winner = sock
+                    continue
+
+                sock.close()
+                if code != 0:
+                    error = OSError(code, os.strerror(code))
+                    next_attempt = 0.0
+    finally:
+        for sock in pending:
+            sock.close()
+
+    if winner is None:
+        raise error or socket.timeout('Tempo esgotado ao conectar')
+
+    winner.setblocking(True)
+    return winner
+
+
+class CredentialCache:
+    def __init__(self, path: str = DATABASE_PATH, refresh_interval: float = 5) -> None:
+        self.__path = path
+        self.__refresh_interval = refresh_interval
+
+        self.__users: Dict[str, Tuple[str, Optional[datetime], int]] = {}
+        self.__usernames: Dict[int, str] = {}
+        self.__watermark = ''
+        self.__data_version = None
+        self.__checked_at = 0.0
+
+        self.__db: Optional[sqlite3.Connection] = None
+        self.__lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    @staticmethod
+    def _parse_date(value: Optional[str]) -> Optional[datetime]:
+        if not value:
+            return None
+
+        try:
+            return datetime.fromisoformat(str(value))
+        except ValueError:
+            return None
+
+    def _load(self) -> None:
+        if self.__db is None:
+            self.__db = sqlite3.connect(self.__path, check_same_thread=False)
+
+        (data_version,) = self.__db.execute('PRAGMA data_version').fetchone()
+        if data_version == self.__data_version:
+            return
+
+        self.__data_version = data_version
+
+        rows = self.__db.execute(
+            'SELECT id, username, password, expiration_date, connection_limit, updated_at '
+            'FROM users WHERE updated_at IS NULL OR updated_at >= ?',
+            (self.__watermark,),
+        ).fetchall()
+
+        for id, username, password, expiration_date, limit, updated_at in rows:
+            previous = self.__usernames.get(id)
+            if previous is not None and previous != username:
+                self.__users.pop(previous, None)
+
+            self.__usernames[id] = username
+            self.__users[username] = (password, self._parse_date(expiration_date), limit)
+
+            if updated_at and str(updated_at) > self.__watermark:
+                self.__watermark = str(updated_at)
+
+        ids = {id for (id,) in self.__db.execute('SELECT id FROM users')}
+        for id in set(self.__usernames) - ids:
+            self.__users.pop(self.__usernames.pop(id), None)
+
+        if rows:
+            logger.debug(f'Credenciais atualizadas: {len(rows)} alterados')
+
+    def refresh(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self.__checked_at < self.__refresh_interval:
+            return
+
+        with self.__lock:
+            self.__checked_at = now
+            try:
+                self._load()
+            except sqlite3.Error as e:
+                logger.error(f'Erro ao carregar credenciais: {e}')
+
+    def get(self, username: str) -> Optional[Tuple[str, Optional[datetime], int]]:
+        self.refresh()
+        return self.__users.get(username)
+
+    def __len__(self) -> int:
+        return len(self.__users)
+
+
+class UserConnectionLimiter:
+    def __init__(self) -> None:
+        self.__counts: Dict[str, int] = {}
+        self.__lock = threading.Lock()
+
+    def acquire(self, username: str, limit: int) -> bool:
+        with self.__lock:
+            count = self.__counts.get(username, 0)
+            if limit and count >= limit:
+                return False
+
+            self.__counts[username] = count + 1
+            return True
+
+    def release(self, username: str) -> None:
+        with self.__lock:
+            count = self.__counts.get(username, 0) - 1
+            if count > 0:
+                self.__counts[username] = count
+            else:
+                self.__counts.pop(username, None)
+
+    def count(self, username: str) -> int:
+        with self.__lock:
+            return self.__counts.get(username, 0)
+
+
+class Authenticator:
+    def __init__(self, credentials: CredentialCache) -> None:
+        self.credentials = credentials
+        self.limiter = UserConnectionLimiter()
+
+    @staticmethod
+    def decode(header: Optional[str]) -> Optional[Tuple[str, str]]:
+        if not header:
+            return None
+
+        scheme, _, value = header.strip().partition(' ')
+        if scheme.lower() != 'basic':
+            return None
+
+        try:
+            username, sep, password = base64.b64decode(value.strip()).decode().partition(':')
+        except (binascii.Error, UnicodeDecodeError):
+            return None
+
+        return (username, password) if sep else None
+
+    def authenticate(self, header: Optional[str]) -> Tuple[Optional[str], Optional[bytes]]:
+        decoded = self.decode(header)
+        if decoded is None:
+            return None, AUTH_REQUIRED_RESPONSE
+
+        username, password = decoded
+        user = self.credentials.get(username)
+
+        if user is None or not hmac.compare_digest(user[0].encode(), password.encode()):
+            return None, AUTH_REQUIRED_RESPONSE
+
+        _, expiration_date, limit = user
+        if expiration_date is not None and expiration_date < datetime.now():
+            return None, FORBIDDEN_RESPONSE
+
+        if not self.limiter.acquire(username, limit):
+            return None, FORBIDDEN_RESPONSE
+
+        return username, None
+
+    def release(self, username: str) -> None:
+        self.limiter.release(username)
+
+
+authenticator: Optional[Authenticator] = None
+
+
+class HandshakeRecorder:
+    MAGIC = b'GLHR'
+    VERSION = 1
+    HEADER = struct.Struct('<4sH')
+    RECORD = struct.Struct('<dQH')
+
+    IPV4_PATTERN = re.compile(rb'(?<![\d.])(?:\d{1,3}\.){3}\d{1,3}(?![\d.])')
+    AUTH_PATTERN = re.compile(rb'(?im)^((?:proxy-)?authorization):[^\r\n]*')
+
+    def __init__(
+        self,
+        path: str,
+        sample_rate: float = 0.01,
+        max_bytes: int = 1024,
+        max_size: int = 64 * 1024 * 1024,
+    ) -> None:
+        self.__path = path
+        self.__sample_rate = sample_rate
+        self.__max_bytes = min(max_bytes, 0xFFFF)
+        self.__max_size = max_size
+
+        self.__salt = os.urandom(16)
+        self.__file = None
+        self.__size = 0
+        self.__lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    def anonymize(self, ip: str) -> int:
+        digest = hashlib.blake2b(ip.encode(), key=self.__salt, digest_size=8).digest()
+        return int.from_bytes(digest, 'little')
+
+    def scrub(self, data: bytes) -> bytes:
+        data = self.AUTH_PATTERN.sub(rb'\1: redacted', data)
+        return self.IPV4_PATTERN.sub(b'192.0.2.1', data)
+
+    def sample(self) -> bool:
+        return self.__sample_rate > 0 and random.random() < self.__sample_rate
+
+    def _open(self) -> None:
+        self.__file = open(self.__path, 'ab')
+        self.__size = self.__file.tell()
+
+        if self.__size == 0:
+            self.__size += self.__file.write(self.HEADER.pack(self.MAGIC, self.VERSION))
+
+    def record(self, ip: str, data: bytes) -> bool:
+        data = self.scrub(data)[: self.__max_bytes]
+
+        with self.__lock:
+            if self.__file is None:
+                self._open()
+
+            if self.__size + self.RECORD.size + len(data) > self.__max_size:
+                return False
+
+            record = self.RECORD.pack(time.time(), self.anonymize(ip), len(data)) + data
+            self.__size += self.__file.write(record)
+            self.__file.flush()
+
+        return True
+
+    def close(self) -> None:
+        with self.__lock:
+            if self.__file is not None:
+                self.__file.close()
+                self.__file = None
+
+    @classmethod
+    def iter_corpus(cls, path: str) -> Iterator[Tuple[float, int, bytes]]:
+        with open(path, 'rb') as f:
+            magic, version = cls.HEADER.unpack(f.read(cls.HEADER.size))
+            if magic != cls.MAGIC or version != cls.VERSION:
+                raise ValueError(f'Arquivo {path} não é um corpus válido')
+
+            while True:
+                header = f.read(cls.RECORD.size)
+                if len(header) < cls.RECORD.size:
+                    return
+
+                timestamp, client, size = cls.RECORD.unpack(header)
+                data = f.read(size)
+                if len(data) < size:
+                    return
+
+                yield timestamp, client, data
+
+
+recorder: Optional[HandshakeRecorder] = None
+preconnect: Optional[str] = None
+mux_enabled = False
+mux_max_streams = 256
+mux_keepalive = 30.0
+
+
+class AccessLog:
+    MAGIC = b'GLAL'
+    VERSION = 1
+    HEADER = struct.Struct('<4sH')
+    RECORD = struct.Struct('<dI16sH16sHQQBB')
+
+    ROUTES = ('none', 'ssh', 'openvpn', 'v2ray', 'connect', 'http', 'sni', 'mux')
+    REASONS = ('client', 'server', 'rejected', 'no_route', 'upstream', 'error', 'reset', 'linger')
+
+    IPV4_MAPPED = b'\x00' * 10 + b'\xff\xff'
+
+    def __init__(
+        self,
+        path: str,
+        max_size: int = 64 * 1024 * 1024,
+        backups: int = 5,
+        batch_size: int = 256,
+        flush_interval: float = 1,
+    ) -> None:
+        self.__path = path
+        self.__max_size = max_size
+        self.__backups = backups
+        self.__batch_size = batch_size
+
+        self.__pending: List[bytes] = []
+        self.__file = None
+        self.__size = 0
+        self.__lock = threading.Lock()
+        self.__write_lock = threading.Lock()
+
+        self.__stop = threading.Event()
+        self.__thread = threading.Thread(
+            target=self._flush_loop, args=(flush_interval,), name='access-log', daemon=True
+        )
+        self.__thread.start()
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    @classmethod
+    def encode_address(cls, host: Optional[str]) -> bytes:
+        try:
+            if host and ':' in host:
+                return socket.inet_pton(socket.AF_INET6, host.split('%', 1)[0])
+            if host:
+                return cls.IPV4_MAPPED + socket.inet_aton(host)
+        except OSError:
+            pass
+
+        return bytes(16)
+
+    @classmethod
+    def decode_address(cls, raw: bytes) -> str:
+        if raw[:12] == cls.IPV4_MAPPED:
+            return socket.inet_ntoa(raw[12:])
+        return socket.inet_ntop(socket.AF_INET6, raw)
+
+    def log(
+        self,
+        started_at: float,
+        client: Tuple[str, int],
+        target: Optional[Tuple[str, int]],
+        bytes_in: int,
+        bytes_out: int,
+        route: str,
+        reason: str,
+    ) -> None:
+        target_host, target_port = target[:2] if target else (None, 0)
+        record = self.RECORD.pack(
+            started_at,
+            min(int((time.time() - started_at) * 1000), 0xFFFFFFFF),
+            self.encode_address(client[0]),
+            client[1],
+            self.encode_address(target_host),
+            target_port,
+            bytes_in,
+            bytes_out,
+            self.ROUTES.index(route),
+            self.REASONS.index(reason),
+        )
+
+        with self.__lock:
+            self.__pending.append(record)
+            full = len(self.__pending) >= self.__batch_size
+
+        if full:
+            self.flush()
+
+    def _open(self) -> None:
+        self.__file = open(self.__path, 'ab', buffering=0)
+        self.__size = self.__file.tell()
+
+        if self.__size == 0:
+            self.__size += self.__file.write(self.HEADER.pack(self.MAGIC, self.VERSION))
+
+    def _rotate(self) -> None:
+        self.__file.close()
+        self.__file = None
+
+        for index in range(self.__backups - 1, 0, -1):
+            source = f'{self.__path}.{index}'
+            if os.path.exists(source):
+                os.replace(source, f'{self.__path}.{index + 1}')
+
+        if self.__backups > 0:
+            os.replace(self.__path, f'{self.__path}.1')
+        else:
+            os.unlink(self.__path)
+
+        self._open()
+
+    def flush(self) -> None:
+        with self.__lock:
+            pending, self.__pending = self.__pending, []
+
+        if not pending:
+            return
+
+        data = b''.join(pending)
+
+        with self.__write_lock:
+            try:
+                if self.__file is None:
+                    self._open()
+
+                if self.__size + len(data) > self.__max_size and self.__size > self.HEADER.size:
+                    self._rotate()
+
+                self.__size += self.__file.write(data)
+            except OSError as e:
+                logger.error(f'Erro ao gravar log de acesso {self.__path}: {e}')
+
+    def _flush_loop(self, interval: float) -> None:
+        while not self.__stop.wait(interval):
+            self.flush()
+
+    def close(self) -> None:
+        self.__stop.set()
+        self.flush()
+
+        with self.__write_lock:
+            if self.__file is not None:
+                self.__file.close()
+                self.__file = None
+
+    @classmethod
+    def files(cls, path: str) -> List[str]:
+        rotated = []
+        for name in os.listdir(os.path.dirname(path) or '.'):
+            prefix = os.path.basename(path) + '.'
+            if name.startswith(prefix) and name[len(prefix) :].isdigit():
+                rotated.append(
+                    (int(name[len(prefix) :]), os.path.join(os.path.dirname(path), name))
+                )
+
+        files = [name for _, name in sorted(rotated, reverse=True)]
+        if os.path.exists(path):
+            files.append(path)
+        return files
+
+    @classmethod
+    def iter_records(cls, path: str, chunk_records: int = 4096) -> Iterator[tuple]:
+        with open(path, 'rb') as f:
+            header = f.read(cls.HEADER.size)
+            if len(header) < cls.HEADER.size:
+                return
+
+            magic, version = cls.HEADER.unpack(header)
+            if magic != cls.MAGIC or version != cls.VERSION:
+                raise ValueError(f'Arquivo {path} não é um log de acesso válido')
+
+            size = cls.RECORD.size
+            while True:
+                chunk = f.read(size * chunk_records)
+                for values in cls.RECORD.iter_unpack(chunk[: len(chunk) - len(chunk) % size]):
+                    started_at, duration, client, client_port, target, target_port = values[:6]
+                    bytes_in, bytes_out, route, reason = values[6:]
+                    yield (
+                        started_at,
+                        duration / 1000,
+                        cls.decode_address(client),
+                        client_port,
+                        cls.decode_address(target),
+                        target_port,
+                        bytes_in,
+                        bytes_out,
+                        cls.ROUTES[route],
+                        cls.REASONS[reason],
+                    )
+
+                if len(chunk) < size * chunk_records:
+                    return
+
+
+access_log: Optional[AccessLog] = None
+
+
+class SamplingProfiler:
+    def __init__(self, rate: float = 100, duration: float = 30, output: str = None) -> None:
+        self.rate = rate
+        self.duration = duration
+        self.output = output or os.path.join(tempfile.gettempdir(), f'socks-{os.getpid()}.folded')
+
+        self.__thread: Optional[threading.Thread] = None
+        self.__stop = threading.Event()
+        self.__toggle = threading.Event()
+        self.__lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self.__thread is not None and self.__thread.is_alive()
+
+    @staticmethod
+    def _label(frame) -> str:
+        code = frame.f_code
+        return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+    def _sample(self, samples: Counter) -> None:
+        names = {thread.ident: type(thread).__name__ for thread in threading.enumerate()}
+        current = threading.get_ident()
+
+        for ident, frame in sys._current_frames().items():
+            if ident == current:
+                continue
+
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame))
+                frame = frame.f_back
+
+            stack.append(names.get(ident, 'Thread'))
+            samples[';'.join(reversed(stack))] += 1
+
+    def _run(self, duration: float) -> None:
+        samples = Counter()
+        interval = 1 / self.rate
+        deadline = time.monotonic() + duration
+        count = 0
+
+        while not self.__stop.wait(interval) and time.monotonic() < deadline:
+            self._sample(samples)
+            count += 1
+
+        with open(self.output, 'w') as f:
+            for stack, value in samples.most_common():
+                f.write(f'{stack} {value}\n')
+
+        logger.info(f'Profiler finalizado: {count} amostras em {self.output}')
+
+    def start(self, duration: float = None) -> bool:
+        with self.__lock:
+            if self.running:
+                return False
+
+            self.__stop.clear()
+            self.__thread = threading.Thread(
+                target=self._run, args=(duration or self.duration,), name='profiler'
+            )
+            self.__thread.daemon = True
+            self.__thread.start()
+
+        logger.info(f'Profiler iniciado: {self.rate} Hz por {duration or self.duration}s')
+        return True
+
+    def stop(self) -> bool:
+        if not self.running:
+            return False
+
+        self.__stop.set()
+        self.__thread.join()
+        return True
+
+    def toggle(self) -> None:
+        if not self.stop():
+            self.start()
+
+    def request_toggle(self) -> None:
+        self.__toggle.set()
+
+    def _watch(self) -> None:
+        while True:
+            self.__toggle.wait()
+            self.__toggle.clear()
+            self.toggle()
+
+    def watch(self) -> None:
+        threading.Thread(target=self._watch, name='profiler-toggle', daemon=True).start()
+
+
+profiler = SamplingProfiler()
+
+
+class AdminServer(threading.Thread):
+    def __init__(self, path: str) -> None:
+        super().__init__(name='admin')
+        self.daemon = True
+
+        self.__path = path
+        self.__commands: Dict[str, Callable[[List[str]], str]] = {}
+        self.__sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        self.register('help', lambda args: ' '.join(sorted(self.__commands)))
+
+    def register(self, name: str, handler: Callable[[List[str]], str]) -> None:
+        self.__commands[name] = handler
+
+    def execute(self, line: str) -> str:
+        name, *args = line.split() or ['help']
+        handler = self.__commands.get(name)
+        if handler is None:
+            return f'Comando desconhecido: {name}'
+
+        try:
+            return handler(args)
+        except Exception as e:
+            return f'Erro: {e}'
+
+    def handle(self, conn: socket.socket) -> None:
+        with conn:
+            conn.settimeout(5)
+            data = b''
+            while b'\n' not in data:
+                chunk = conn.recv(4096)
+                if not chunk:
+                    break
+                data += chunk
+
+            response = self.execute(data.decode('utf-8', 'replace').strip())
+            conn.sendall(response.encode() + b'\n')
+
+    def run(self) -> None:
+        if os.path.exists(self.__path):
+            os.unlink(self.__path)
+
+        self.__sock.bind(self.__path)
+        os.chmod(self.__path, 0o600)
+        self.__sock.listen(5)
+
+        while True:
+            conn, _ = self.__sock.accept()
+            try:
+                self.handle(conn)
+            except OSError as e:
+                logger.debug(f'Admin erro: {e}')
+
+
+def admin_profile(args: List[str]) -> str:
+    action = args[0] if args else 'status'
+
+    if action == 'start':
+        duration = float(args[1]) if len(args) > 1 else None
+        return 'iniciado' if profiler.start(duration) else 'já em execução'
+
+    if action == 'stop':
+        return f'salvo em {profiler.output}' if profiler.stop() else 'não está em execução'
+
+    return 'em execução' if profiler.running else 'parado'
+
+
+def admin_speculation(args: List[str]) -> str:
+    hits = stats.value(SharedStats.SPEC_HITS)
+    misses = stats.value(SharedStats.SPEC_MISSES)
+    rate = hits / (hits + misses) * 100 if hits + misses else 0.0
+    target = preconnect or 'desligado'
+    return f'destino={target} acertos={hits} erros={misses} taxa={rate:.1f}%'
+
+
+def admin_stats(args: List[str]) -> str:
+    return ' '.join(
+        f'{field}={stats.value(index)}' for index, field in enumerate(SharedStats.FIELDS)
+    )
+
+
+class Histogram:
+    def __init__(self, bounds: List[float]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+
+    def reset(self) -> None:
+        self.counts = [0] * (len(self.bounds) + 1)
+
+    def format(self, unit: str = '') -> str:
+        labels = [f'<={bound}{unit}' for bound in self.bounds] + [f'>{self.bounds[-1]}{unit}']
+        return ' '.join(f'{label}:{count}' for label, count in zip(labels, self.counts))
+
+
+class TcpInfoSampler(threading.Thread):
+    TCP_INFO = struct.Struct('=8B24I4Q6IQ')
+    RING_SIZE = 16
+
+    RTT_INDEX = 8 + 15
+    RTTVAR_INDEX = 8 + 16
+    CWND_INDEX = 8 + 18
+    TOTAL_RETRANS_INDEX = 8 + 23
+    DELIVERY_RATE_INDEX = -1
+
+    def __init__(self, interval: float = 10) -> None:
+        super().__init__(name='tcpinfo')
+        self.daemon = True
+
+        self.interval = interval
+        self.rtt = Histogram([1, 5, 10, 25, 50, 100, 200, 500, 1000])
+        self.retransmits = Histogram([0, 1, 2, 5, 10, 50, 100])
+        self.cwnd = Histogram([4, 10, 20, 50, 100, 200, 500])
+        self.delivery_rate = Histogram([0.1, 1, 5, 10, 50, 100, 500])
+
+        self.__lock = threading.Lock()
+
+    @classmethod
+    def read(cls, sock: socket.socket) -> Optional[Tuple[float, int, int, int, int, int]]:
+        try:
+            data = sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_INFO, cls.TCP_INFO.size)
+        except (OSError, AttributeError):
+            return None
+
+        values = cls.TCP_INFO.unpack(data.ljust(cls.TCP_INFO.size, b'\0'))
+        return (
+            time.time(),
+            values[cls.RTT_INDEX],
+            values[cls.RTTVAR_INDEX],
+            values[cls.TOTAL_RETRANS_INDEX],
+            values[cls.CWND_INDEX],
+            values[cls.DELIVERY_RATE_INDEX],
+        )
+
+    def sample(self, tunnel: 'Proxy') -> None:
+        legs = [('client', tunnel.client)]
+        if tunnel.server and not tunnel.server.closed:
+            legs.append(('server', tunnel.server))
+
+        for name, connection in legs:
+            if connection.closed:
+                continue
+
+            try:
+                info = self.read(connection.conn)
+            except (ConnectionError, TypeError):
+                continue
+
+            if info is None:
+                continue
+
+            ring = tunnel.tcp_info.setdefault(name, deque(maxlen=self.RING_SIZE))
+            ring.append(info)
+
+            _, rtt, _, retransmits, cwnd, delivery_rate = info
+            with self.__lock:
+                self.rtt.observe(rtt / 1000)
+                self.retransmits.observe(retransmits)
+                self.cwnd.observe(cwnd)
+                self.delivery_rate.observe(delivery_rate * 8 / 1000 / 1000)
+
+    def run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+
+            with tunnels_lock:
+                active = list(tunnels)
+
+            for tunnel in active:
+                self.sample(tunnel)
+
+    def histograms(self) -> str:
+        with self.__lock:
+            return '\n'.join(
+                [
+                    'rtt ' + self.rtt.format('ms'),
+                    'retransmissoes ' + self.retransmits.format(),
+                    'cwnd ' + self.cwnd.format(),
+                    'entrega ' + self.delivery_rate.format('Mbit/s'),
+                ]
+            )
+
+    def reset(self) -> None:
+        with self.__lock:
+            for histogram in (self.rtt, self.retransmits, self.cwnd, self.delivery_rate):
+                histogram.reset()
+
+    @staticmethod
+    def worst(limit: int = 10) -> List[Tuple['Proxy', str, tuple]]:
+        with tunnels_lock:
+            active = list(tunnels)
+
+        latest = []
+        for tunnel in active:
+            for name, ring in list(tunnel.tcp_info.items()):
+                if ring:
+                    latest.append((tunnel, name, ring[-1]))
+
+        latest.sort(key=lambda item: -item[2][1])
+        return latest[:limit]
+
+
+tunnels = set()
+tunnels_lock = threading.Lock()
+tcp_info_sampler: Optional[TcpInfoSampler] = None
+
+
+def admin_tcpinfo(args: List[str]) -> str:
+    if tcp_info_sampler is None:
+        return 'amostragem TCP_INFO desligada'
+
+    if args and args[0] == 'reset':
+        tcp_info_sampler.reset()
+        return 'histogramas zerados'
+
+    return tcp_info_sampler.histograms()
+
+
+def admin_tunnels(args: List[str]) -> str:
+    if tcp_info_sampler is None:
+        return 'amostragem TCP_INFO desligada'
+
+    lines = []
+    for tunnel, leg, info in TcpInfoSampler.worst(int(args[0]) if args else 10):
+        _, rtt, rttvar, retransmits, cwnd, delivery_rate = info
+        connection = tunnel.client if leg == 'client' else tunnel.server
+        lines.append(
+            f'{connection} rtt={rtt / 1000:.1f}ms rttvar={rttvar / 1000:.1f}ms '
+            f'retrans={retransmits} cwnd={cwnd} '
+            f'entrega={delivery_rate * 8 / 1000 / 1000:.2f}Mbit/s'
+        )
+
+    return '\n'.join(lines) or 'nenhum túnel amostrado'
+
+
 class RemoteTypes(Enum):
     SSH = 'ssh'
     OPENVPN = 'openvpn'
@@ -99,14 +1186,15 @@ class HttpParser:
         self.method = None
         self.body = None
         self.url = None
+        self.target = None
         self.headers = {}
 
     def parse(self, data: bytes) -> None:
         data = data.decode('utf-8')
         lines = data.split('\r\n')
 
-        self.method, self.url, self.version = lines[0].split()
-        self.url = urlparse(self.url)
+        self.method, self.target, self.version = lines[0].split()
+        self.url = urlparse(self.target)
 
         self.headers.update(
             {k: v.strip() for k, v in [line.split(':', 1) for line in lines[1:] if ':' in line]}
@@ -118,6 +1206,23 @@ class HttpParser:
             else '\r\n'.join(lines[-1 : -1 * int(self.headers['Content-Length'])])
         )
 
+    @property
+    def authority(self) -> Tuple[str, int]:
+        host, port = self.target.rsplit(':', 1)
+        return host.strip('[]'), int(port)
+
+    def get_header(self, name: str) -> Optional[str]:
+        for key, value in self.headers.items():
+            if key.lower() == name.lower():
+                return value
+        return None
+
+    def pop_header(self, name: str) -> Optional[str]:
+        for key in list(self.headers):
+            if key.lower() == name.lower():
+                return self.headers.pop(key)
+        return None
+
     def build(self) -> bytes:
         base = f'{self.method} {self.url.path} {self.version}\r\n'
         headers = '\r\n'.join(f'{k}: {v}' for k, v in self.headers.items()) + '\r\n' * 2
@@ -125,11 +1230,13 @@ class HttpParser:
 
 
 class Connection:
-    def __init__(self, conn: Union[socket.socket, ssl.SSLSocket], addr: Tuple[str, int]):
+    def __init__(self, conn: Optional[Union[socket.socket, ssl.SSLSocket]], addr: Tuple[str, int]):
         self.__conn = conn
         self.__addr = addr
         self.__buffer = b''
         self.__closed = False
+        self.__eof = False
+        self.__write_closed = False
 
     @property
     def conn(self) -> Union[socket.socket, ssl.SSLSocket]:
@@ -175,13 +1282,51 @@ class Connection:
     def closed(self, value: bool) -> None:
         self.__closed = value
 
+    @property
+    def eof(self) -> bool:
+        return self.__eof
+
+    @property
+    def write_closed(self) -> bool:
+        return self.__write_closed
+
+    @property
+    def can_half_close(self) -> bool:
+        return not isinstance(self.__conn, ssl.SSLSocket)
+
+    @property
+    def pending(self) -> int:
+        if isinstance(self.__conn, ssl.SSLSocket) and not self.__closed:
+            return self.__conn.pending()
+        return 0
+
     def close(self):
-        self.conn.close()
+        if self.__conn is not None:
+            self.conn.close()
         self.closed = True
 
+    def shutdown_write(self) -> bool:
+        if self.__write_closed:
+            return True
+
+        if not self.can_half_close:
+            return False
+
+        try:
+            self.conn.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+
+        self.__write_closed = True
+        return True
+
     def read(self, size: int = 4096) -> Optional[bytes]:
         data = self.conn.recv(size)
-        return data if len(data) > 0 else None
+        if len(data) > 0:
+            return data
+
+        self.__eof = True
+        return None
 
     def write(self, data: Union[bytes, str]) -> int:
         if isinstance(data, str):
@@ -219,12 +1364,12 @@ class Server(Connection):
 
     @classmethod
     def of(cls, addr: Tuple[str, int]) -> 'Server':
-        return cls(socket.socket(socket.AF_INET, socket.SOCK_STREAM), addr)
+        return cls(None, addr)
 
     def connect(self, addr: Tuple[str, int] = None, timeout: int = 5) -> None:
         self.addr = addr or self.addr
-        self.conn = socket.create_connection(self.addr, timeout)
-        self.conn.settimeout(None)
+        addresses = resolver.resolve(*self.addr)
+        self.conn = connect_happy_eyeballs(addresses, timeout)
 
         logger.debug(f'{self} Conexão estabelecida')
 
@@ -239,7 +1384,21 @@ class Proxy(threading.Thread):
         self.http_parser = HttpParser()
         self.parser_type = ParserType(bytes())
 
+        self.username = None
+        self.tcp_info: Dict[str, deque] = {}
+
+        self.started_at = time.time()
+        self.bytes_in = 0
+        self.bytes_out = 0
+
         self.__running = False
+        self.__rejected = False
+        self.__upgraded = False
+        self.__queued = 0
+        self.__sampled = False
+        self.__speculative: Optional[Tuple[Tuple[str, int], socket.socket]] = None
+        self.__reason: Optional[str] = None
+        self.__half_closed_at: Optional[float] = None
 
     @property
     def running(self) -> bool:
@@ -251,8 +1410,31 @@ class Proxy(threading.Thread):
     def running(self, value: bool) -> None:
         self.__running = value
 
+    @property
+    def finished(self) -> bool:
+        if self.__rejected:
+            return not self.client.buffer
+
+        server = self.server if self.server and not self.server.closed else None
+
+        if server is None:
+            return self.client.eof and not self.client.buffer
+
+        if self.client.eof and server.eof:
+            return not self.client.buffer and not server.buffer
+
+        if server.eof and not self.client.buffer:
+            return not self.client.can_half_close
+
+        return False
+
     def _process_request(self, data: bytes) -> None:
-        if self.parser_type.type is not None and self.server and not self.server.closed:
+        if recorder is not None and not self.__sampled:
+            self.__sampled = True
+            if recorder.sample():
+                recorder.record(self.client.addr[0], data)
+
+        if self.server and not self.server.closed:
             self.server.queue(data)
             return
 
@@ -267,12 +1449,26 @@ class Proxy(threading.Thread):
         if self.parser_type.type is None:
             self.http_parser.parse(data)
 
+            if not self._authenticate():
+                return
+
+            if mux_enabled and (self.http_parser.get_header('Upgrade') or '').lower() == 'yamux':
+                self.client.queue(MuxSession.UPGRADE_RESPONSE)
+                self.__upgraded = True
+                return
+
             if self.http_parser.method == 'CONNECT':
-                host, port = self.http_parser.url.path.split(':')
+                host, port = self.http_parser.authority
 
         if host is not None and port is not None:
-            self.server = Server.of((host, int(port)))
-            self.server.connect()
+            self.server = self._take_speculative((host, int(port)))
+            if self.server is None:
+                self.server = Server.of((host, int(port)))
+                try:
+                    self.server.connect()
+                except OSError:
+                    self.__reason = 'upstream'
+                    raise
 
         if self.http_parser.method == 'CONNECT' or self.parser_type.type is None:
             self.client.queue(DEFAULT_RESPONSE)
@@ -288,17 +1484,90 @@ class Proxy(threading.Thread):
         else:
             logger.info(f'{self.client} -> Solicitação: {self.http_parser.build()}')
 
+    def _speculate(self) -> None:
+        if preconnect is None or self.server is not None:
+            return
+
+        addr = REMOTES_ADDRESS[preconnect]
+        addresses = Resolver.literal(*addr)
+        if not addresses:
+            return
+
+        family, sockaddr = addresses[0]
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setblocking(False)
+
+        if sock.connect_ex(sockaddr) not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+            sock.close()
+            return
+
+        self.__speculative = (addr, sock)
+
+    def _discard_speculative(self) -> None:
+        if self.__speculative is None:
+            return
+
+        _, sock = self.__speculative
+        self.__speculative = None
+        sock.close()
+        stats.add(SharedStats.SPEC_MISSES)
+
+    def _take_speculative(self, addr: Tuple[str, int], timeout: int = 5) -> Optional[Server]:
+        if self.__speculative is None or self.__speculative[0] != addr:
+            self._discard_speculative()
+            return None
+
+        _, sock = self.__speculative
+        self.__speculative = None
+
+        _, writable, _ = select.select([], [sock], [], timeout)
+        if not writable or sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) != 0:
+            sock.close()
+            stats.add(SharedStats.SPEC_MISSES)
+            return None
+
+        sock.setblocking(True)
+        stats.add(SharedStats.SPEC_HITS)
+
+        server = Server(sock, addr)
+        logger.debug(f'{server} Conexão antecipada reutilizada')
+        return server
+
+    def _authenticate(self) -> bool:
+        header = self.http_parser.pop_header('Proxy-Authorization')
+        if authenticator is None or self.username is not None:
+            return True
+
+        self.username, response = authenticator.authenticate(header)
+        if response is None:
+            logger.info(f'{self.client} -> Autenticado como {self.username}')
+            return True
+
+        logger.warning(f'{self.client} -> Autenticação recusada')
+        self.client.queue(response)
+        self.__rejected = True
+        return False
+
     def _get_waitable_lists(self) -> Tuple[List[socket.socket]]:
-        r, w, e = [self.client.conn], [], []
+        r, w, e = [], [], []
+        server = self.server if self.server and not self.server.closed else None
 
-        if self.server and not self.server.closed:
-            r.append(self.server.conn)
+        if not self.client.eof and not (server and len(server.buffer) >= MAX_TUNNEL_BUFFER):
+            r.append(self.client.conn)
+
+        if (
+            server
+            and not server.eof
+            and len(self.client.buffer) < MAX_TUNNEL_BUFFER
+            and not governor.throttled(self)
+        ):
+            r.append(server.conn)
 
         if self.client.buffer:
             w.append(self.client.conn)
 
-        if self.server and not self.server.closed and self.server.buffer:
-            w.append(self.server.conn)
+        if server and server.buffer:
+            w.append(server.conn)
 
         return r, w, e
 
@@ -312,44 +1581,649 @@ class Proxy(threading.Thread):
             logger.debug(f'{self.server} enviou {sent} Bytes')
 
     def _process_rlist(self, rlist: List[socket.socket]) -> None:
-        if self.client.conn in rlist:
+        if self.client.conn in rlist or self.client.pending:
             data = self.client.read()
-            self.running = data is not None
-            if data and self.running:
+            if data:
+                self.bytes_in += len(data)
+                stats.add(SharedStats.BYTES_IN, len(data))
                 self._process_request(data)
                 logger.debug(f'{self.client} recebeu {len(data)} Bytes')
 
         if self.server and not self.server.closed and self.server.conn in rlist:
             data = self.server.read()
-            self.running = data is not None
-            if data and self.running:
+            if data:
+                self.bytes_out += len(data)
+                stats.add(SharedStats.BYTES_OUT, len(data))
                 self.client.queue(data)
                 logger.debug(f'{self.server} recebeu {len(data)} Bytes')
 
+    def _process_half_close(self) -> None:
+        server = self.server if self.server and not self.server.closed else None
+
+        if server and self.client.eof and not server.buffer and not server.write_closed:
+            server.shutdown_write()
+            logger.debug(f'{server} escrita encerrada')
+
+        if server and server.eof and not self.client.buffer and not self.client.write_closed:
+            if self.client.shutdown_write():
+                logger.debug(f'{self.client} escrita encerrada')
+
+        if self.finished:
+            self.running = False
+            return
+
+        if self.__half_closed_at is None:
+            if self.client.write_closed or (server and server.write_closed):
+                self.__half_closed_at = time.monotonic()
+        elif time.monotonic() - self.__half_closed_at >= HALF_CLOSE_TIMEOUT:
+            logger.debug(f'{self.client} Tempo de espera após half-close esgotado')
+            self.__reason = 'linger'
+            self.running = False
+
+    @property
+    def route(self) -> str:
+        if self.__upgraded:
+            return 'mux'
+        if self.parser_type.type is not None:
+            return self.parser_type.type.value
+        if self.http_parser.method == 'CONNECT':
+            return 'connect'
+        if self.http_parser.method is not None:
+            return 'http'
+        return 'sni' if self.server is not None else 'none'
+
+    @property
+    def close_reason(self) -> str:
+        if self.__reason is not None:
+            return self.__reason
+        if self.__rejected:
+            return 'rejected'
+        if self.server is None:
+            return 'no_route'
+        return 'server' if self.server.eof and not self.client.eof else 'client'
+
+    def _log_access(self) -> None:
+        target = None
+        if self.server is not None and not self.server.closed:
+            try:
+                target = self.server.conn.getpeername()
+            except OSError:
+                target = None
+
+        access_log.log(
+            self.started_at,
+            self.client.addr,
+            target,
+            self.bytes_in,
+            self.bytes_out,
+            self.route,
+            self.close_reason,
+        )
+
+    def _accept_mux_stream(self, sock: socket.socket) -> None:
+        proxy = Proxy(Client(sock, self.client.addr))
+        proxy.daemon = True
+        proxy.start()
+
+    def _serve_mux(self) -> None:
+        session = MuxSession(self.client, self._accept_mux_stream, mux_max_streams, mux_keepalive)
+        session.serve()
+
+    def _account(self) -> None:
+        queued = len(self.client.buffer)
+        if self.server and not self.server.closed:
+            queued += len(self.server.buffer)
+
+        governor.update(self, queued - self.__queued)
+        self.__queued = queued
+
     def _process(self) -> None:
         self.running = True
 
-        while self.running:
+        while self.running and not self.__upgraded:
             rlist, wlist, xlist = self._get_waitable_lists()
-            r, w, _ = select.select(rlist, wlist, xlist, 1)
+            timeout = 0 if self.client.pending else 1
+            r, w, _ = select.select(rlist, wlist, xlist, timeout)
 
             self._process_wlist(w)
             self._process_rlist(r)
+            self._process_half_close()
+            self._account()
 
     def run(self) -> None:
+        connection_counter.increment()
+        with tunnels_lock:
+            tunnels.add(self)
+
         try:
             logger.info(f'{self.client} Conectado')
+            self._speculate()
             self._process()
+
+            if self.__upgraded:
+                self._discard_speculative()
+                self._serve_mux()
         except Exception as e:
+            stats.add(SharedStats.ERRORS)
+            if self.__reason is None:
+                reset = isinstance(e, (ConnectionResetError, BrokenPipeError))
+                self.__reason = 'reset' if reset else 'error'
             logger.exception(f'{self.client} Erro: {e}')
         finally:
+            connection_counter.decrement()
+            with tunnels_lock:
+                tunnels.discard(self)
+            governor.update(self, -self.__queued)
+            self._discard_speculative()
+
+            if access_log is not None:
+                self._log_access()
+
             self.client.close()
             if self.server and not self.server.closed:
                 self.server.close()
 
+            if self.username is not None:
+                authenticator.release(self.username)
+
             logger.info(f'{self.client} Desconectado')
 
 
+class MuxStream:
+    def __init__(self, stream_id: int, sock: socket.socket, window: int) -> None:
+        self.id = stream_id
+        self.sock = sock
+        self.sock.setblocking(False)
+
+        self.send_window = window
+        self.inbound = b''
+        self.unacked = 0
+
+        self.local_eof = False
+        self.remote_fin = False
+        self.write_closed = False
+
+
+class MuxSession:
+    HEADER = struct.Struct('!BBHII')
+    VERSION = 0
+
+    DATA = 0
+    WINDOW_UPDATE = 1
+    PING = 2
+    GO_AWAY = 3
+
+    SYN = 1
+    ACK = 2
+    FIN = 4
+    RST = 8
+
+    INITIAL_WINDOW = 256 * 1024
+    MAX_FRAME = 16 * 1024
+
+    UPGRADE_REQUEST = (
+        'GET / HTTP/1.1\r\nHost: {host}\r\nConnection: Upgrade\r\nUpgrade: yamux\r\n\r\n'
+    )
+    UPGRADE_RESPONSE = (
+        b'HTTP/1.1 101 Switching Protocols\r\nConnection: Upgrade\r\nUpgrade: yamux\r\n\r\n'
+    )
+
+    def __init__(
+        self,
+        conn: Connection,
+        accept: Optional[Callable[[socket.socket], None]] = None,
+        max_streams: int = 256,
+        keepalive: float = 30,
+    ) -> None:
+        self.conn = conn
+        self.accept = accept
+        self.max_streams = max_streams
+        self.keepalive = keepalive
+
+        self.streams: Dict[int, MuxStream] = {}
+        self.running = False
+
+        self.__buffer = b''
+        self.__next_id = 1
+        self.__pending: List[socket.socket] = []
+        self.__lock = threading.Lock()
+        self.__wake_r, self.__wake_w = socket.socketpair()
+
+        self.__last_received = time.monotonic()
+        self.__last_ping = time.monotonic()
+        self.__ping_id = 0
+
+    def __str__(self) -> str:
+        return f'Mux - {self.conn.addr[0]}:{self.conn.addr[1]}'
+
+    def frame(self, kind: int, flags: int, stream_id: int, length: int, data: bytes = b'') -> None:
+        self.conn.queue(self.HEADER.pack(self.VERSION, kind, flags, stream_id, length) + data)
+
+    def open_stream(self, sock: socket.socket) -> None:
+        with self.__lock:
+            self.__pending.append(sock)
+        self.__wake_w.send(b'\x00')
+
+    def close(self) -> None:
+        self.running = False
+        try:
+            self.__wake_w.send(b'\x00')
+        except OSError:
+            pass
+
+    def _open_pending(self) -> None:
+        with self.__lock:
+            pending, self.__pending = self.__pending, []
+
+        for sock in pending:
+            stream = MuxStream(self.__next_id, sock, self.INITIAL_WINDOW)
+            self.__next_id += 2
+            self.streams[stream.id] = stream
+            self.frame(self.WINDOW_UPDATE, self.SYN, stream.id, 0)
+
+    def _accept_stream(self, stream_id: int) -> Optional[MuxStream]:
+        if self.accept is None or len(self.streams) >= self.max_streams:
+            logger.warning(f'{self} Stream {stream_id} recusado')
+            self.frame(self.WINDOW_UPDATE, self.RST, stream_id, 0)
+            return None
+
+        local, remote = socket.socketpair()
+        stream = MuxStream(stream_id, local, self.INITIAL_WINDOW)
+        self.streams[stream_id] = stream
+        self.frame(self.WINDOW_UPDATE, self.ACK, stream_id, 0)
+
+        self.accept(remote)
+        return stream
+
+    def _close_stream(self, stream: MuxStream, reset: bool = False) -> None:
+        self.streams.pop(stream.id, None)
+        stream.sock.close()
+
+        if reset:
+            self.frame(self.WINDOW_UPDATE, self.RST, stream.id, 0)
+
+    def _handle_frame(self, kind: int, flags: int, stream_id: int, length: int, data: bytes):
+        if kind == self.PING:
+            if flags & self.SYN:
+                self.frame(self.PING, self.ACK, 0, length)
+            return
+
+        if kind == self.GO_AWAY:
+            self.running = False
+            return
+
+        stream = self.streams.get(stream_id)
+        if stream is None and flags & self.SYN:
+            stream = self._accept_stream(stream_id)
+
+        if stream is None:
+            return
+
+        if flags & self.RST:
+            self._close_stream(stream)
+            return
+
+        if kind == self.WINDOW_UPDATE:
+            stream.send_window += length
+        elif kind == self.DATA and data:
+            if len(data) > self.INITIAL_WINDOW - len(stream.inbound) - stream.unacked:
+                logger.error(f'{self} Stream {stream_id} excedeu a janela')
+                self._close_stream(stream, reset=True)
+                return
+
+            stream.inbound += data
+
+        if flags & self.FIN:
+            stream.remote_fin = True
+
+    def _process_frames(self) -> None:
+        offset = 0
+        size = self.HEADER.size
+
+        while len(self.__buffer) - offset >= size and self.running:
+            version, kind, flags, stream_id, length = self.HEADER.unpack_from(self.__buffer, offset)
+            if version != self.VERSION or kind > self.GO_AWAY:
+                raise ValueError(f'Frame inválido: versão {version} tipo {kind}')
+
+            payload = length if kind == self.DATA else 0
+            if payload > self.INITIAL_WINDOW:
+                raise ValueError(f'Frame de {payload} Bytes excede a janela')
+
+            if len(self.__buffer) - offset < size + payload:
+                break
+
+            data = self.__buffer[offset + size : offset + size + payload]
+            offset += size + payload
+            self._handle_frame(kind, flags, stream_id, length, data)
+
+        self.__buffer = self.__buffer[offset:]
+
+    def _read_stream(self, stream: MuxStream) -> None:
+        try:
+            data = stream.sock.recv(min(stream.send_window, self.MAX_FRAME))
+        except BlockingIOError:
+            return
+        except OSError:
+            self._close_stream(stream, reset=True)
+            return
+
+        if data:
+            stream.send_window -= len(data)
+            self.frame(self.DATA, 0, stream.id, len(data), data)
+            return
+
+        stream.local_eof = True
+        self.frame(self.DATA, self.FIN, stream.id, 0)
+
+    def _write_stream(self, stream: MuxStream) -> None:
+        try:
+            sent = stream.sock.send(stream.inbound)
+        except BlockingIOError:
+            return
+        except OSError:
+            self._close_stream(stream, reset=True)
+            return
+
+        stream.inbound = stream.inbound[sent:]
+        stream.unacked += sent
+
+        if stream.unacked >= self.INITIAL_WINDOW // 2:
+            self.frame(self.WINDOW_UPDATE, 0, stream.id, stream.unacked)
+            stream.unacked = 0
+
+    def _finish_stream(self, stream: MuxStream) -> None:
+        if stream.remote_fin and not stream.inbound and not stream.write_closed:
+            stream.write_closed = True
+            try:
+                stream.sock.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+
+        if stream.local_eof and stream.write_closed:
+            self._close_stream(stream)
+
+    def _ping(self) -> None:
+        if self.keepalive <= 0:
+            return
+
+        now = time.monotonic()
+        if now - self.__last_received > self.keepalive * 3:
+            logger.warning(f'{self} Sem resposta ao keepalive')
+            self.running = False
+            return
+
+        if now - self.__last_ping >= self.keepalive:
+            self.__ping_id = (self.__ping_id + 1) & 0xFFFFFFFF
+            self.__last_ping = now
+            self.frame(self.PING, self.SYN, 0, self.__ping_id)
+
+    def _select(self) -> Tuple[set, set]:
+        r, w = [self.__wake_r], []
+
+        if not self.conn.eof:
+            r.append(self.conn.conn)
+
+        if self.conn.buffer:
+            w.append(self.conn.conn)
+
+        backlogged = len(self.conn.buffer) >= MAX_TUNNEL_BUFFER
+        for stream in self.streams.values():
+            if not stream.local_eof and stream.send_window > 0 and not backlogged:
+                r.append(stream.sock)
+            if stream.inbound:
+                w.append(stream.sock)
+
+        timeout = 0 if self.conn.pending else 1
+        readable, writable, _ = select.select(r, w, [], timeout)
+        return set(readable), set(writable)
+
+    def serve(self) -> None:
+        self.running = True
+        logger.info(f'{self} Sessão iniciada')
+
+        try:
+            while self.running:
+                self._open_pending()
+                readable, writable = self._select()
+
+                if self.__wake_r in readable:
+                    self.__wake_r.recv(4096)
+
+                if self.conn.conn in writable:
+                    self.conn.flush()
+
+                if self.conn.conn in readable or self.conn.pending:
+                    data = self.conn.read(65536)
+                    if data is None:
+                        break
+
+                    self.__buffer += data
+                    self.__last_received = time.monotonic()
+                    self._process_frames()
+
+                for stream in list(self.streams.values()):
+                    if stream.sock in writable and stream.id in self.streams:
+                        self._write_stream(stream)
+                    if stream.sock in readable and stream.id in self.streams:
+                        self._read_stream(stream)
+                    if stream.id in self.streams:
+                        self._finish_stream(stream)
+
+                self._ping()
+        finally:
+            for stream in list(self.streams.values()):
+                self._close_stream(stream)
+
+            self.__wake_r.close()
+            self.__wake_w.close()
+            logger.info(f'{self} Sessão encerrada')
+
+
+class RadixTree:
+    def __init__(self, bits: int) -> None:
+        self.bits = bits
+        self.size = 0
+        self.__root: list = [None, None, None]
+
+    def insert(self, network: int, prefixlen: int, value) -> None:
+        node = self.__root
+        for shift in range(self.bits - 1, self.bits - 1 - prefixlen, -1):
+            bit = (network >> shift) & 1
+            if node[bit] is None:
+                node[bit] = [None, None, None]
+            node = node[bit]
+
+        if node[2] is None:
+            self.size += 1
+        node[2] = value
+
+    def lookup(self, address: int):
+        node = self.__root
+        match = node[2]
+        shift = self.bits - 1
+
+        while shift >= 0:
+            node = node[(address >> shift) & 1]
+            if node is None:
+                break
+            if node[2] is not None:
+                match = node[2]
+            shift -= 1
+
+        return match
+
+
+class AccessRule:
+    def __init__(self, action: str, network: str) -> None:
+        self.action = action
+        self.network = network
+        self.hits = 0
+
+    @property
+    def allow(self) -> bool:
+        return self.action == 'allow'
+
+
+class AccessList:
+    ACTIONS = ('allow', 'deny')
+    IPV4_MAPPED = b'\x00' * 10 + b'\xff\xff'
+
+    def __init__(self, path: str, default: str = 'allow', reload_interval: float = 5) -> None:
+        if default not in self.ACTIONS:
+            raise ValueError(f'Política ACL inválida: {default}')
+
+        self.path = path
+        self.default = default
+        self.reload_interval = reload_interval
+
+        self.default_hits = 0
+        self.denied = 0
+
+        self.__trees = (RadixTree(32), RadixTree(128))
+        self.__rules: List[AccessRule] = []
+        self.__mtime = None
+        self.__checked_at = 0.0
+        self.__reload_requested = False
+        self.__lock = threading.Lock()
+
+        self.reload()
+
+    @staticmethod
+    def parse_network(value: str) -> Tuple[int, int, int]:
+        address, _, prefix = value.partition('/')
+        family = socket.AF_INET6 if ':' in address else socket.AF_INET
+        bits = 128 if family == socket.AF_INET6 else 32
+
+        network = int.from_bytes(socket.inet_pton(family, address), 'big')
+        prefixlen = int(prefix) if prefix else bits
+        if not 0 <= prefixlen <= bits:
+            raise ValueError(f'Prefixo inválido: {value}')
+
+        mask = ((1 << prefixlen) - 1) << (bits - prefixlen)
+        return family, network & mask, prefixlen
+
+    def load(self, lines: Iterator[str]) -> int:
+        trees = (RadixTree(32), RadixTree(128))
+        hits = {(rule.action, rule.network): rule.hits for rule in self.__rules}
+        rules = []
+
+        for number, line in enumerate(lines, 1):
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+
+            parts = line.split()
+            action, value = parts if len(parts) == 2 else ('deny', parts[0])
+            if action not in self.ACTIONS or len(parts) > 2:
+                raise ValueError(f'Linha {number} inválida: {line}')
+
+            try:
+                family, network, prefixlen = self.parse_network(value)
+            except (OSError, ValueError):
+                raise ValueError(f'Linha {number} com rede inválida: {value}')
+
+            rule = AccessRule(action, value)
+            rule.hits = hits.get((action, value), 0)
+            rules.append(rule)
+
+            trees[family == socket.AF_INET6].insert(network, prefixlen, rule)
+
+        self.__trees = trees
+        self.__rules = rules
+        return len(rules)
+
+    def reload(self) -> bool:
+        with self.__lock:
+            self.__checked_at = time.monotonic()
+
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError as e:
+                logger.error(f'ACL {self.path} indisponível: {e}')
+                return False
+
+            if mtime == self.__mtime:
+                return False
+
+            try:
+                with open(self.path) as f:
+                    count = self.load(f)
+            except (OSError, ValueError) as e:
+                logger.error(f'Erro ao carregar ACL {self.path}: {e}')
+                return False
+
+            self.__mtime = mtime
+            logger.info(f'ACL carregada: {count} regras de {self.path}')
+            return True
+
+    def force_reload(self) -> bool:
+        self.__mtime = None
+        return self.reload()
+
+    def request_reload(self) -> None:
+        self.__reload_requested = True
+
+    def lookup(self, host: str) -> Optional[AccessRule]:
+        if ':' in host:
+            raw = socket.inet_pton(socket.AF_INET6, host.split('%', 1)[0])
+            if raw[:12] == self.IPV4_MAPPED:
+                return self.__trees[0].lookup(int.from_bytes(raw[12:], 'big'))
+            return self.__trees[1].lookup(int.from_bytes(raw, 'big'))
+
+        return self.__trees[0].lookup(int.from_bytes(socket.inet_aton(host), 'big'))
+
+    def allowed(self, host: str) -> bool:
+        if self.__reload_requested:
+            self.__reload_requested = False
+            self.force_reload()
+        elif time.monotonic() - self.__checked_at >= self.reload_interval > 0:
+            self.reload()
+
+        try:
+            rule = self.lookup(host)
+        except (OSError, ValueError):
+            rule = None
+
+        if rule is None:
+            self.default_hits += 1
+            allow = self.default == 'allow'
+        else:
+            rule.hits += 1
+            allow = rule.allow
+
+        if not allow:
+            self.denied += 1
+
+        return allow
+
+    def top(self, count: int = 10) -> List[AccessRule]:
+        rules = [rule for rule in self.__rules if rule.hits]
+        return sorted(rules, key=lambda rule: -rule.hits)[:count]
+
+    def __len__(self) -> int:
+        return len(self.__rules)
+
+
+acl: Optional[AccessList] = None
+
+
+def admin_acl(args: List[str]) -> str:
+    if acl is None:
+        return 'ACL desligada'
+
+    if args and args[0] == 'reload':
+        return 'recarregada' if acl.force_reload() else 'sem alterações'
+
+    lines = [
+        f'regras={len(acl)} padrão={acl.default} '
+        f'acertos_padrão={acl.default_hits} bloqueados={acl.denied}'
+    ]
+    for rule in acl.top(int(args[0]) if args else 10):
+        lines.append(f'{rule.hits:>10} {rule.action} {rule.network}')
+
+    return '\n'.join(lines)
+
+
 class TCP:
     def __init__(self, addr: Tuple[str, int] = None, backlog: int = 5):
         self.__addr = addr
@@ -370,6 +2244,11 @@ class TCP:
         try:
             while True:
                 conn, addr = self.__sock.accept()
+                if acl is not None and not acl.allowed(addr[0]):
+                    logger.debug(f'Cliente - {addr[0]}:{addr[1]} Bloqueado pela ACL')
+                    conn.close()
+                    continue
+
                 self.handle(conn, addr)
         except KeyboardInterrupt:
             pass
@@ -386,23 +2265,149 @@ class HTTP(TCP):
         proxy.start()
 
 
+OP_PRIORITIZE_CHACHA = getattr(ssl, 'OP_PRIORITIZE_CHACHA', 0x00200000)
+
+TLS_VERSIONS = {'1.2': ssl.TLSVersion.TLSv1_2, '1.3': ssl.TLSVersion.TLSv1_3}
+TLS_AESGCM_CIPHERS = 'ECDHE+AESGCM'
+TLS_CHACHA_CIPHERS = 'ECDHE+CHACHA20'
+
+tls_cipher_order = 'auto'
+tls_max_version = '1.3'
+
+
+def cpu_has_aes(path: str = '/proc/cpuinfo') -> bool:
+    try:
+        with open(path) as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                if name.strip().lower() in ('flags', 'features') and 'aes' in value.split():
+                    return True
+    except OSError:
+        pass
+
+    return False
+
+
+def tls_cipher_list(order: str = 'auto') -> str:
+    if order == 'auto':
+        order = 'aesgcm' if cpu_has_aes() else 'chacha20'
+
+    ciphers = [TLS_AESGCM_CIPHERS, TLS_CHACHA_CIPHERS]
+    if order == 'chacha20':
+        ciphers.reverse()
+
+    return ':'.join(ciphers + ['!aNULL', '!eNULL', '!MD5', '!DSS'])
+
+
+def create_server_context(cert: str) -> ssl.SSLContext:
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.minimum_version = ssl.TLSVersion.TLSv1_2
+    context.maximum_version = TLS_VERSIONS[tls_max_version]
+
+    context.set_ciphers(tls_cipher_list(tls_cipher_order))
+    context.options |= ssl.OP_CIPHER_SERVER_PREFERENCE | OP_PRIORITIZE_CHACHA
+
+    context.load_cert_chain(certfile=cert, keyfile=cert)
+    return context
+
+
+class SniRouter:
+    def __init__(self) -> None:
+        self.__routes: Dict[str, str] = {}
+        self.__contexts: Dict[str, ssl.SSLContext] = {}
+
+    @staticmethod
+    def _match(mapping: dict, server_name: Optional[str]):
+        if not server_name:
+            return None
+
+        server_name = server_name.lower().rstrip('.')
+        if server_name in mapping:
+            return mapping[server_name]
+
+        _, _, parent = server_name.partition('.')
+        return mapping.get('*.' + parent) if parent else None
+
+    def add_route(self, server_name: str, target: str) -> None:
+        if target not in REMOTES_ADDRESS and ':' not in target:
+            raise ValueError(f'Destino SNI inválido: {target}')
+
+        self.__routes[server_name.lower()] = target
+
+    def add_certificate(self, server_name: str, cert: str) -> None:
+        self.__contexts[server_name.lower()] = create_server_context(cert)
+
+    def route(self, server_name: Optional[str]) -> Optional[Tuple[str, int]]:
+        target = self._match(self.__routes, server_name)
+        if target is None:
+            return None
+
+        if target in REMOTES_ADDRESS:
+            return REMOTES_ADDRESS[target]
+
+        host, port = target.rsplit(':', 1)
+        return host.strip('[]'), int(port)
+
+    def callback(
+        self,
+        ssl_socket: ssl.SSLSocket,
+        server_name: Optional[str],
+        context: ssl.SSLContext,
+    ) -> None:
+        ssl_socket.sni_name = server_name
+
+        selected = self._match(self.__contexts, server_name)
+        if selected is not None:
+            ssl_socket.context = selected
+
+    def __bool__(self) -> bool:
+        return bool(self.__routes or self.__contexts)
+
+
 class HTTPS(TCP):
-    def __init__(self, addr: Tuple[str, int], cert: str, backlog: int = 5) -> None:
+    def __init__(
+        self,
+        addr: Tuple[str, int],
+        cert: str,
+        backlog: int = 5,
+        router: Optional[SniRouter] = None,
+    ) -> None:
         super().__init__(addr, backlog)
 
         self.__cert = cert
+        self.__router = router
+        self.__context = create_server_context(cert)
+
+        if self.__router:
+            self.__context.sni_callback = self.__router.callback
 
     def handle_thread(self, conn: socket.socket, addr: Tuple[str, int]) -> None:
-        conn = ssl.wrap_socket(
-            sock=conn,
-            keyfile=self.__cert,
-            certfile=self.__cert,
-            server_side=True,
-            ssl_version=ssl.PROTOCOL_TLSv1_2,
-        )
+        try:
+            conn = self.__context.wrap_socket(conn, server_side=True)
+        except (ssl.SSLError, OSError) as e:
+            logger.debug(f'Cliente - {addr[0]}:{addr[1]} Falha no handshake TLS: {e}')
+            conn.close()
+            return
 
         client = Client(conn, addr)
-        proxy = Proxy(client)
+        server = None
+
+        if self.__router:
+            server_name = getattr(conn, 'sni_name', None)
+            remote = self.__router.route(server_name)
+
+            if remote is not None:
+                try:
+                    server = Server.of(remote)
+                    server.connect()
+                except OSError as e:
+                    logger.error(f'{client} Erro SNI {server_name}: {e}')
+                    client.close()
+                    return
+
+                logger.info(f'{client} -> SNI {server_name} - {remote[0]}:{remote[1]}')
+
+        proxy = Proxy(client, server)
         proxy.daemon = True
         proxy.start()
 
@@ -412,7 +2417,25 @@ class HTTPS(TCP):
         thread.start()
 
 
+def print_stats(path: str = STATS_PATH) -> None:
+    row = '%-8s %-6s %-8s %10s %10s %14s %14s %8s'
+    print(row % ('PID', 'MODO', 'PORTA', 'ATIVAS', 'TOTAL', 'ENTRADA', 'SAIDA', 'ERROS'))
+
+    fields = ('active', 'total', 'bytes_in', 'bytes_out', 'errors')
+    totals = [0] * len(fields)
+    for item in SharedStats.read_all(path):
+        values = [item[field] for field in fields]
+        totals = [total + value for total, value in zip(totals, values)]
+        print(row % (item['pid'], item['mode'], item['port'], *values))
+
+    print(row % ('TOTAL', '', '', *totals))
+
+
 def main():
+    global authenticator, recorder, access_log, preconnect, tcp_info_sampler, acl
+    global mux_enabled, mux_max_streams, mux_keepalive, tls_cipher_order, tls_max_version
+    global MAX_TUNNEL_BUFFER, HALF_CLOSE_TIMEOUT
+
     parser = argparse.ArgumentParser(description='Proxy', usage='%(prog)s [options]')
 
     parser.add_argument('--host', default='0.0.0.0', help='Host')
@@ -423,6 +2446,115 @@ def main():
     parser.add_argument('--v2ray-port', type=int, default=1080, help='V2Ray Port')
 
     parser.add_argument('--cert', default='./cert.pem', help='Certificate')
+    parser.add_argument(
+        '--tls-cipher-order',
+        choices=['auto', 'aesgcm', 'chacha20'],
+        default='auto',
+        help='TLS 1.2 cipher preference order: AES-GCM before ChaCha20 or the reverse '
+        '(auto = AES-GCM first when the CPU has AES instructions, ChaCha20 first otherwise)',
+    )
+    parser.add_argument(
+        '--tls-max-version', choices=list(TLS_VERSIONS), default='1.3', help='Max TLS version'
+    )
+    parser.add_argument(
+        '--sni-route',
+        action='append',
+        default=[],
+        metavar='NAME=TARGET',
+        help='Route a TLS server name to ssh, openvpn, v2ray or host:port',
+    )
+    parser.add_argument(
+        '--sni-cert',
+        action='append',
+        default=[],
+        metavar='NAME=CERT',
+        help='Certificate for a TLS server name',
+    )
+
+    parser.add_argument('--dns-ttl', type=float, default=300, help='DNS cache TTL (seconds)')
+    parser.add_argument(
+        '--dns-negative-ttl', type=float, default=30, help='DNS negative cache TTL (seconds)'
+    )
+
+    parser.add_argument('--auth', action='store_true', help='Require Proxy-Authorization')
+    parser.add_argument('--auth-db', default=DATABASE_PATH, help='User database')
+    parser.add_argument(
+        '--auth-refresh', type=float, default=5, help='User database refresh interval (seconds)'
+    )
+
+    parser.add_argument(
+        '--max-buffer-memory',
+        type=int,
+        default=0,
+        help='Process-wide relay buffer budget in MB (0 = unlimited)',
+    )
+    parser.add_argument(
+        '--max-tunnel-buffer',
+        type=int,
+        default=MAX_TUNNEL_BUFFER // 1024,
+        help='Per-tunnel buffer limit in KB',
+    )
+    parser.add_argument(
+        '--half-close-timeout',
+        type=float,
+        default=HALF_CLOSE_TIMEOUT,
+        help='Seconds to wait for the peer to close after a write-side shutdown',
+    )
+
+    parser.add_argument('--record', default=None, help='Handshake corpus file')
+    parser.add_argument(
+        '--record-rate', type=float, default=0.01, help='Fraction of tunnels recorded'
+    )
+    parser.add_argument('--record-bytes', type=int, default=1024, help='Bytes recorded per tunnel')
+    parser.add_argument('--record-max-size', type=int, default=64, help='Max corpus size in MB')
+
+    parser.add_argument('--access-log', default=None, help='Binary access log file')
+    parser.add_argument(
+        '--access-log-max-size', type=int, default=64, help='Access log rotation size in MB'
+    )
+    parser.add_argument(
+        '--access-log-backups', type=int, default=5, help='Rotated access log files kept'
+    )
+
+    parser.add_argument('--admin-socket', default=None, help='Admin unix socket path')
+    parser.add_argument('--profile-rate', type=float, default=100, help='Profiler rate (Hz)')
+    parser.add_argument(
+        '--profile-seconds', type=float, default=30, help='Profiler duration (seconds)'
+    )
+    parser.add_argument('--profile-output', default=None, help='Profiler output file')
+
+    parser.add_argument(
+        '--preconnect',
+        choices=list(REMOTES_ADDRESS),
+        default=None,
+        help='Start connecting to this backend as soon as a client is accepted',
+    )
+
+    parser.add_argument(
+        '--mux', action='store_true', help='Accept multiplexed sessions (Upgrade: yamux)'
+    )
+    parser.add_argument('--mux-max-streams', type=int, default=256, help='Streams per session')
+    parser.add_argument(
+        '--mux-keepalive', type=float, default=30, help='Session keepalive (seconds, 0 = off)'
+    )
+
+    parser.add_argument(
+        '--tcpinfo-interval',
+        type=float,
+        default=0,
+        help='TCP_INFO sampling interval in seconds (0 = off)',
+    )
+
+    parser.add_argument('--acl', default=None, help='CIDR access list file')
+    parser.add_argument(
+        '--acl-default',
+        choices=AccessList.ACTIONS,
+        default='allow',
+        help='Policy for addresses not matched by the access list',
+    )
+    parser.add_argument(
+        '--acl-reload', type=float, default=5, help='Access list reload check (seconds)'
+    )
 
     parser.add_argument('--http', action='store_true', help='HTTP')
     parser.add_argument('--https', action='store_true', help='HTTPS')
@@ -430,22 +2562,75 @@ def main():
     parser.add_argument('--log', default='INFO', help='Log level')
     parser.add_argument('--usage', action='store_true', help='Usage')
 
+    parser.add_argument('--stats', action='store_true', help='Show stats of running proxies')
+    parser.add_argument('--stats-file', default=STATS_PATH, help='Shared stats file')
+
     args = parser.parse_args()
 
+    if args.stats:
+        print_stats(args.stats_file)
+        return
+
     REMOTES_ADDRESS['openvpn'] = (args.host, args.openvpn_port)
     REMOTES_ADDRESS['ssh'] = (args.host, args.ssh_port)
     REMOTES_ADDRESS['v2ray'] = (args.host, args.v2ray_port)
 
+    resolver.ttl = args.dns_ttl
+    resolver.negative_ttl = args.dns_negative_ttl
+
+    if args.record:
+        recorder = HandshakeRecorder(
+            args.record,
+            args.record_rate,
+            args.record_bytes,
+            args.record_max_size * 1024 * 1024,
+        )
+
+    if args.access_log:
+        access_log = AccessLog(
+            args.access_log,
+            args.access_log_max_size * 1024 * 1024,
+            args.access_log_backups,
+        )
+
+    preconnect = args.preconnect
+    mux_enabled = args.mux
+    mux_max_streams = args.mux_max_streams
+    mux_keepalive = args.mux_keepalive
+    governor.budget = args.max_buffer_memory * 1024 * 1024
+    MAX_TUNNEL_BUFFER = args.max_tunnel_buffer * 1024
+    HALF_CLOSE_TIMEOUT = args.half_close_timeout
+
+    if args.auth:
+        if not os.path.exists(args.auth_db):
+            raise FileNotFoundError(f'Banco de dados {args.auth_db} não encontrado')
+
+        authenticator = Authenticator(CredentialCache(args.auth_db, args.auth_refresh))
+
     server = None
 
     if args.http:
         server = HTTP((args.host, args.port), args.backlog)
 
     if args.https:
+        tls_cipher_order = args.tls_cipher_order
+        tls_max_version = args.tls_max_version
+
         if not os.path.exists(args.cert):
             raise FileNotFoundError(f'Certicado {args.cert} não encontrado')
 
-        server = HTTPS((args.host, args.port), args.cert, args.backlog)
+        router = SniRouter()
+        for value in args.sni_route:
+            router.add_route(*value.split('=', 1))
+
+        for value in args.sni_cert:
+            server_name, cert = value.split('=', 1)
+            if not os.path.exists(cert):
+                raise FileNotFoundError(f'Certicado {cert} não encontrado')
+
+            router.add_certificate(server_name, cert)
+
+        server = HTTPS((args.host, args.port), args.cert, args.backlog, router)
 
     if server is None:
         parser.print_help()
@@ -456,7 +2641,49 @@ def main():
         format='[%(asctime)s] %(levelname)s: %(message)s',
     )
 
-    server.run()
+    profiler.rate = args.profile_rate
+    profiler.duration = args.profile_seconds
+    if args.profile_output:
+        profiler.output = args.profile_output
+
+    profiler.watch()
+    signal.signal(signal.SIGUSR2, lambda signum, frame: profiler.request_toggle())
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    if args.acl:
+        if not os.path.exists(args.acl):
+            raise FileNotFoundError(f'ACL {args.acl} não encontrada')
+
+        acl = AccessList(args.acl, args.acl_default, args.acl_reload)
+        signal.signal(signal.SIGHUP, lambda signum, frame: acl.request_reload())
+
+    if args.tcpinfo_interval > 0:
+        tcp_info_sampler = TcpInfoSampler(args.tcpinfo_interval)
+        tcp_info_sampler.start()
+
+    if args.admin_socket:
+        admin = AdminServer(args.admin_socket)
+        admin.register('acl', admin_acl)
+        admin.register('profile', admin_profile)
+        admin.register('stats', admin_stats)
+        admin.register('speculation', admin_speculation)
+        admin.register('tcpinfo', admin_tcpinfo)
+        admin.register('tunnels', admin_tunnels)
+        admin.start()
+
+    try:
+        stats.open(args.port, 'https' if args.https else 'http', args.stats_file)
+    except OSError as e:
+        logger.warning(f'Estatísticas compartilhadas indisponíveis: {e}')
+
+    try:
+        server.run()
+    finally:
+        stats.close()
+        if recorder is not None:
+            recorder.close()
+        if access_log is not None:
+            access_log.close()
 
 
 if __name__ == '__main__':
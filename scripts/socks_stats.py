@@ -0,0 +1,170 @@
+import os
+import mmap
+import time
+import fcntl
+import struct
+import logging
+import tempfile
+import threading
+
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+STATS_PATH = os.path.join(
+    '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(),
+    'glmanager-socks.stats',
+)
+
+
+class SharedStats:
+    # Header and slots are padded to 64-byte cache lines so every counter is 8-byte
+    # aligned for lock-free readers and processes never share a line.
+    HEADER = struct.Struct('<4sHH56x')
+    SLOT = struct.Struct('<IH6s4x9Qd32x')
+    MAGIC = b'GLSS'
+    VERSION = 4
+    SLOTS = 64
+
+    (
+        ACTIVE,
+        TOTAL,
+        BYTES_IN,
+        BYTES_OUT,
+        ERRORS,
+        BUFFERED,
+        THROTTLES,
+        SPEC_HITS,
+        SPEC_MISSES,
+    ) = range(9)
+    FIELDS = (
+        'active',
+        'total',
+        'bytes_in',
+        'bytes_out',
+        'errors',
+        'buffered',
+        'throttles',
+        'spec_hits',
+        'spec_misses',
+    )
+    COUNTERS_OFFSET = struct.calcsize('<IH6s4x')
+
+    def __init__(self) -> None:
+        self.__values = [0] * len(self.FIELDS)
+        self.__lock = threading.Lock()
+
+        self.__mmap: Optional[mmap.mmap] = None
+        self.__offset = 0
+
+    @classmethod
+    def size(cls) -> int:
+        return cls.HEADER.size + cls.SLOT.size * cls.SLOTS
+
+    @staticmethod
+    def _alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def open(self, port: int, mode: str, path: str = STATS_PATH) -> bool:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+
+        try:
+            fcntl.lockf(fd, fcntl.LOCK_EX)
+
+            if os.fstat(fd).st_size < self.size():
+                os.ftruncate(fd, self.size())
+                os.pwrite(fd, self.HEADER.pack(self.MAGIC, self.VERSION, self.SLOTS), 0)
+
+            buffer = mmap.mmap(fd, self.size())
+            magic, version, _ = self.HEADER.unpack_from(buffer)
+            if magic != self.MAGIC or version != self.VERSION:
+                buffer[:] = bytes(self.size())
+                self.HEADER.pack_into(buffer, 0, self.MAGIC, self.VERSION, self.SLOTS)
+
+            for index in range(self.SLOTS):
+                offset = self.HEADER.size + index * self.SLOT.size
+                (pid,) = struct.unpack_from('<I', buffer, offset)
+                if pid and self._alive(pid):
+                    continue
+
+                with self.__lock:
+                    self.SLOT.pack_into(
+                        buffer,
+                        offset,
+                        os.getpid(),
+                        port,
+                        mode.encode()[:6],
+                        *self.__values,
+                        time.time(),
+                    )
+                    self.__mmap = buffer
+                    self.__offset = offset
+                return True
+
+            buffer.close()
+            logger.warning('Sem espaço no arquivo de estatísticas')
+            return False
+        finally:
+            fcntl.lockf(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def close(self) -> None:
+        with self.__lock:
+            if self.__mmap is None:
+                return
+
+            struct.pack_into('<I', self.__mmap, self.__offset, 0)
+            self.__mmap.close()
+            self.__mmap = None
+
+    def add(self, field: int, value: int = 1) -> None:
+        with self.__lock:
+            self.__values[field] += value
+            if self.__mmap is not None:
+                struct.pack_into(
+                    '<Q',
+                    self.__mmap,
+                    self.__offset + self.COUNTERS_OFFSET + field * 8,
+                    self.__values[field],
+                )
+
+    def value(self, field: int) -> int:
+        with self.__lock:
+            return self.__values[field]
+
+    @classmethod
+    def read_all(cls, path: str = STATS_PATH) -> List[dict]:
+        try:
+            with open(path, 'rb') as f:
+                data = f.read(cls.size())
+        except OSError:
+            return []
+
+        if len(data) < cls.HEADER.size:
+            return []
+
+        magic, version, slots = cls.HEADER.unpack_from(data)
+        if magic != cls.MAGIC or version != cls.VERSION:
+            return []
+
+        result = []
+        for index in range(slots):
+            offset = cls.HEADER.size + index * cls.SLOT.size
+            if offset + cls.SLOT.size > len(data):
+                break
+
+            pid, port, mode, *values, started = cls.SLOT.unpack_from(data, offset)
+            if not pid or not cls._alive(pid):
+                continue
+
+            item = dict(zip(cls.FIELDS, values))
+            item.update(pid=pid, port=port, mode=mode.rstrip(b'\0').decode(), started=started)
+            result.append(item)
+
+        return result
@@ -0,0 +1,502 @@
+import os
+import json
+import asyncio
+import signal
+import socket
+import struct
+import argparse
+import logging
+import time
+
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+__author__ = 'Glemison C. Dutra'
+__version__ = '1.0.0'
+
+logger = logging.getLogger(__name__)
+
+FLAG_KEEPALIVE = 1 << 0
+FLAG_REBIND = 1 << 1
+FLAG_DNS = 1 << 2
+FLAG_IPV6 = 1 << 3
+
+FRAME_HEADER = struct.Struct('<H')
+PACKET_HEADER = struct.Struct('<BH')
+IPV4_ADDRESS = struct.Struct('!4sH')
+IPV6_ADDRESS = struct.Struct('!16sH')
+
+UDP_MTU = 65520
+MAX_FRAME_SIZE = PACKET_HEADER.size + IPV6_ADDRESS.size + UDP_MTU
+
+
+def encode_packet(flags: int, conid: int, addr: Tuple[str, int], data: bytes) -> bytes:
+    host, port = addr[0], addr[1]
+
+    if ':' in host:
+        flags |= FLAG_IPV6
+        address = IPV6_ADDRESS.pack(socket.inet_pton(socket.AF_INET6, host), port)
+    else:
+        flags &= ~FLAG_IPV6
+        address = IPV4_ADDRESS.pack(socket.inet_aton(host), port)
+
+    payload = PACKET_HEADER.pack(flags, conid) + address + data
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+def decode_packet(payload: bytes) -> Tuple[int, int, Optional[Tuple[str, int]], bytes]:
+    if len(payload) < PACKET_HEADER.size:
+        raise ValueError('Pacote udpgw muito curto')
+
+    flags, conid = PACKET_HEADER.unpack_from(payload)
+    offset = PACKET_HEADER.size
+
+    if flags & FLAG_KEEPALIVE:
+        return flags, conid, None, b''
+
+    if flags & FLAG_IPV6:
+        raw, port = IPV6_ADDRESS.unpack_from(payload, offset)
+        addr = (socket.inet_ntop(socket.AF_INET6, raw), port)
+        offset += IPV6_ADDRESS.size
+    else:
+        raw, port = IPV4_ADDRESS.unpack_from(payload, offset)
+        addr = (socket.inet_ntoa(raw), port)
+        offset += IPV4_ADDRESS.size
+
+    return flags, conid, addr, bytes(payload[offset:])
+
+
+def default_dns_address() -> Tuple[str, int]:
+    try:
+        with open('/etc/resolv.conf') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) > 1 and parts[0] == 'nameserver':
+                    return parts[1], 53
+    except OSError:
+        pass
+
+    return '8.8.8.8', 53
+
+
+class UdpgwStats:
+    def __init__(self) -> None:
+        self.clients = 0
+        self.flows = 0
+        self.packets_in = 0
+        self.packets_out = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.dropped = 0
+
+        self.__last_time = time.monotonic()
+        self.__last_packets = (0, 0)
+
+    def rates(self) -> Tuple[float, float]:
+        now = time.monotonic()
+        elapsed = max(now - self.__last_time, 1e-6)
+
+        last_in, last_out = self.__last_packets
+        rates = (
+            (self.packets_in - last_in) / elapsed,
+            (self.packets_out - last_out) / elapsed,
+        )
+
+        self.__last_time = now
+        self.__last_packets = (self.packets_in, self.packets_out)
+        return rates
+
+    def __str__(self) -> str:
+        pps_in, pps_out = self.rates()
+        return (
+            f'Clientes: {self.clients} - Fluxos: {self.flows} - '
+            f'Entrada: {pps_in:.1f} pps - Saída: {pps_out:.1f} pps - '
+            f'Descartados: {self.dropped}'
+        )
+
+
+class UdpgwFlow:
+    def __init__(
+        self,
+        client: 'UdpgwClient',
+        conid: int,
+        addr: Tuple[str, int],
+        requested: Tuple[str, int] = None,
+    ) -> None:
+        self.client = client
+        self.conid = conid
+        self.addr = addr
+        self.requested = requested or addr
+
+        family = socket.AF_INET6 if ':' in addr[0] else socket.AF_INET
+        self.sock = socket.socket(family, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+
+        self.client.loop.add_reader(self.sock.fileno(), self._on_readable)
+
+    def _on_readable(self) -> None:
+        while True:
+            try:
+                data = self.sock.recv(UDP_MTU)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                self.client.close_flow(self.conid)
+                return
+
+            self.client.send_reply(self.conid, self.requested, data)
+
+    def send(self, data: bytes) -> None:
+        try:
+            self.sock.sendto(data, self.addr)
+        except (BlockingIOError, InterruptedError):
+            self.client.stats.dropped += 1
+        except OSError as e:
+            logger.debug(f'{self.client} Erro UDP {self.addr[0]}:{self.addr[1]}: {e}')
+            self.client.stats.dropped += 1
+
+    def close(self) -> None:
+        self.client.loop.remove_reader(self.sock.fileno())
+        self.sock.close()
+
+
+class UdpgwClient(asyncio.Protocol):
+    def __init__(self, server: 'UdpgwServer', addr: Tuple[str, int] = None) -> None:
+        self.server = server
+        self.stats = server.stats
+        self.loop = server.loop
+        self.addr = addr
+
+        self.transport: Optional[asyncio.Transport] = None
+        self.flows: 'OrderedDict[int, UdpgwFlow]' = OrderedDict()
+        self.peer = ('', 0)
+
+        self.__buffer = bytearray()
+        self.__paused = False
+
+    def __str__(self) -> str:
+        return f'Cliente - {self.peer[0]}:{self.peer[1]}'
+
+    def connection_made(self, transport: asyncio.Transport) -> None:
+        self.transport = transport
+        self.peer = transport.get_extra_info('peername')[:2]
+
+        if not self.server.accepts(self.addr):
+            logger.warning(f'{self} Limite de clientes atingido')
+            transport.close()
+            return
+
+        self.stats.clients += 1
+        self.server.clients.add(self)
+        self.server.counts[self.addr] = self.server.counts.get(self.addr, 0) + 1
+        logger.info(f'{self} Conectado')
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        if self not in self.server.clients:
+            return
+
+        for conid in list(self.flows):
+            self.close_flow(conid)
+
+        self.server.clients.discard(self)
+        self.server.counts[self.addr] -= 1
+        self.stats.clients -= 1
+        logger.info(f'{self} Desconectado')
+
+    def pause_writing(self) -> None:
+        self.__paused = True
+
+    def resume_writing(self) -> None:
+        self.__paused = False
+
+    def data_received(self, data: bytes) -> None:
+        self.__buffer += data
+        offset = 0
+        view = memoryview(self.__buffer)
+
+        try:
+            while len(view) - offset >= FRAME_HEADER.size:
+                (size,) = FRAME_HEADER.unpack_from(view, offset)
+                if size > MAX_FRAME_SIZE:
+                    logger.error(f'{self} Pacote inválido de {size} Bytes')
+                    self.transport.close()
+                    return
+
+                end = offset + FRAME_HEADER.size + size
+                if len(view) < end:
+                    break
+
+                self.process_packet(view[offset + FRAME_HEADER.size : end])
+                offset = end
+
+                if self.transport.is_closing():
+                    break
+        finally:
+            view.release()
+
+        del self.__buffer[:offset]
+
+    def process_packet(self, payload: memoryview) -> None:
+        try:
+            flags, conid, addr, data = decode_packet(payload)
+        except (ValueError, struct.error, OSError):
+            logger.error(f'{self} Pacote inválido')
+            self.transport.close()
+            return
+
+        if flags & FLAG_KEEPALIVE:
+            return
+
+        requested = addr
+        if flags & FLAG_DNS:
+            addr = self.server.dns_addr
+
+        self.stats.packets_in += 1
+        self.stats.bytes_in += len(data)
+
+        flow = self.flows.get(conid)
+        if flow is not None and (
+            flags & FLAG_REBIND or flow.addr != addr or flow.requested != requested
+        ):
+            self.close_flow(conid)
+            flow = None
+
+        if flow is None:
+            if len(self.flows) >= self.server.max_connections:
+                self.close_flow(next(iter(self.flows)))
+
+            try:
+                flow = UdpgwFlow(self, conid, addr, requested)
+            except OSError as e:
+                logger.error(f'{self} Erro ao abrir fluxo UDP: {e}')
+                self.stats.dropped += 1
+                return
+
+            self.flows[conid] = flow
+            self.stats.flows += 1
+        else:
+            self.flows.move_to_end(conid)
+
+        flow.send(data)
+
+    def send_reply(self, conid: int, addr: Tuple[str, int], data: bytes) -> None:
+        if self.__paused or self.transport is None or self.transport.is_closing():
+            self.stats.dropped += 1
+            return
+
+        self.transport.write(encode_packet(0, conid, addr, data))
+        self.stats.packets_out += 1
+        self.stats.bytes_out += len(data)
+
+    def close_flow(self, conid: int) -> None:
+        flow = self.flows.pop(conid, None)
+        if flow is not None:
+            flow.close()
+            self.stats.flows -= 1
+
+
+class UdpgwServer:
+    def __init__(
+        self,
+        max_clients: int = 1000,
+        max_connections: int = 512,
+        dns_addr: Tuple[str, int] = None,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ) -> None:
+        self.max_clients = max_clients
+        self.max_connections = max_connections
+        self.dns_addr = dns_addr or default_dns_address()
+        self.loop = loop or asyncio.get_event_loop()
+
+        self.stats = UdpgwStats()
+        self.clients = set()
+        self.listeners: Dict[Tuple[str, int], asyncio.AbstractServer] = {}
+        self.limits: Dict[Tuple[str, int], int] = {}
+        self.counts: Dict[Tuple[str, int], int] = {}
+
+    def accepts(self, addr: Tuple[str, int]) -> bool:
+        limit = self.limits.get(addr)
+        if limit is None:
+            return self.stats.clients < self.max_clients
+
+        return self.counts.get(addr, 0) < limit
+
+    async def listen(self, addr: Tuple[str, int], max_clients: int = None) -> None:
+        if max_clients is not None:
+            self.limits[addr] = max_clients
+
+        if addr in self.listeners:
+            return
+
+        listener = await self.loop.create_server(
+            lambda: UdpgwClient(self, addr),
+            host=addr[0],
+            port=addr[1],
+            reuse_address=True,
+        )
+        self.listeners[addr] = listener
+
+        logger.info(f'Servidor iniciado em {addr[0]}:{addr[1]}')
+
+    async def close(self, addr: Tuple[str, int]) -> None:
+        listener = self.listeners.pop(addr, None)
+        self.limits.pop(addr, None)
+        if listener is None:
+            return
+
+        listener.close()
+        for client in [client for client in self.clients if client.addr == addr]:
+            client.transport.close()
+
+        await listener.wait_closed()
+
+        logger.info(f'Servidor finalizado em {addr[0]}:{addr[1]}')
+
+    async def apply(self, ports: Dict[Tuple[str, int], int]) -> None:
+        for addr in [addr for addr in self.listeners if addr not in ports]:
+            await self.close(addr)
+
+        for addr, max_clients in ports.items():
+            try:
+                await self.listen(addr, max_clients)
+            except OSError as e:
+                logger.error(f'Erro ao escutar em {addr[0]}:{addr[1]}: {e}')
+
+    async def watch(self, path: str, interval: float = 1) -> None:
+        reload = asyncio.Event()
+        mtime = None
+
+        try:
+            self.loop.add_signal_handler(signal.SIGHUP, reload.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+        while True:
+            try:
+                current = os.stat(path).st_mtime_ns
+            except OSError:
+                current = None
+
+            if current != mtime or reload.is_set():
+                mtime = current
+                reload.clear()
+
+                try:
+                    await self.apply(load_config(path))
+                except (OSError, ValueError, KeyError) as e:
+                    logger.error(f'Erro ao carregar {path}: {e}')
+
+            try:
+                await asyncio.wait_for(reload.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def report(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            logger.info(str(self.stats))
+
+
+def parse_address(value: str) -> Tuple[str, int]:
+    host, port = value.rsplit(':', 1)
+    return host.strip('[]'), int(port)
+
+
+def load_config(path: str) -> Dict[Tuple[str, int], int]:
+    with open(path) as f:
+        data = json.load(f)
+
+    return {
+        (item.get('host', '127.0.0.1'), int(item['port'])): int(item['max_clients'])
+        for item in data.get('ports', [])
+    }
+
+
+def dump_config(path: str, ports: List[dict], **extra) -> None:
+    data = dict(extra, ports=ports)
+
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=4)
+
+    os.replace(tmp, path)
+
+
+async def serve(args: argparse.Namespace) -> None:
+    server = UdpgwServer(
+        max_clients=args.max_clients,
+        max_connections=args.max_connections_for_client,
+        dns_addr=parse_address(args.dns_addr) if args.dns_addr else None,
+        loop=asyncio.get_event_loop(),
+    )
+
+    for value in args.listen_addr:
+        await server.listen(parse_address(value))
+
+    if args.config:
+        server.loop.create_task(server.watch(args.config, args.reload_interval))
+
+    await server.report(args.stats_interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='UDP Gateway', usage='%(prog)s [options]')
+
+    parser.add_argument(
+        '--listen-addr',
+        action='append',
+        default=[],
+        help='Listen address (host:port), can be repeated',
+    )
+    parser.add_argument(
+        '--max-clients',
+        type=int,
+        default=1000,
+        help='Max clients on ports without a limit in --config',
+    )
+    parser.add_argument(
+        '--max-connections-for-client',
+        type=int,
+        default=512,
+        help='Max UDP connections per client',
+    )
+    parser.add_argument('--dns-addr', default=None, help='DNS server (host:port)')
+    parser.add_argument(
+        '--config',
+        default=None,
+        help='JSON file with the ports to listen on, reloaded on change or SIGHUP',
+    )
+    parser.add_argument(
+        '--reload-interval',
+        type=float,
+        default=1,
+        help='Config file check interval (seconds)',
+    )
+    parser.add_argument('--stats-interval', type=float, default=60, help='Stats interval')
+    parser.add_argument('--log', default='INFO', help='Log level')
+
+    args = parser.parse_args()
+
+    if not args.listen_addr and not args.config:
+        parser.print_help()
+        return
+
+    logging.basicConfig(
+        level=getattr(logging, args.log.upper()),
+        format='[%(asctime)s] %(levelname)s: %(message)s',
+    )
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    try:
+        loop.run_until_complete(serve(args))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logger.info('Finalizando servidor...')
+        loop.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -24,6 +24,7 @@ setup(
     author_email=AUTHOR_EMAIL,
     url=URL,
     platforms=['linux'],
+    python_requires='>=3.7',
     license=LICENSE,
     packages=PACKAGES,
     package_data=PACKAGE_DATA,
@@ -1,6 +1,14 @@
 import pytest
 
+from scripts.udpgw import dump_config
+
+from app.__main__ import create_all
+from app.data.repositories import BadvpnPortRepository
 from app.modules.console.badvpn_console import BadvpnInstaller, BadvpnFlag, BadvpnScreenManager
+from app.modules.console.badvpn_console import BadvpnGateway
+from app.domain.entities import BadvpnPort
+
+create_all()
 
 
 def test_badvpn_flag_flag():
@@ -11,3 +19,50 @@ def test_badvpn_flag_flag():
 
     assert flag.flag == '--listen-addr 127.0.0.1:7300 --max-clients 1100'
     assert flag.command() == '/usr/bin/badvpn-udpgw --listen-addr 127.0.0.1:7300 --max-clients 1100'
+
+
+def test_badvpn_gateway_command(tmp_path):
+    config = str(tmp_path / 'udpgw.json')
+    gateway = BadvpnGateway(config_path=config)
+    ports = [
+        BadvpnPort(host='127.0.0.1', port=7300, max_clients=1100),
+        BadvpnPort(host='127.0.0.1', port=7400, max_clients=200),
+    ]
+
+    assert gateway.backend == 'native'
+    assert gateway.command(ports, 'native')[-2:] == ['--config', config]
+    assert gateway.command(ports, 'badvpn') == [
+        '/usr/bin/badvpn-udpgw',
+        '--listen-addr',
+        '127.0.0.1:7300',
+        '--listen-addr',
+        '127.0.0.1:7400',
+        '--max-clients',
+        '1100',
+    ]
+
+
+def test_badvpn_gateway_open_port_rolls_back_on_sync_failure(tmp_path, monkeypatch):
+    gateway = BadvpnGateway(config_path=str(tmp_path / 'udpgw.json'))
+    monkeypatch.setattr(BadvpnGateway, 'sync', lambda self, backend=None: False)
+
+    assert not gateway.open_port(7399, 100)
+    assert BadvpnPortRepository.get_by_port(7399) is None
+
+
+def test_badvpn_gateway_refuses_mixed_limits_on_badvpn_backend(tmp_path, monkeypatch):
+    config = str(tmp_path / 'udpgw.json')
+    dump_config(config, [], backend='badvpn')
+    gateway = BadvpnGateway(config_path=config)
+    monkeypatch.setattr(BadvpnGateway, 'sync', lambda self, backend=None: True)
+
+    BadvpnPortRepository.create(BadvpnPort(host='127.0.0.1', port=7397, max_clients=1100))
+    try:
+        assert not gateway.open_port(7398, 200)
+        assert BadvpnPortRepository.get_by_port(7398) is None
+
+        assert gateway.open_port(7398, 1100)
+        assert BadvpnPortRepository.get_by_port(7398) is not None
+    finally:
+        BadvpnPortRepository.delete_by_port(7397)
+        BadvpnPortRepository.delete_by_port(7398)
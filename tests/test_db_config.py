@@ -0,0 +1,20 @@
+from sqlalchemy import text
+
+from app.data.config import DBConnection
+
+
+def test_db_connection_reuses_engine_and_applies_pragmas(tmp_path):
+    uri = 'sqlite:///' + str(tmp_path / 'db.sqlite3')
+
+    with DBConnection(uri) as first, DBConnection(uri) as second:
+        assert first.engine is second.engine
+        assert first.session is not second.session
+
+        def pragma(name):
+            return first.session.execute(text('PRAGMA %s' % name)).scalar()
+
+        assert pragma('journal_mode') == 'wal'
+        assert pragma('synchronous') == 1
+        assert pragma('busy_timeout') == 5000
+
+    first.engine.dispose()
@@ -0,0 +1,98 @@
+import datetime
+import threading
+
+from sqlalchemy import create_engine, inspect, text
+
+import app.domain.entities
+
+from app.data.config import Base
+from app.data.migrations import migrate, current_version, LATEST_VERSION
+from app.data.migrations.versions import MIGRATIONS
+
+
+def schema(engine):
+    inspector = inspect(engine)
+    return {
+        table: sorted(index['name'] for index in inspector.get_indexes(table))
+        for table in inspector.get_table_names()
+    }
+
+
+def test_migrate_creates_schema_matching_entities(tmp_path):
+    engine = create_engine('sqlite:///' + str(tmp_path / 'new.sqlite3'))
+    assert migrate(engine) == LATEST_VERSION
+
+    expected = create_engine('sqlite:///' + str(tmp_path / 'expected.sqlite3'))
+    Base.metadata.create_all(expected)
+
+    migrated = schema(engine)
+    assert migrated.pop('schema_version') == []
+    assert migrated == schema(expected)
+
+    with engine.connect() as connection:
+        plan = connection.execute(
+            text('EXPLAIN QUERY PLAN SELECT id FROM users WHERE expiration_date < :now'),
+            {'now': datetime.datetime.now()},
+        ).fetchall()
+
+    assert 'ix_users_expiration_date' in ' '.join(str(row[-1]) for row in plan)
+
+
+def test_migrate_upgrades_legacy_database_once(tmp_path):
+    engine = create_engine('sqlite:///' + str(tmp_path / 'legacy.sqlite3'))
+
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                'CREATE TABLE users (id INTEGER NOT NULL, username VARCHAR(50) NOT NULL, '
+                'password VARCHAR(50) NOT NULL, connection_limit INTEGER NOT NULL, '
+                'expiration_date DATETIME NOT NULL, v2ray_uuid VARCHAR(50), '
+                'created_at DATETIME, updated_at DATETIME, PRIMARY KEY (id), '
+                'UNIQUE (username), UNIQUE (v2ray_uuid))'
+            )
+        )
+        connection.execute(
+            text(
+                'INSERT INTO users (username, password, connection_limit, expiration_date) '
+                'VALUES (\'test\', \'test\', 1, \'2030-01-01 00:00:00\')'
+            )
+        )
+
+    assert migrate(engine) == LATEST_VERSION
+    assert migrate(engine) == LATEST_VERSION
+
+    with engine.connect() as connection:
+        assert current_version(connection) == LATEST_VERSION
+        assert connection.execute(text('SELECT COUNT(*) FROM schema_version')).scalar() == 2
+        assert connection.execute(text('SELECT username FROM users')).scalar() == 'test'
+
+    assert 'ix_users_expiration_date' in schema(engine)['users']
+
+
+def test_concurrent_migrations_apply_each_version_once(tmp_path):
+    uri = 'sqlite:///' + str(tmp_path / 'concurrent.sqlite3')
+    barrier = threading.Barrier(4)
+    results, errors = [], []
+
+    def run():
+        engine = create_engine(uri)
+        barrier.wait()
+        try:
+            results.append(migrate(engine))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            engine.dispose()
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    assert errors == []
+    assert results == [LATEST_VERSION] * 4
+
+    with create_engine(uri).connect() as connection:
+        count = connection.execute(text('SELECT COUNT(*) FROM schema_version')).scalar()
+        assert count == len(MIGRATIONS)
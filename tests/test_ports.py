@@ -0,0 +1,155 @@
+from app.domain.entities import Port
+from app.modules.console import socks_console
+from app.utilities.ports import PortRegistry, listening_ports
+
+TCP = '''  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode
+   0: 00000000:0050 00000000:0000 0A 00000000:00000000 00:00000000 00000000     0        0 101 1
+   1: 0100007F:1C84 00000000:0000 0A 00000000:00000000 00:00000000 00000000     0        0 102 1
+   2: 0100007F:D431 0100007F:0050 01 00000000:00000000 00:00000000 00000000     0        0 103 1
+'''
+TCP6 = '''  sl  local_address                         remote_address                        st
+   0: 00000000000000000000000000000000:0016 00000000000000000000000000000000:0000 0A
+'''
+UDP = '''  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode
+ 100: 00000000:04AA 00000000:0000 07 00000000:00000000 00:00000000 00000000     0        0 104 2
+ 101: 0100007F:9C40 08080808:0035 01 00000000:00000000 00:00000000 00000000     0        0 105 2
+'''
+
+
+class MemoryPortRepository:
+    def __init__(self):
+        self.items = []
+
+    def get_all(self):
+        return list(self.items)
+
+    def replace(self, service, ports):
+        self.items = [item for item in self.items if item.service != service]
+        for port, protocol in ports:
+            if any((item.port, item.protocol) == (port, protocol) for item in self.items):
+                raise ValueError('UNIQUE constraint failed')
+            self.items.append(Port(port=port, protocol=protocol, service=service))
+
+    def delete_by_service(self, service):
+        count = len(self.items)
+        self.items = [item for item in self.items if item.service != service]
+        return count - len(self.items)
+
+
+def make_proc_net(path):
+    (path / 'tcp').write_text(TCP)
+    (path / 'tcp6').write_text(TCP6)
+    (path / 'udp').write_text(UDP)
+    return str(path)
+
+
+def test_listening_ports_parses_tcp_and_udp(tmp_path):
+    assert listening_ports(make_proc_net(tmp_path)) == {
+        (80, 'tcp'),
+        (7300, 'tcp'),
+        (22, 'tcp'),
+        (1194, 'udp'),
+    }
+
+
+def test_port_registry_detects_conflicts(tmp_path):
+    repository = MemoryPortRepository()
+    registry = PortRegistry(repository, make_proc_net(tmp_path))
+
+    registry.claim('socks:80:http', [(80, 'tcp')])
+    registry.claim('badvpn', [(7300, 'tcp')])
+
+    assert registry.owner(80) == 'socks:80:http'
+    assert registry.check(80, 'socks:80:http') is None
+    assert 'socks:80:http' in registry.check(80, 'socks:80:https')
+    assert 'outro processo' in registry.check(22, 'v2ray')
+    assert registry.check(1194, 'openvpn', 'udp') is not None
+    assert registry.check(1194, 'openvpn', 'tcp') is None
+    assert registry.check(70000, 'v2ray') is not None
+
+    registry.release('socks:80:http')
+    assert registry.owner(80) is None
+    assert 'outro processo' in registry.check(80, 'socks:80:https')
+
+
+def test_port_registry_discovers_sources(tmp_path):
+    repository = MemoryPortRepository()
+    repository.replace('socks:8080:http', [(8080, 'tcp')])
+    repository.replace('openvpn', [(1194, 'udp')])
+
+    registry = PortRegistry(repository, make_proc_net(tmp_path))
+    registry.register('socks:', lambda: {'socks:80:http': [(80, 'tcp')]})
+    registry.register('v2ray', lambda: 1 / 0)
+
+    assert registry.owner(80) == 'socks:80:http'
+    assert registry.owner(8080) is None
+    assert registry.owner(1194, 'udp') == 'openvpn'
+
+
+def test_port_registry_retries_failed_sources(tmp_path):
+    calls = []
+
+    def source():
+        calls.append(1)
+        if len(calls) == 1:
+            raise OSError('v2ray indisponível')
+        return {'v2ray': [(1080, 'tcp')]}
+
+    registry = PortRegistry(MemoryPortRepository(), make_proc_net(tmp_path))
+    registry.register('v2ray', source)
+
+    assert registry.owner(1080) is None
+    assert 'v2ray' in registry.check(1080, 'socks:1080:http')
+    assert registry.claim('v2ray', [(1080, 'tcp')]) is None
+    assert len(calls) == 2
+
+
+def test_port_registry_claim_reports_conflicts_without_raising(tmp_path):
+    repository = MemoryPortRepository()
+    registry = PortRegistry(repository, make_proc_net(tmp_path))
+
+    assert registry.claim('badvpn', [(7300, 'tcp')]) is None
+    assert 'badvpn' in registry.claim('socks:7300:http', [(7300, 'tcp')])
+    assert registry.owner(7300) == 'badvpn'
+
+    def replace(service, ports):
+        raise ValueError('UNIQUE constraint failed')
+
+    repository.replace = replace
+    assert registry.claim('v2ray', [(1080, 'tcp')]) is not None
+    assert registry.owner(1080) is None
+
+
+def test_socks_manager_claims_port_before_starting(monkeypatch):
+    events = []
+
+    class FakeRegistry:
+        def claim(self, service, ports):
+            events.append(('claim', service))
+            return 'Porta 80/tcp já está em uso por badvpn' if service.endswith('https') else None
+
+        def release(self, service):
+            events.append(('release', service))
+
+    class FakeClient:
+        def add(self, name, command):
+            events.append(('add', name))
+            raise socks_console.SupervisorError('Supervisor indisponível')
+
+    monkeypatch.setattr(socks_console, 'port_registry', FakeRegistry())
+    monkeypatch.setattr(socks_console, 'SupervisorClient', FakeClient)
+    monkeypatch.setattr(socks_console, 'ensure_certificate', lambda: '/tmp/cert.pem')
+
+    manager = socks_console.SocksManager()
+    flags = socks_console.FlagUtils()
+
+    assert not manager.start('http', 80, flags)
+    assert events == [
+        ('claim', 'socks:80:http'),
+        ('add', 'socks:80:http'),
+        ('release', 'socks:80:http'),
+    ]
+
+    events.clear()
+    assert not manager.start('https', 80, flags)
+    assert events == [('claim', 'socks:80:https')]
@@ -0,0 +1,60 @@
+import os
+
+from app.utilities.proc import ProcessIndex, ProcessInfo, scan
+
+
+def make_process(root, pid, comm, cmdline):
+    path = root / str(pid)
+    path.mkdir()
+    (path / 'comm').write_text(comm + '\n')
+    (path / 'cmdline').write_bytes(b'\0'.join(arg.encode() for arg in cmdline) + b'\0')
+
+
+def test_scan_indexes_processes_by_comm_uid_and_token(tmp_path):
+    make_process(tmp_path, 10, 'sshd', ['sshd: test'])
+    make_process(tmp_path, 11, 'sshd-session', ['sshd-session: test@pts/0'])
+    make_process(
+        tmp_path,
+        12,
+        'python3',
+        ['python3', '/opt/scripts/socks.py', '--port', '80', '--ssh-port', '2222', '--http'],
+    )
+    make_process(tmp_path, 13, 'v2ray', ['/usr/local/bin/v2ray', 'run', '--config=/etc/v2ray.json'])
+    (tmp_path / 'self').mkdir()
+
+    snapshot = scan(str(tmp_path))
+    uid = os.getuid()
+
+    assert sorted(p.pid for p in snapshot.find(comm=('sshd', 'sshd-session'))) == [10, 11]
+    assert len(snapshot.find(uid=uid)) == 4
+    assert snapshot.find(uid=uid + 1) == []
+    assert [p.pid for p in snapshot.find(token='socks.py')] == []
+    assert [p.pid for p in snapshot.find(token='--ssh-port', comm='python3')] == [12]
+    assert [p.pid for p in snapshot.find(token='v2ray')] == [13]
+
+    assert snapshot.option('ssh-port') == '2222'
+    assert snapshot.option('config') == '/etc/v2ray.json'
+    assert snapshot.option('openvpn-port') is None
+
+
+def test_process_info_option_parsing():
+    process = ProcessInfo(1, 'python3', 0, ['socks.py', '--port', '80', '--log=DEBUG', 'port'])
+
+    assert process.option('port') == '80'
+    assert process.option('--log') == 'DEBUG'
+    assert process.option('http') is None
+
+
+def test_process_index_caches_until_ttl_or_invalidate(tmp_path):
+    make_process(tmp_path, 20, 'openvpn', ['openvpn', '--config', 'server.conf'])
+    index = ProcessIndex(ttl=60, proc_path=str(tmp_path))
+
+    assert index.is_running('openvpn')
+
+    make_process(tmp_path, 21, 'v2ray', ['v2ray'])
+    assert not index.is_running('v2ray')
+
+    index.invalidate()
+    assert index.is_running('v2ray')
+    assert index.pids(comm='openvpn', user='root' if os.getuid() == 0 else None) == [20]
+    assert index.pids(user='nonexistent-user') == []
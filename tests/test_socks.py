@@ -0,0 +1,719 @@
+import base64
+import datetime
+import shutil
+import ssl
+import socket
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from scripts import socks
+from scripts.socks import (
+    REMOTES_ADDRESS,
+    AccessList,
+    AccessLog,
+    Authenticator,
+    BufferGovernor,
+    Client,
+    CredentialCache,
+    HandshakeRecorder,
+    Histogram,
+    HttpParser,
+    MuxSession,
+    Proxy,
+    RadixTree,
+    Resolver,
+    SamplingProfiler,
+    Server,
+    SharedStats,
+    SniRouter,
+    TcpInfoSampler,
+    connect_happy_eyeballs,
+    cpu_has_aes,
+    create_server_context,
+    tls_cipher_list,
+)
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return
+        time.sleep(0.01)
+
+    raise AssertionError('timeout')
+
+
+def test_resolver_literal_address_skips_lookup():
+    resolver = Resolver()
+
+    assert resolver.resolve('127.0.0.1', 22) == [(socket.AF_INET, ('127.0.0.1', 22))]
+    assert resolver.resolve('::1', 22) == [(socket.AF_INET6, ('::1', 22, 0, 0))]
+
+
+def test_resolver_caches_positive_and_negative_lookups(monkeypatch):
+    calls = []
+
+    def getaddrinfo(host, port, type=0):
+        calls.append(host)
+        if host == 'invalid.test':
+            raise socket.gaierror(socket.EAI_NONAME, 'not found')
+
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('10.0.0.1', port))]
+
+    monkeypatch.setattr(socket, 'getaddrinfo', getaddrinfo)
+    resolver = Resolver()
+
+    assert resolver.resolve('example.test', 80) == [(socket.AF_INET, ('10.0.0.1', 80))]
+    assert resolver.resolve('EXAMPLE.test', 80) == [(socket.AF_INET, ('10.0.0.1', 80))]
+
+    for _ in range(2):
+        with pytest.raises(socket.gaierror):
+            resolver.resolve('invalid.test', 80)
+
+    assert calls == ['example.test', 'invalid.test']
+
+
+def test_resolver_resolves_in_caller_thread_and_shares_inflight_lookups(monkeypatch):
+    calls = []
+    slow_started = threading.Event()
+    release = threading.Event()
+
+    def getaddrinfo(host, port, type=0):
+        calls.append((host, threading.current_thread().name))
+        if host.startswith('slow'):
+            slow_started.set()
+            release.wait(5)
+
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('10.0.0.1', port))]
+
+    monkeypatch.setattr(socket, 'getaddrinfo', getaddrinfo)
+    resolver = Resolver(timeout=5)
+    results = []
+
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(resolver.resolve('slow.test', 80)), name=f'slow-{i}'
+        )
+        for i in range(2)
+    ] + [
+        threading.Thread(target=resolver.resolve, args=(f'slow{i}.test', 80), name=f'other-{i}')
+        for i in range(10)
+    ]
+    for thread in threads:
+        thread.start()
+
+    slow_started.wait(5)
+    assert resolver.resolve('fast.test', 80) == [(socket.AF_INET, ('10.0.0.1', 80))]
+
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == [[(socket.AF_INET, ('10.0.0.1', 80))]] * 2
+    assert [host for host, _ in calls].count('slow.test') == 1
+    assert ('fast.test', threading.current_thread().name) in calls
+
+
+def test_resolver_interleave_families():
+    addresses = [
+        (socket.AF_INET6, ('::1', 80, 0, 0)),
+        (socket.AF_INET6, ('::2', 80, 0, 0)),
+        (socket.AF_INET, ('10.0.0.1', 80)),
+    ]
+
+    assert Resolver.interleave(addresses) == [addresses[0], addresses[2], addresses[1]]
+
+
+def test_connect_happy_eyeballs_falls_back_to_next_address():
+    closed = socket.socket()
+    closed.bind(('127.0.0.1', 0))
+    closed_port = closed.getsockname()[1]
+    closed.close()
+
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(1)
+
+    addresses = [
+        (socket.AF_INET, ('127.0.0.1', closed_port)),
+        (socket.AF_INET, server.getsockname()),
+    ]
+
+    conn = connect_happy_eyeballs(addresses, timeout=2)
+
+    assert conn.getpeername() == server.getsockname()
+
+    conn.close()
+    server.close()
+
+
+def test_server_of_creates_socket_only_on_connect():
+    backend = socket.socket()
+    backend.bind(('127.0.0.1', 0))
+    backend.listen(1)
+
+    unused = Server.of(backend.getsockname())
+    unused.close()
+    assert unused.closed
+
+    server = Server.of(backend.getsockname())
+    server.connect()
+
+    assert server.conn.getpeername() == backend.getsockname()
+
+    server.close()
+    backend.close()
+
+
+def test_http_parser_connect_authority():
+    parser = HttpParser()
+    parser.parse(b'CONNECT localhost:22 HTTP/1.1\r\nHost: localhost\r\n\r\n')
+
+    assert parser.authority == ('localhost', 22)
+
+    parser.parse(b'CONNECT [::1]:443 HTTP/1.1\r\n\r\n')
+
+    assert parser.authority == ('::1', 443)
+
+
+def test_proxy_half_close_delivers_pending_data():
+    backend = socket.socket()
+    backend.bind(('127.0.0.1', 0))
+    backend.listen(1)
+
+    def echo():
+        conn, _ = backend.accept()
+        while True:
+            data = conn.recv(65536)
+            if not data:
+                break
+            conn.sendall(data)
+        conn.close()
+
+    threading.Thread(target=echo, daemon=True).start()
+
+    local, remote = socket.socketpair()
+    server = Server(socket.create_connection(backend.getsockname()), backend.getsockname())
+    proxy = Proxy(Client(remote, ('127.0.0.1', 0)), server)
+    proxy.start()
+
+    payload = b'x' * 1024 * 1024
+    local.sendall(payload)
+    local.shutdown(socket.SHUT_WR)
+
+    received = b''
+    while True:
+        data = local.recv(65536)
+        if not data:
+            break
+        received += data
+
+    proxy.join(2)
+
+    assert received == payload
+    assert not proxy.is_alive()
+
+    local.close()
+    backend.close()
+
+
+@pytest.fixture
+def speculation(monkeypatch):
+    backend = socket.socket()
+    backend.bind(('127.0.0.1', 0))
+    backend.listen(4)
+    backend.settimeout(1)
+
+    counters = SharedStats()
+    monkeypatch.setattr(socks, 'stats', counters)
+    monkeypatch.setattr(socks, 'preconnect', 'ssh')
+    monkeypatch.setitem(socks.REMOTES_ADDRESS, 'ssh', backend.getsockname())
+
+    local, remote = socket.socketpair()
+    proxy = Proxy(Client(remote, ('127.0.0.1', 0)))
+
+    yield proxy, backend, counters
+
+    if proxy.server is not None:
+        proxy.server.close()
+    local.close()
+    remote.close()
+    backend.close()
+
+
+def test_proxy_speculative_connection_hit(speculation):
+    proxy, backend, counters = speculation
+    host, port = backend.getsockname()
+
+    proxy._speculate()
+    proxy._process_request(f'CONNECT {host}:{port} HTTP/1.1\r\n\r\n'.encode())
+
+    conn, _ = backend.accept()
+    assert proxy.server.conn.getsockname() == conn.getpeername()
+    assert proxy.client.buffer == socks.DEFAULT_RESPONSE
+
+    backend.settimeout(0.1)
+    with pytest.raises(socket.timeout):
+        backend.accept()
+
+    assert counters.value(SharedStats.SPEC_HITS) == 1
+    assert counters.value(SharedStats.SPEC_MISSES) == 0
+    conn.close()
+
+
+def test_proxy_speculative_connection_miss_on_other_target(speculation):
+    proxy, backend, counters = speculation
+
+    proxy._speculate()
+    assert proxy._take_speculative(('127.0.0.1', 1)) is None
+
+    conn, _ = backend.accept()
+    assert conn.recv(1) == b''
+
+    assert counters.value(SharedStats.SPEC_HITS) == 0
+    assert counters.value(SharedStats.SPEC_MISSES) == 1
+    conn.close()
+
+
+def test_proxy_speculative_connection_miss_on_refused(speculation, monkeypatch):
+    proxy, backend, counters = speculation
+    addr = backend.getsockname()
+    backend.close()
+    monkeypatch.setitem(socks.REMOTES_ADDRESS, 'ssh', addr)
+
+    proxy._speculate()
+    assert proxy._take_speculative(addr) is None
+
+    assert counters.value(SharedStats.SPEC_HITS) == 0
+    assert counters.value(SharedStats.SPEC_MISSES) == 1
+
+
+def test_proxy_speculative_connection_discard(speculation):
+    proxy, backend, counters = speculation
+
+    proxy._speculate()
+    proxy._discard_speculative()
+    proxy._discard_speculative()
+
+    conn, _ = backend.accept()
+    assert conn.recv(1) == b''
+
+    assert proxy._take_speculative(backend.getsockname()) is None
+    assert counters.value(SharedStats.SPEC_MISSES) == 1
+    conn.close()
+
+
+def test_proxy_closes_half_closed_tunnel_after_linger_timeout(monkeypatch):
+    monkeypatch.setattr(socks, 'HALF_CLOSE_TIMEOUT', 0.2)
+
+    backend = socket.socket()
+    backend.bind(('127.0.0.1', 0))
+    backend.listen(1)
+
+    local, remote = socket.socketpair()
+    server = Server(socket.create_connection(backend.getsockname()), backend.getsockname())
+    upstream, _ = backend.accept()
+
+    proxy = Proxy(Client(remote, ('127.0.0.1', 0)), server)
+    proxy.start()
+
+    upstream.sendall(b'bye')
+    upstream.shutdown(socket.SHUT_WR)
+
+    assert local.recv(3) == b'bye'
+    proxy.join(3)
+
+    assert not proxy.is_alive()
+    assert proxy.close_reason == 'linger'
+    assert server.closed and proxy.client.closed
+
+    for sock in (local, upstream, backend):
+        sock.close()
+
+
+def test_sni_router_routes_exact_and_wildcard_names():
+    router = SniRouter()
+    router.add_route('vpn.example.com', 'openvpn')
+    router.add_route('*.ws.example.com', '127.0.0.1:8443')
+
+    assert router.route('VPN.example.com') == REMOTES_ADDRESS['openvpn']
+    assert router.route('a.ws.example.com') == ('127.0.0.1', 8443)
+    assert router.route('ws.example.com') is None
+    assert router.route(None) is None
+
+    with pytest.raises(ValueError):
+        router.add_route('bad.example.com', 'unknown')
+
+
+def test_authenticator_uses_incremental_credential_snapshot(tmp_path):
+    path = str(tmp_path / 'db.sqlite3')
+    db = sqlite3.connect(path)
+    db.execute(
+        'CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR(50), '
+        'password VARCHAR(50), connection_limit INTEGER, expiration_date DATETIME, '
+        'updated_at DATETIME)'
+    )
+
+    expiration = datetime.datetime.now() + datetime.timedelta(days=1)
+    db.execute(
+        'INSERT INTO users VALUES (1, ?, ?, 1, ?, CURRENT_TIMESTAMP)',
+        ('test', 'secret', str(expiration)),
+    )
+    db.commit()
+
+    authenticator = Authenticator(CredentialCache(path, refresh_interval=0))
+    header = 'Basic ' + base64.b64encode(b'test:secret').decode()
+
+    username, response = authenticator.authenticate(header)
+    assert username == 'test' and response is None
+
+    _, response = authenticator.authenticate(header)
+    assert response.startswith(b'HTTP/1.1 403')
+
+    authenticator.release('test')
+    _, response = authenticator.authenticate('Basic ' + base64.b64encode(b'test:x').decode())
+    assert response.startswith(b'HTTP/1.1 407')
+
+    db.execute('DELETE FROM users WHERE id = 1')
+    db.commit()
+
+    _, response = authenticator.authenticate(header)
+    assert response.startswith(b'HTTP/1.1 407')
+    assert len(authenticator.credentials) == 0
+
+
+def test_shared_stats_counters_are_aligned():
+    assert SharedStats.HEADER.size % 64 == 0
+    assert SharedStats.SLOT.size % 64 == 0
+    assert SharedStats.COUNTERS_OFFSET % 8 == 0
+    assert SharedStats.size() == SharedStats.HEADER.size + SharedStats.SLOT.size * 64
+
+
+def test_shared_stats_slots_are_visible_to_readers(tmp_path):
+    path = str(tmp_path / 'socks.stats')
+    http, https = SharedStats(), SharedStats()
+
+    assert http.open(80, 'http', path)
+    assert https.open(443, 'https', path)
+
+    http.add(SharedStats.TOTAL)
+    http.add(SharedStats.BYTES_IN, 1024)
+    https.add(SharedStats.ERRORS)
+
+    items = {item['mode']: item for item in SharedStats.read_all(path)}
+
+    assert items['http']['port'] == 80
+    assert items['http']['total'] == 1
+    assert items['http']['bytes_in'] == 1024
+    assert items['https']['errors'] == 1
+
+    http.close()
+
+    assert [item['mode'] for item in SharedStats.read_all(path)] == ['https']
+
+    https.close()
+
+
+def test_buffer_governor_throttles_heaviest_tunnels_first():
+    governor = BufferGovernor(budget=100)
+    heavy, light = object(), object()
+
+    governor.update(heavy, 80)
+    governor.update(light, 30)
+
+    assert governor.throttling
+    assert governor.throttled(heavy)
+    assert not governor.throttled(light)
+    assert governor.events == 1
+
+    governor.update(heavy, -60)
+
+    assert not governor.throttling
+    assert not governor.throttled(heavy)
+    assert governor.total == 50
+
+
+def test_handshake_recorder_anonymizes_and_roundtrips(tmp_path):
+    path = str(tmp_path / 'corpus.bin')
+    recorder = HandshakeRecorder(path, sample_rate=1, max_bytes=64)
+
+    payload = (
+        b'GET / HTTP/1.1\r\nHost: 10.1.2.3:80\r\n'
+        b'Proxy-Authorization: Basic dGVzdDp0ZXN0\r\n\r\n'
+    )
+
+    assert recorder.sample()
+    assert recorder.record('203.0.113.7', payload)
+    recorder.close()
+
+    [(_, client, data)] = list(HandshakeRecorder.iter_corpus(path))
+
+    assert client == recorder.anonymize('203.0.113.7')
+    assert len(data) <= 64
+    assert b'10.1.2.3' not in data
+    assert b'dGVzdDp0ZXN0' not in data
+
+    recorder = HandshakeRecorder(path, sample_rate=1, max_bytes=16)
+    assert recorder.record('203.0.113.7', b'1.1.1.1 1.1.1.1 1.1.1.1')
+    recorder.close()
+
+    [_, (_, _, data)] = list(HandshakeRecorder.iter_corpus(path))
+
+    assert data == b'192.0.2.1 192.0.'
+
+
+def test_sampling_profiler_writes_collapsed_stacks(tmp_path):
+    output = tmp_path / 'profile.folded'
+    profiler = SamplingProfiler(rate=200, duration=5, output=str(output))
+    worker = threading.Event()
+    thread = threading.Thread(target=worker.wait, args=(5,), daemon=True)
+    thread.start()
+
+    assert profiler.start(0.2)
+    assert not profiler.start()
+
+    thread.join(0.3)
+    profiler.stop()
+    worker.set()
+
+    lines = output.read_text().splitlines()
+
+    assert not profiler.running
+    assert any(line.startswith('Thread;') and 'wait' in line for line in lines)
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+
+
+def test_sampling_profiler_toggles_outside_the_signal_handler(tmp_path):
+    output = tmp_path / 'profile.folded'
+    profiler = SamplingProfiler(rate=200, duration=5, output=str(output))
+    profiler.watch()
+
+    profiler.request_toggle()
+    wait_for(lambda: profiler.running)
+
+    profiler.request_toggle()
+    wait_for(lambda: not profiler.running)
+
+    assert output.exists()
+
+
+def test_tcp_info_sampler_reads_socket_and_fills_histograms():
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(1)
+    conn = socket.create_connection(server.getsockname())
+
+    info = TcpInfoSampler.read(conn)
+
+    assert info is not None
+    _, rtt, _, retransmits, cwnd, _ = info
+    assert rtt >= 0 and retransmits == 0 and cwnd > 0
+
+    local, remote = socket.socketpair()
+    assert TcpInfoSampler.read(local) is None
+
+    histogram = Histogram([1, 10])
+    for value in (0.5, 1, 5, 50):
+        histogram.observe(value)
+
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.format('ms') == '<=1ms:2 <=10ms:1 >10ms:1'
+
+    for sock in (conn, server, local, remote):
+        sock.close()
+
+
+def test_radix_tree_longest_prefix_match():
+    tree = RadixTree(32)
+    tree.insert(0x0A000000, 8, 'wide')
+    tree.insert(0x0A010000, 16, 'narrow')
+
+    assert tree.lookup(0x0A010203) == 'narrow'
+    assert tree.lookup(0x0A020304) == 'wide'
+    assert tree.lookup(0x0B000000) is None
+    assert tree.size == 2
+
+
+def test_access_list_policy_hits_and_reload(tmp_path):
+    path = tmp_path / 'acl.txt'
+    path.write_text('# scanners\n10.0.0.0/8\nallow 10.1.0.0/16\ndeny 2001:db8::/32\n')
+
+    acl = AccessList(str(path), default='allow', reload_interval=0)
+
+    assert not acl.allowed('10.2.3.4')
+    assert acl.allowed('10.1.2.3')
+    assert not acl.allowed('2001:db8::1')
+    assert not acl.allowed('::ffff:10.9.9.9')
+    assert acl.allowed('192.0.2.1')
+
+    assert acl.denied == 3
+    assert acl.default_hits == 1
+    assert [(rule.network, rule.hits) for rule in acl.top()][0] == ('10.0.0.0/8', 2)
+
+    path.write_text('deny 192.0.2.0/24\n10.0.0.0/8\n')
+    assert acl.force_reload()
+
+    assert not acl.allowed('192.0.2.1')
+    assert len(acl) == 2
+    assert {rule.network: rule.hits for rule in acl.top()} == {
+        '10.0.0.0/8': 2,
+        '192.0.2.0/24': 1,
+    }
+
+    path.write_text('deny 10.0.0.0/33\n')
+    assert not acl.force_reload()
+    assert len(acl) == 2
+
+
+def test_access_list_reload_request_is_applied_by_next_lookup(tmp_path):
+    path = tmp_path / 'acl.txt'
+    path.write_text('10.0.0.0/8\n')
+
+    acl = AccessList(str(path), default='allow', reload_interval=0)
+    path.write_text('192.0.2.0/24\n')
+
+    with acl._AccessList__lock:
+        acl.request_reload()
+
+    assert acl.allowed('10.1.2.3')
+    assert not acl.allowed('192.0.2.1')
+
+
+def test_access_log_batches_rotates_and_streams(tmp_path):
+    path = str(tmp_path / 'access.bin')
+    size = AccessLog.HEADER.size + AccessLog.RECORD.size * 4
+    log = AccessLog(path, max_size=size, backups=1, batch_size=4, flush_interval=60)
+
+    for index in range(10):
+        log.log(1000.0 + index, ('10.0.0.%d' % index, 40000), ('::1', 22), 10, 20, 'ssh', 'client')
+
+    assert len(AccessLog.files(path)) == 2
+
+    log.log(2000.0, ('2001:db8::1', 1), None, 0, 0, 'none', 'no_route')
+    log.close()
+
+    files = AccessLog.files(path)
+    records = [record for name in files for record in AccessLog.iter_records(name)]
+
+    assert files == [path + '.1', path]
+    assert [record[0] for record in records] == [
+        1004.0,
+        1005.0,
+        1006.0,
+        1007.0,
+        1008.0,
+        1009.0,
+        2000.0,
+    ]
+    assert records[0][2:] == ('10.0.0.4', 40000, '::1', 22, 10, 20, 'ssh', 'client')
+    assert records[-1][2:] == ('2001:db8::1', 1, '::', 0, 0, 0, 'none', 'no_route')
+
+
+def test_mux_session_carries_many_streams_with_flow_control(monkeypatch):
+    from scripts import socks
+
+    backend = socket.socket()
+    backend.bind(('127.0.0.1', 0))
+    backend.listen(16)
+
+    def echo(conn):
+        conn.sendall(b'SSH-2.0-echo\r\n')
+        while True:
+            data = conn.recv(65536)
+            if not data:
+                break
+            conn.sendall(data)
+        conn.close()
+
+    def accept():
+        while True:
+            conn, _ = backend.accept()
+            threading.Thread(target=echo, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=accept, daemon=True).start()
+
+    monkeypatch.setattr(socks, 'mux_enabled', True)
+    monkeypatch.setitem(REMOTES_ADDRESS, 'ssh', backend.getsockname())
+
+    local, remote = socket.socketpair()
+    proxy = Proxy(Client(remote, ('127.0.0.1', 0)))
+    proxy.daemon = True
+    proxy.start()
+
+    local.sendall(MuxSession.UPGRADE_REQUEST.format(host='test').encode())
+    assert local.recv(4096) == MuxSession.UPGRADE_RESPONSE
+
+    session = MuxSession(Server(local, ('127.0.0.1', 0)), keepalive=0)
+    thread = threading.Thread(target=session.serve, daemon=True)
+    thread.start()
+
+    payload = b'x' * (MuxSession.INITIAL_WINDOW * 3)
+    apps = []
+    for _ in range(3):
+        app, stream = socket.socketpair()
+        session.open_stream(stream)
+        apps.append(app)
+
+    def exchange(app, data, size):
+        threading.Thread(target=app.sendall, args=(data,), daemon=True).start()
+        received = b''
+        while len(received) < size:
+            received += app.recv(65536)
+        return received
+
+    for app in apps:
+        app.settimeout(5)
+        assert exchange(app, b'SSH-2.0-echo\r\n', 28) == b'SSH-2.0-echo\r\n' * 2
+
+    assert all(exchange(app, payload, len(payload)) == payload for app in apps)
+
+    for app in apps:
+        app.close()
+
+    session.close()
+    thread.join(5)
+    local.close()
+    proxy.join(5)
+
+    assert not proxy.is_alive()
+    backend.close()
+
+
+def test_tls_cipher_order_follows_cpu_aes_support(tmp_path):
+    cpuinfo = tmp_path / 'cpuinfo'
+    cpuinfo.write_text('processor\t: 0\nflags\t\t: fpu sse2 aes avx\n')
+    assert cpu_has_aes(str(cpuinfo))
+
+    cpuinfo.write_text('processor\t: 0\nFeatures\t: fp asimd crc32\n')
+    assert not cpu_has_aes(str(cpuinfo))
+
+    assert tls_cipher_list('aesgcm').startswith('ECDHE+AESGCM')
+    assert tls_cipher_list('chacha20').startswith('ECDHE+CHACHA20')
+
+
+@pytest.mark.skipif(shutil.which('openssl') is None, reason='openssl not installed')
+def test_generated_ecdsa_certificate_negotiates_tls13(tmp_path):
+    from scripts.certgen import generate_certificate
+
+    cert = generate_certificate(str(tmp_path / 'cert.pem'), 'ec', common_name='test')
+    server_context = create_server_context(cert)
+
+    client_context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    client_context.check_hostname = False
+    client_context.verify_mode = ssl.CERT_NONE
+
+    local, remote = socket.socketpair()
+    thread = threading.Thread(
+        target=lambda: server_context.wrap_socket(remote, server_side=True).close()
+    )
+    thread.start()
+
+    with client_context.wrap_socket(local) as conn:
+        assert conn.version() == 'TLSv1.3'
+        assert conn.getpeercert(binary_form=True)
+
+    thread.join(5)
@@ -0,0 +1,67 @@
+import time
+import threading
+
+from app.utilities.status import StatusService
+
+
+def test_status_service_probes_concurrently_and_caches():
+    calls = []
+
+    def probe(value):
+        def run():
+            calls.append(value)
+            time.sleep(0.2)
+            return value
+
+        return run
+
+    status = StatusService(ttl=60)
+    for name in ('socks', 'v2ray', 'openvpn', 'badvpn'):
+        status.register(name, probe(name))
+
+    start = time.monotonic()
+    assert status.get('socks') == 'socks'
+    assert time.monotonic() - start < 0.6
+    assert sorted(calls) == ['badvpn', 'openvpn', 'socks', 'v2ray']
+
+    start = time.monotonic()
+    assert status.get('v2ray') == 'v2ray'
+    assert time.monotonic() - start < 0.05
+    assert len(calls) == 4
+
+    status.invalidate()
+    assert status.get('openvpn') == 'openvpn'
+    assert len(calls) == 8
+
+
+def test_status_service_failing_probe_returns_default():
+    status = StatusService(timeout=0.2)
+    status.register('broken', lambda: 1 / 0)
+    status.register('slow', lambda: time.sleep(1) or 'late')
+    status.register('running', lambda: False)
+
+    assert status.get('broken', []) == []
+    assert status.get('slow', 'unknown') == 'unknown'
+    assert status.get('running', True) is False
+
+
+def test_status_service_prefetch_discards_invalidated_results():
+    started, release = threading.Event(), threading.Event()
+    values = iter(['old', 'new'])
+
+    def probe():
+        value = next(values)
+        if value == 'old':
+            started.set()
+            release.wait(5)
+        return value
+
+    status = StatusService(ttl=60)
+    status.register('socks', probe)
+
+    status.prefetch()
+    started.wait(5)
+    status.invalidate()
+    release.set()
+
+    assert status.get('socks') == 'new'
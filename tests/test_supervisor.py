@@ -0,0 +1,178 @@
+import os
+import sys
+import time
+import threading
+
+import pytest
+
+from app.modules.supervisor import Supervisor, SupervisorClient, SupervisorError
+from app.modules.supervisor import service as service_module
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = predicate()
+        if result:
+            return result
+        time.sleep(0.05)
+
+    raise AssertionError('timeout')
+
+
+@pytest.fixture
+def supervisor(tmp_path):
+    instances = []
+
+    def start():
+        daemon = Supervisor(
+            str(tmp_path / 'supervisor.sock'),
+            str(tmp_path / 'services.json'),
+            str(tmp_path / 'logs'),
+        )
+        thread = threading.Thread(target=daemon.run, daemon=True)
+        thread.start()
+        instances.append((daemon, thread))
+
+        client = SupervisorClient(daemon.socket_path)
+        wait_for(client.ping)
+        return daemon, client
+
+    def stop(daemon):
+        for item in instances:
+            if item[0] is daemon:
+                daemon.running = False
+                item[1].join(5)
+
+    start.stop = stop
+    yield start
+
+    for daemon, thread in instances:
+        daemon.running = False
+        thread.join(5)
+
+
+def test_supervisor_start_stop_and_logs(supervisor):
+    _, client = supervisor()
+    command = [sys.executable, '-u', '-c', 'import time; print("pronto"); time.sleep(60)']
+
+    service = client.add('socks:8080:http', command)
+    assert service['state'] == 'running'
+    assert service['pid']
+
+    assert [s['name'] for s in client.list('socks:')] == ['socks:8080:http']
+    assert client.list('badvpn') == []
+    assert wait_for(lambda: client.log('socks:8080:http') == ['pronto'])
+
+    client.stop('socks:8080:http')
+    wait_for(lambda: client.status('socks:8080:http')['state'] == 'stopped')
+    service = client.status('socks:8080:http')
+    assert service['pid'] is None
+
+    client.remove('socks:8080:http')
+    assert client.list() == []
+
+    with pytest.raises(SupervisorError):
+        client.status('socks:8080:http')
+
+    with pytest.raises(SupervisorError):
+        client.request('unknown')
+
+
+def test_supervisor_restarts_crashed_service_with_backoff(monkeypatch, supervisor):
+    monkeypatch.setattr(service_module, 'BACKOFF_BASE', 0.05)
+    _, client = supervisor()
+
+    client.add('crash', [sys.executable, '-c', 'import sys; sys.exit(3)'])
+
+    def crashed():
+        status = client.status('crash')
+        return status['state'] == 'backoff' and status['restarts'] >= 2 and status
+
+    status = wait_for(crashed)
+    assert status['exit_code'] == 3
+    assert status['pid'] is None
+
+    status = client.stop('crash')
+    assert status['state'] == 'stopped'
+
+
+def test_supervisor_autostarts_registry_services(supervisor):
+    daemon, client = supervisor()
+    client.add('badvpn_127.0.0.1_7300', [sys.executable, '-c', 'import time; time.sleep(60)'])
+    client.add('idle', [sys.executable, '-c', 'import time; time.sleep(60)'])
+    client.stop('idle')
+
+    pid = client.status('badvpn_127.0.0.1_7300')['pid']
+    supervisor.stop(daemon)
+
+    _, client = supervisor()
+    status = client.status('badvpn_127.0.0.1_7300')
+
+    assert status['state'] == 'running'
+    assert status['pid'] != pid
+    assert client.status('idle')['state'] == 'stopped'
+
+
+IGNORE_TERM = (
+    'import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); '
+    'print("pronto", flush=True); time.sleep(60)'
+)
+
+
+def test_supervisor_stop_does_not_block_and_escalates_to_kill(monkeypatch, supervisor):
+    monkeypatch.setattr(service_module, 'STOP_TIMEOUT', 0.5)
+    _, client = supervisor()
+
+    client.add('stubborn', [sys.executable, '-c', IGNORE_TERM])
+    assert wait_for(lambda: client.log('stubborn') == ['pronto'])
+
+    started = time.monotonic()
+    service = client.stop('stubborn')
+    assert time.monotonic() - started < 0.5
+    assert service['state'] == 'stopping'
+    assert client.ping()
+
+    status = wait_for(
+        lambda: client.status('stubborn')['state'] == 'stopped' and client.status('stubborn')
+    )
+    assert status['exit_code'] == -9
+    assert status['pid'] is None
+
+
+def test_supervisor_restart_starts_after_old_process_exits(monkeypatch, supervisor):
+    monkeypatch.setattr(service_module, 'STOP_TIMEOUT', 0.5)
+    _, client = supervisor()
+
+    pid = client.add('stubborn', [sys.executable, '-c', IGNORE_TERM])['pid']
+    assert wait_for(lambda: client.log('stubborn') == ['pronto'])
+
+    service = client.restart('stubborn')
+    assert service['state'] == 'stopping'
+    assert service['pid'] == pid
+
+    status = wait_for(
+        lambda: client.status('stubborn')['state'] == 'running' and client.status('stubborn')
+    )
+    assert status['pid'] != pid
+    assert status['restarts'] == 1
+
+
+def test_supervisor_rotates_logs_in_place(tmp_path):
+    daemon = Supervisor(
+        str(tmp_path / 'supervisor.sock'),
+        str(tmp_path / 'services.json'),
+        str(tmp_path / 'logs'),
+        log_max_size=1024,
+    )
+    service = service_module.Service('noisy', ['true'], log_path=daemon.log_path('noisy'))
+    daemon.services['noisy'] = service
+
+    os.makedirs(daemon.log_dir)
+    with open(service.log_path, 'wb') as f:
+        f.write(b'x' * 4096)
+
+    daemon._rotate_logs(time.monotonic() + 60)
+
+    assert os.path.getsize(service.log_path) == 0
+    assert os.path.getsize(service.log_path + '.1') == 4096
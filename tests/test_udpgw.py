@@ -0,0 +1,143 @@
+import os
+import time
+import asyncio
+import socket
+
+from scripts.udpgw import (
+    FLAG_DNS,
+    FLAG_IPV6,
+    UdpgwServer,
+    decode_packet,
+    encode_packet,
+    FRAME_HEADER,
+)
+from scripts.udpgw import dump_config
+
+
+def test_udpgw_packet_roundtrip():
+    frame = encode_packet(0, 7, ('10.0.0.1', 53), b'query')
+    (size,) = FRAME_HEADER.unpack_from(frame)
+
+    assert size == len(frame) - FRAME_HEADER.size
+    assert decode_packet(frame[FRAME_HEADER.size :]) == (0, 7, ('10.0.0.1', 53), b'query')
+
+    frame = encode_packet(0, 8, ('::1', 53), b'query')
+    flags, conid, addr, data = decode_packet(frame[FRAME_HEADER.size :])
+
+    assert flags & FLAG_IPV6
+    assert (conid, addr, data) == (8, ('::1', 53), b'query')
+
+
+def test_udpgw_server_relays_udp_datagrams():
+    async def scenario():
+        loop = asyncio.get_event_loop()
+
+        echo = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        echo.bind(('127.0.0.1', 0))
+        echo.setblocking(False)
+        loop.add_reader(echo.fileno(), lambda: echo.sendto(*echo.recvfrom(65535)))
+
+        server = UdpgwServer(loop=loop)
+        await server.listen(('127.0.0.1', 0))
+        listener = next(iter(server.listeners.values()))
+        port = listener.sockets[0].getsockname()[1]
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        for conid in (1, 2):
+            writer.write(encode_packet(0, conid, echo.getsockname(), b'ping %d' % conid))
+
+        replies = []
+        for _ in range(2):
+            (size,) = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+            replies.append(decode_packet(await reader.readexactly(size)))
+
+        assert server.stats.flows == 2
+        assert server.stats.clients == 1
+
+        writer.close()
+        await asyncio.sleep(0.05)
+
+        assert server.stats.flows == 0
+        assert server.stats.clients == 0
+
+        loop.remove_reader(echo.fileno())
+        echo.close()
+        await server.close(next(iter(server.listeners)))
+        return replies
+
+    replies = asyncio.run(scenario())
+
+    assert sorted(replies) == [
+        (0, 1, ('127.0.0.1', replies[0][2][1]), b'ping 1'),
+        (0, 2, ('127.0.0.1', replies[0][2][1]), b'ping 2'),
+    ]
+
+
+def test_udpgw_dns_reply_carries_requested_address():
+    async def scenario():
+        loop = asyncio.get_event_loop()
+
+        resolver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        resolver.bind(('127.0.0.1', 0))
+        resolver.setblocking(False)
+        loop.add_reader(resolver.fileno(), lambda: resolver.sendto(*resolver.recvfrom(65535)))
+
+        server = UdpgwServer(dns_addr=resolver.getsockname(), loop=loop)
+        await server.listen(('127.0.0.1', 0))
+        listener = next(iter(server.listeners.values()))
+        port = listener.sockets[0].getsockname()[1]
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(encode_packet(FLAG_DNS, 3, ('10.9.8.7', 53), b'query'))
+
+        (size,) = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+        reply = decode_packet(await reader.readexactly(size))
+
+        writer.close()
+        loop.remove_reader(resolver.fileno())
+        resolver.close()
+        await server.close(next(iter(server.listeners)))
+        return reply
+
+    assert asyncio.run(scenario()) == (0, 3, ('10.9.8.7', 53), b'query')
+
+
+def test_udpgw_server_applies_port_config(tmp_path):
+    async def scenario():
+        loop = asyncio.get_event_loop()
+        server = UdpgwServer(loop=loop)
+
+        ports = []
+        for _ in range(2):
+            sock = socket.socket()
+            sock.bind(('127.0.0.1', 0))
+            ports.append(sock.getsockname()[1])
+            sock.close()
+
+        path = str(tmp_path / 'udpgw.json')
+        dump_config(path, [{'host': '127.0.0.1', 'port': ports[0], 'max_clients': 1}])
+        watcher = loop.create_task(server.watch(path, 0.05))
+        await asyncio.sleep(0.1)
+
+        assert list(server.listeners) == [('127.0.0.1', ports[0])]
+
+        _, first = await asyncio.open_connection('127.0.0.1', ports[0])
+        reader, second = await asyncio.open_connection('127.0.0.1', ports[0])
+        assert await reader.read() == b''
+        assert server.stats.clients == 1
+
+        dump_config(path, [{'host': '127.0.0.1', 'port': ports[1], 'max_clients': 5}])
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+        await asyncio.sleep(0.2)
+
+        assert list(server.listeners) == [('127.0.0.1', ports[1])]
+        assert server.limits == {('127.0.0.1', ports[1]): 5}
+        assert server.stats.clients == 0
+
+        for writer in (first, second):
+            writer.close()
+
+        watcher.cancel()
+        await server.close(('127.0.0.1', ports[1]))
+
+    asyncio.run(scenario())
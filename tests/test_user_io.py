@@ -0,0 +1,254 @@
+import io
+import json
+import datetime
+
+import pytest
+
+from app.__main__ import create_all
+
+from app.data.repositories import UserRepository
+from app.domain.dtos import UserDto
+from app.domain.entities import User
+from app.domain.use_cases import user_use_case
+from app.domain.use_cases.user_use_case import UserUseCase
+from app.modules.cli.user_io import (
+    RowError,
+    detect_format,
+    export_users,
+    import_users,
+    iter_json,
+)
+
+create_all()
+
+
+class FakeUseCase:
+    def __init__(self, fail: str = None):
+        self.fail = fail
+        self.batches = []
+
+    def create_many(self, users):
+        if any(user.username == self.fail for user in users):
+            raise RuntimeError('falha ao criar %s' % self.fail)
+
+        self.batches.append([user.username for user in users])
+        return {
+            user.username: 'falha ao definir a senha' for user in users if user.password == 'bad'
+        }
+
+
+CSV_DATA = '''username,password,connection_limit,expiration_date,v2ray_uuid
+alice,secret1,2,2030-01-01,
+bob,secret2,1,"Jan 02, 2030",uuid-bob
+root,secret3,1,2030-01-01,
+carol,secret4,0,2030-01-01,
+alice,secret5,1,2030-01-01,
+dave,secret6,1,2030-01-01,uuid-bob
+'''
+
+
+def make_user(username: str, **kwargs) -> User:
+    user = User()
+    user.username = username
+    user.password = kwargs.get('password', 'secret')
+    user.connection_limit = kwargs.get('connection_limit', 1)
+    user.expiration_date = kwargs.get('expiration_date', datetime.datetime(2030, 1, 1))
+    user.v2ray_uuid = kwargs.get('v2ray_uuid')
+    return user
+
+
+def test_detect_format():
+    assert detect_format('users.csv') == 'csv'
+    assert detect_format('users.json') == 'json'
+    assert detect_format('users.ndjson') == 'ndjson'
+    assert detect_format('users.jsonl') == 'ndjson'
+    assert detect_format('-') == 'csv'
+
+
+def test_import_csv_reports_invalid_and_duplicate_rows():
+    use_case, report = FakeUseCase(), io.StringIO()
+
+    result = import_users(io.StringIO(CSV_DATA), 'csv', use_case, set(), set(), report=report)
+
+    assert result == {'created': 2, 'skipped': 4, 'failed': 0}
+    assert use_case.batches == [['alice', 'bob']]
+
+    lines = report.getvalue().splitlines()
+    assert lines == [
+        'row 4: username root is an existing system account',
+        "row 5: invalid connection_limit '0'",
+        'row 6: username alice already exists',
+        'row 7: v2ray_uuid uuid-bob already exists',
+    ]
+
+
+def test_import_chunks_and_falls_back_to_single_rows():
+    rows = [
+        {
+            'username': 'user%d' % i,
+            'password': 'secret',
+            'connection_limit': 1,
+            'expiration_date': '2030-01-01',
+        }
+        for i in range(5)
+    ]
+    data = '\n'.join(json.dumps(row) for row in rows) + '\nnot json\n'
+    use_case, report = FakeUseCase(fail='user3'), io.StringIO()
+
+    result = import_users(
+        io.StringIO(data), 'ndjson', use_case, set(), set(), chunk_size=2, report=report
+    )
+
+    assert result == {'created': 4, 'skipped': 1, 'failed': 1}
+    assert use_case.batches == [['user0', 'user1'], ['user2'], ['user4']]
+    assert 'row 4: user3: falha ao criar user3' in report.getvalue()
+    assert 'row 6: invalid JSON' in report.getvalue()
+
+
+def test_import_counts_rows_rejected_by_the_use_case():
+    data = 'username,password,connection_limit,expiration_date\nalice,bad,1,2030-01-01\n'
+    data += 'bob,secret,1,2030-01-01\n'
+    use_case, report = FakeUseCase(), io.StringIO()
+
+    result = import_users(io.StringIO(data), 'csv', use_case, set(), set(), report=report)
+
+    assert result == {'created': 1, 'skipped': 0, 'failed': 1}
+    assert report.getvalue() == 'row 2: alice: falha ao definir a senha\n'
+
+
+class FakeShell:
+    def __init__(self, accounts, useradd_fails=(), chpasswd_fails=()):
+        self.accounts = set(accounts)
+        self.useradd_fails = set(useradd_fails)
+        self.chpasswd_fails = set(chpasswd_fails)
+        self.passwords = []
+
+    def exists(self, name):
+        return name in self.accounts
+
+    def __call__(self, command, data):
+        lines = data.splitlines()
+        if command == ['chpasswd']:
+            names = [line.split(':')[0] for line in lines]
+            self.passwords += [name for name in names if name not in self.chpasswd_fails]
+            return 1 if self.chpasswd_fails & set(names) else 0
+
+        for line in lines:
+            action, name = line.split()[0], line.split(' 1>')[0].split()[-1]
+            if action == 'useradd' and name not in self.useradd_fails:
+                self.accounts.add(name)
+            elif action == 'userdel':
+                self.accounts.discard(name)
+
+        return 0
+
+
+class FakeRepository:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.created = []
+
+    def create_many(self, users):
+        if self.fail:
+            raise RuntimeError('UNIQUE constraint failed')
+        self.created += [user.username for user in users]
+
+
+def make_dto(username, password='secret'):
+    return UserDto(
+        username=username,
+        password=password,
+        connection_limit=1,
+        expiration_date=datetime.datetime(2030, 1, 1),
+    )
+
+
+@pytest.fixture
+def shell(monkeypatch):
+    shell = FakeShell({'root', 'daemon'})
+    monkeypatch.setattr(user_use_case, 'exec_with_input', shell)
+    monkeypatch.setattr(user_use_case, 'system_user_exists', shell.exists)
+    return shell
+
+
+def test_create_many_never_touches_existing_system_accounts(shell):
+    shell.useradd_fails.add('carol')
+    shell.chpasswd_fails.add('dave')
+    repository = FakeRepository()
+
+    errors = UserUseCase(repository).create_many(
+        [make_dto('root'), make_dto('alice'), make_dto('carol'), make_dto('dave')]
+    )
+
+    assert set(errors) == {'root', 'carol', 'dave'}
+    assert repository.created == ['alice']
+    assert 'root' not in shell.passwords
+    assert shell.accounts == {'root', 'daemon', 'alice'}
+
+
+def test_create_many_removes_accounts_when_the_database_fails(shell):
+    repository = FakeRepository(fail=True)
+
+    with pytest.raises(RuntimeError):
+        UserUseCase(repository).create_many([make_dto('alice'), make_dto('bob')])
+
+    assert shell.accounts == {'root', 'daemon'}
+
+
+def test_iter_json_reads_array_incrementally():
+    data = json.dumps([{'username': 'user%d' % i, 'note': 'x' * 50} for i in range(10)])
+
+    items = list(iter_json(io.StringIO(data), chunk_size=7))
+
+    assert [num for num, _ in items] == list(range(1, 11))
+    assert [item['username'] for _, item in items] == ['user%d' % i for i in range(10)]
+    assert list(iter_json(io.StringIO('  [ ]  '))) == []
+
+    with pytest.raises(RowError):
+        list(iter_json(io.StringIO('{"username": "alice"}')))
+
+    with pytest.raises(RowError):
+        list(iter_json(io.StringIO('[{"username": "alice"}, {"user'), chunk_size=4))
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'json', 'ndjson'])
+def test_export_round_trip(fmt):
+    users = [
+        make_user('alice', connection_limit=2, v2ray_uuid='uuid-alice'),
+        make_user('bob', expiration_date=datetime.datetime(2031, 5, 6, 7, 8, 9)),
+    ]
+    out = io.StringIO()
+
+    assert export_users(users, fmt, out) == 2
+
+    use_case = FakeUseCase()
+    out.seek(0)
+    result = import_users(out, fmt, use_case, set(), set(), report=io.StringIO())
+
+    assert result == {'created': 2, 'skipped': 0, 'failed': 0}
+    assert use_case.batches == [['alice', 'bob']]
+
+
+def test_export_empty_json_is_valid():
+    out = io.StringIO()
+
+    assert export_users([], 'json', out) == 0
+    assert json.loads(out.getvalue()) == []
+
+
+def test_user_repository_bulk_create_and_iterate():
+    users = [make_user('bulk%d' % i, v2ray_uuid='bulk-uuid-%d' % i) for i in range(7)]
+    UserRepository.create_many(users)
+
+    try:
+        names = [user.username for user in UserRepository.iter_all(batch_size=3)]
+        assert [name for name in names if name.startswith('bulk')] == [
+            'bulk%d' % i for i in range(7)
+        ]
+        assert {'bulk0', 'bulk6'} <= UserRepository.get_usernames()
+        assert {'bulk-uuid-0', 'bulk-uuid-6'} <= UserRepository.get_uuids()
+    finally:
+        for i in range(7):
+            user = UserRepository.get_by_username('bulk%d' % i)
+            if user:
+                UserRepository.delete(user.id)